@@ -1,72 +1,365 @@
+import contextvars
 import logging
 import os
+import time
 import telegram
-from config.config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHANNEL_ID, TELEGRAM_GROUP_ID
+from concurrent.futures import ThreadPoolExecutor
+from telegram.utils.request import Request
+from config.config import (
+    TELEGRAM_BOT_TOKEN, TELEGRAM_CHANNEL_ID, TELEGRAM_GROUP_ID,
+    TELEGRAM_SEND_CONCURRENCY, TELEGRAM_CON_POOL_SIZE,
+    TELEGRAM_GLOBAL_INTERVAL_MS, TELEGRAM_PER_CHAT_INTERVAL_MS
+)
 from services.quotes_service import Quote
+from services.image_service import ImageService
+from utils.rate_limiter import RateLimiter
+from utils.circuit_breaker import get_breaker
+from utils import metrics, tracing
 
 logger = logging.getLogger(__name__)
 
+# Имя предохранителя Telegram Bot API
+TELEGRAM_BREAKER = 'telegram'
+
+class DeliveryResult:
+    """
+    Результат отправки цитаты в один чат
+    """
+    def __init__(self, chat_id, success, duration, error=None, message_id=None):
+        self.chat_id = chat_id
+        self.success = success
+        self.duration = duration
+        self.error = error
+        self.message_id = message_id
+
+    def __repr__(self):
+        status = 'ok' if self.success else f'error: {self.error}'
+        return f"DeliveryResult({self.chat_id}, {status}, {self.duration:.3f}s)"
+
+class SendReport:
+    """
+    Результаты отправки цитаты во все чаты
+    
+    В логическом контексте истинен, если цитата доставлена хотя бы в один чат.
+    """
+    def __init__(self, results=None, duration=0.0):
+        self.results = results or []
+        self.duration = duration
+
+    @property
+    def ok(self):
+        """Цитата доставлена во все чаты"""
+        return bool(self.results) and all(result.success for result in self.results)
+
+    def __bool__(self):
+        return any(result.success for result in self.results)
+
+    def __repr__(self):
+        return f"SendReport({self.results}, {self.duration:.3f}s)"
+
 class TelegramBot:
     def __init__(self):
-        self.bot = telegram.Bot(token=TELEGRAM_BOT_TOKEN)
+        # Пул соединений должен вмещать все параллельные отправки
+        request = Request(con_pool_size=TELEGRAM_CON_POOL_SIZE)
+        self.bot = telegram.Bot(token=TELEGRAM_BOT_TOKEN, request=request)
         self.channel_id = TELEGRAM_CHANNEL_ID
         self.group_id = TELEGRAM_GROUP_ID
+        self._executor = ThreadPoolExecutor(max_workers=TELEGRAM_SEND_CONCURRENCY, thread_name_prefix='telegram-send')
+        self._rate_limiter = RateLimiter(
+            TELEGRAM_GLOBAL_INTERVAL_MS / 1000.0,
+            TELEGRAM_PER_CHAT_INTERVAL_MS / 1000.0
+        )
         logger.info(f"Telegram bot initialized for channel {self.channel_id} and group {self.group_id}")
+    
+    @property
+    def destinations(self):
+        """
+        Список чатов для публикации цитат
+        """
+        destinations = [self.channel_id]
+        if self.group_id:
+            destinations.append(self.group_id)
+        return destinations
+    
+    @staticmethod
+    def format_message(quote: Quote, translated_text: str = None):
+        """
+        Формирует текст сообщения с цитатой
+        """
+        if translated_text:
+            message = f'🔥 *{translated_text}*\n\n'
+            message += f'🌐 "{quote.text}"\n\n'
+            message += f'👤 _{quote.author}_'
+        else:
+            message = f'🔥 *"{quote.text}"*\n\n'
+            message += f'👤 _{quote.author}_'
+        return message
+    
+    @staticmethod
+    def _extract_file_id(message):
+        """
+        Извлекает file_id самого крупного варианта фотографии из отправленного сообщения
+        
+        :param message: Объект telegram.Message, возвращенный send_photo
+        :return: file_id или None
+        """
+        try:
+            file_id = message.photo[-1].file_id
+        except (AttributeError, IndexError, TypeError):
+            return None
+        return file_id if isinstance(file_id, str) else None
+    
+    @staticmethod
+    def _extract_message_id(message):
+        message_id = getattr(message, 'message_id', None)
+        return message_id if isinstance(message_id, int) else None
+    
+    def _upload_photo(self, dest_id, image_path, caption):
+        """
+        Загружает файл изображения в Telegram
+        
+        :return: Кортеж (отправленное сообщение, file_id загруженного изображения)
+        """
+        with open(image_path, 'rb') as photo:
+            span = tracing.current_span()
+            if span is not tracing.NOOP_SPAN:
+                span.add_bytes(os.path.getsize(image_path))
+            sent_message = self.bot.send_photo(
+                chat_id=dest_id,
+                photo=photo,
+                caption=caption,
+                parse_mode=telegram.ParseMode.MARKDOWN
+            )
+        return sent_message, self._extract_file_id(sent_message)
+    
+    @tracing.traced('telegram.deliver')
+    def deliver(self, dest_id, message, image_path=None, photo_file_id=None):
+        """
+        Отправляет подготовленное сообщение в один чат с учетом ограничений частоты
+        
+        В отличие от send_quote не перехватывает ошибки Telegram, чтобы вызывающий код
+        мог повторить отправку (например, после RetryAfter).
+        
+        :param dest_id: Идентификатор чата
+        :param message: Текст сообщения (подпись к изображению)
+        :param image_path: Путь к изображению (если есть)
+        :param photo_file_id: file_id уже загруженного изображения (если есть)
+        :return: Кортеж (id отправленного сообщения, file_id изображения)
+        """
+        tracing.current_span().set_attribute('chat_id', str(dest_id))
+        # При недоступности Telegram отправка отклоняется без ожидания таймаута
+        breaker = get_breaker(TELEGRAM_BREAKER)
+        breaker.before_request()
+        try:
+            result = self._deliver(dest_id, message, image_path, photo_file_id)
+        except telegram.error.BadRequest as e:
+            metrics.record_upstream_error(TELEGRAM_BREAKER, type(e).__name__)
+            breaker.record_success()
+            raise
+        except telegram.error.NetworkError as e:
+            metrics.record_upstream_error(TELEGRAM_BREAKER, type(e).__name__)
+            breaker.record_failure()
+            raise
+        except telegram.error.TelegramError as e:
+            metrics.record_upstream_error(TELEGRAM_BREAKER, type(e).__name__)
+            raise
+        breaker.record_success()
+        return result
+    
+    def _deliver(self, dest_id, message, image_path, photo_file_id):
+        self._rate_limiter.acquire(dest_id)
+        if photo_file_id:
+            try:
+                sent_message = self.bot.send_photo(
+                    chat_id=dest_id,
+                    photo=photo_file_id,
+                    caption=message,
+                    parse_mode=telegram.ParseMode.MARKDOWN
+                )
+            except telegram.error.BadRequest as e:
+                if not image_path or not os.path.exists(image_path):
+                    raise
+                # Сохраненный file_id больше не действителен - загружаем файл заново
+                logger.warning(f"Не удалось отправить изображение по file_id: {e}. Загружаем файл")
+                sent_message, photo_file_id = self._upload_photo(dest_id, image_path, message)
+        elif image_path and os.path.exists(image_path):
+            sent_message, photo_file_id = self._upload_photo(dest_id, image_path, message)
+        else:
+            sent_message = self.bot.send_message(
+                chat_id=dest_id,
+                text=message,
+                parse_mode=telegram.ParseMode.MARKDOWN
+            )
+        logger.info(f"Цитата отправлена в {dest_id}")
+        return self._extract_message_id(sent_message), photo_file_id
+    
+    def _send_to_destination(self, dest_id, message, image_path, photo_file_id, image_store):
+        """
+        Отправляет цитату в один чат, фиксируя результат и время отправки
+        
+        :return: Кортеж (DeliveryResult, file_id изображения)
+        """
+        started = time.monotonic()
+        try:
+            message_id, new_file_id = self.deliver(dest_id, message, image_path, photo_file_id)
+            if new_file_id and new_file_id != photo_file_id and image_store is not None:
+                image_store.set_metadata(image_path, 'file_id', new_file_id)
+            photo_file_id = new_file_id
+            result = DeliveryResult(dest_id, True, time.monotonic() - started, message_id=message_id)
+        except Exception as e:
+            logger.error(f"Ошибка при отправке в {dest_id}: {e}")
+            result = DeliveryResult(dest_id, False, time.monotonic() - started, error=str(e))
+        return result, photo_file_id
         
+    @tracing.traced('telegram.send_quote')
     def send_quote(self, quote: Quote, translated_text: str = None, image_path: str = None):
         """
         Отправляет цитату в Telegram канал и группу с изображением (если доступно)
         
+        Изображение загружается один раз, остальные чаты получают его по file_id;
+        отправка в разные чаты выполняется параллельно.
+        
         :param quote: Объект цитаты
         :param translated_text: Переведенный текст цитаты
         :param image_path: Путь к изображению (если есть)
-        :return: True в случае успеха, False в случае ошибки
+        :return: SendReport с результатом и временем отправки для каждого чата
         """
+        started = time.monotonic()
         try:
             # Формируем текст сообщения
-            if translated_text:
-                message = f'🔥 *{translated_text}*\n\n'
-                message += f'🌐 "{quote.text}"\n\n'
-                message += f'👤 _{quote.author}_'
-            else:
-                message = f'🔥 *"{quote.text}"*\n\n'
-                message += f'👤 _{quote.author}_'
+            message = self.format_message(quote, translated_text)
             
             # Отправляем в канал и группу
-            destinations = [self.channel_id]
-            if self.group_id:
-                destinations.append(self.group_id)
+            destinations = self.destinations
                 
-            for dest_id in destinations:
-                try:
-                    if image_path and os.path.exists(image_path):
-                        with open(image_path, 'rb') as photo:
-                            self.bot.send_photo(
-                                chat_id=dest_id,
-                                photo=photo,
-                                caption=message,
-                                parse_mode=telegram.ParseMode.MARKDOWN
-                            )
-                    else:
-                        self.bot.send_message(
-                            chat_id=dest_id,
-                            text=message,
-                            parse_mode=telegram.ParseMode.MARKDOWN
-                        )
-                    logger.info(f"Цитата отправлена в {dest_id}")
-                except Exception as e:
-                    logger.error(f"Ошибка при отправке в {dest_id}: {e}")
+            # file_id уже загруженного изображения позволяет не передавать файл повторно
+            image_store = ImageService.get_image_store()
+            if image_store is None or not image_store.owns(image_path):
+                image_store = None
+            photo_file_id = image_store.get_metadata(image_path, 'file_id') if image_store else None
+            
+            results = []
+            pending = list(destinations)
+            if image_path and not photo_file_id and os.path.exists(image_path):
+                # Файл загружается только в первый чат, остальные получают file_id
+                result, photo_file_id = self._send_to_destination(
+                    pending.pop(0), message, image_path, None, image_store
+                )
+                results.append(result)
             
+            futures = [
+                # Отправки в чаты записываются в трассировку публикации
+                self._executor.submit(
+                    contextvars.copy_context().run,
+                    self._send_to_destination, dest_id, message, image_path, photo_file_id, image_store
+                )
+                for dest_id in pending
+            ]
+            results.extend(future.result()[0] for future in futures)
+            
+            # Изображение из хранилища не удаляем, а освобождаем ссылку на него
+            if image_store is not None:
+                image_store.release(image_path)
+                logger.info(f"Изображение {image_path} возвращено в хранилище")
             # Удаляем временный файл с изображением после всех отправок
-            if image_path and os.path.exists(image_path):
+            elif image_path and os.path.exists(image_path):
                 try:
                     os.unlink(image_path)
                     logger.info(f"Временный файл {image_path} удален")
                 except Exception as e:
                     logger.warning(f"Не удалось удалить временный файл {image_path}: {e}")
                     
-            return True
+            return SendReport(results, time.monotonic() - started)
             
         except Exception as e:
             logger.error(f"Ошибка при отправке цитаты в Telegram: {e}")
-            return False 
\ No newline at end of file
+            return SendReport(duration=time.monotonic() - started)
+    
+    def _attach_to_message(self, dest_id, message_id, message, image_path, photo_file_id):
+        """
+        Добавляет изображение к уже опубликованному текстовому сообщению
+        
+        Telegram не превращает текстовое сообщение в фотографию (editMessageMedia
+        для него всегда завершается ошибкой), поэтому изображение с подписью
+        отправляется отдельным сообщением, а исходное удаляется.
+        
+        :return: Кортеж (id сообщения с изображением, file_id изображения)
+        """
+        new_message_id, photo_file_id = self.deliver(dest_id, message, image_path, photo_file_id)
+        try:
+            self.bot.delete_message(chat_id=dest_id, message_id=message_id)
+        except telegram.error.TelegramError as e:
+            logger.warning(f"Не удалось удалить текстовое сообщение {message_id} в {dest_id}: {e}")
+        return new_message_id, photo_file_id
+    
+    def _attach_to_destination(self, result, message, image_path, photo_file_id, image_store):
+        """
+        Добавляет изображение к сообщению в одном чате, фиксируя результат и время
+        
+        :return: Кортеж (DeliveryResult, file_id изображения)
+        """
+        started = time.monotonic()
+        try:
+            message_id, new_file_id = self._attach_to_message(
+                result.chat_id, result.message_id, message, image_path, photo_file_id
+            )
+            if new_file_id and new_file_id != photo_file_id and image_store is not None:
+                image_store.set_metadata(image_path, 'file_id', new_file_id)
+            photo_file_id = new_file_id
+            attached = DeliveryResult(result.chat_id, True, time.monotonic() - started, message_id=message_id)
+        except Exception as e:
+            logger.error(f"Ошибка при добавлении изображения в {result.chat_id}: {e}")
+            attached = DeliveryResult(result.chat_id, False, time.monotonic() - started, error=str(e))
+        return attached, photo_file_id
+    
+    def attach_image(self, report: SendReport, quote: Quote, translated_text: str = None, image_path: str = None):
+        """
+        Добавляет изображение к текстовым сообщениям, опубликованным send_quote
+        
+        Изображение загружается один раз, остальные чаты получают его по file_id.
+        После обработки изображение освобождается так же, как в send_quote.
+        
+        :param report: SendReport отправки текста
+        :param quote: Объект цитаты
+        :param translated_text: Переведенный текст цитаты
+        :param image_path: Путь к изображению
+        :return: SendReport с результатом добавления изображения для каждого чата
+        """
+        started = time.monotonic()
+        message = self.format_message(quote, translated_text)
+        image_store = ImageService.get_image_store()
+        if image_store is None or not image_store.owns(image_path):
+            image_store = None
+        photo_file_id = image_store.get_metadata(image_path, 'file_id') if image_store else None
+        
+        results = []
+        pending = [result for result in report.results if result.success and result.message_id is not None]
+        try:
+            if pending and not photo_file_id:
+                attached, photo_file_id = self._attach_to_destination(
+                    pending.pop(0), message, image_path, None, image_store
+                )
+                results.append(attached)
+            futures = [
+                self._executor.submit(
+                    contextvars.copy_context().run,
+                    self._attach_to_destination, result, message, image_path, photo_file_id, image_store
+                )
+                for result in pending
+            ]
+            results.extend(future.result()[0] for future in futures)
+        finally:
+            if image_store is not None:
+                image_store.release(image_path)
+            elif image_path and os.path.exists(image_path):
+                try:
+                    os.unlink(image_path)
+                except OSError as e:
+                    logger.warning(f"Не удалось удалить временный файл {image_path}: {e}")
+        return SendReport(results, time.monotonic() - started)
+    
+    def close(self):
+        """
+        Останавливает пул потоков отправки
+        """
+        self._executor.shutdown(wait=True)
\ No newline at end of file
@@ -1,24 +1,86 @@
 import os
 import json
-from dotenv import load_dotenv
+import pytz
+from dotenv import load_dotenv, dotenv_values
 from pathlib import Path
 
+# Переменные, заданные в окружении процесса, имеют приоритет над .env и при перезагрузке
+_PROCESS_ENV_KEYS = set(os.environ)
+
 # Загружаем переменные окружения из .env файла
 env_path = Path('.') / 'config' / '.env'
 load_dotenv(dotenv_path=env_path)
 
+
+def _env_int(name, default):
+    """
+    Читает целочисленную настройку из переменных окружения
+
+    :param name: Имя переменной окружения
+    :param default: Значение по умолчанию
+    :return: Целое число
+    """
+    value = os.getenv(name)
+    if value is None or value == '':
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        print(f"Некорректное значение {name}={value}. Используется значение по умолчанию: {default}.")
+        return default
+
+
 # Получаем настройки из переменных окружения
 TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
 TELEGRAM_CHANNEL_ID = os.getenv('TELEGRAM_CHANNEL_ID')
 TELEGRAM_GROUP_ID = os.getenv('TELEGRAM_GROUP_ID')
 MYMEMORY_EMAIL = os.getenv('MYMEMORY_EMAIL')
 
+# Параллельная отправка в Telegram: число потоков, размер пула соединений
+# и минимальные интервалы между сообщениями (общий и для одного чата) в миллисекундах
+TELEGRAM_SEND_CONCURRENCY = _env_int('TELEGRAM_SEND_CONCURRENCY', 4)
+TELEGRAM_CON_POOL_SIZE = _env_int('TELEGRAM_CON_POOL_SIZE', TELEGRAM_SEND_CONCURRENCY + 4)
+TELEGRAM_GLOBAL_INTERVAL_MS = _env_int('TELEGRAM_GLOBAL_INTERVAL_MS', 35)
+TELEGRAM_PER_CHAT_INTERVAL_MS = _env_int('TELEGRAM_PER_CHAT_INTERVAL_MS', 3000)
+
 # Настройки для GigaChat API
 GIGACHAT_API_KEY = os.getenv('GIGACHAT_API_KEY')
 GIGACHAT_MODEL = os.getenv('GIGACHAT_MODEL', 'GigaChat-Max')
+# Запасная модель, если основная не вернула изображение (пусто - без запасной модели)
+GIGACHAT_FALLBACK_MODEL = os.getenv('GIGACHAT_FALLBACK_MODEL', 'GigaChat')
+# Через сколько секунд без ответа запускать запасную модель параллельно (0 - только последовательно)
+GIGACHAT_HEDGE_DELAY_SECONDS = _env_int('GIGACHAT_HEDGE_DELAY_SECONDS', 0)
 ENABLE_IMAGE_GENERATION = os.getenv('ENABLE_IMAGE_GENERATION', 'true').lower() == 'true'
+# За сколько секунд до истечения токена GigaChat обновлять его в фоне
+GIGACHAT_TOKEN_REFRESH_MARGIN = _env_int('GIGACHAT_TOKEN_REFRESH_MARGIN', 120)
 VERIFY_SSL = os.getenv('VERIFY_SSL', 'true').lower() == 'true'
 
+# Событийный планировщик: спать до ближайшего запуска вместо ежесекундного опроса
+SCHEDULER_EVENT_DRIVEN = os.getenv('SCHEDULER_EVENT_DRIVEN', 'true').lower() == 'true'
+
+# Планировщик на цикле asyncio: слоты обслуживаются задачами AsyncScheduler, публикация
+# выполняется в потоке исполнителя цикла (планировщик всегда событийный)
+ASYNC_MODE = os.getenv('ASYNC_MODE', 'false').lower() == 'true'
+
+# Выполнение заданий планировщика: число потоков, политика перекрытия (skip - пропустить,
+# queue - поставить в очередь), число одновременных запусков и жесткий таймаут в секундах
+JOB_WORKERS = _env_int('JOB_WORKERS', 4)
+JOB_OVERLAP_POLICY = os.getenv('JOB_OVERLAP_POLICY', 'skip').lower()
+JOB_MAX_CONCURRENT = _env_int('JOB_MAX_CONCURRENT', 1)
+JOB_TIMEOUT_SECONDS = _env_int('JOB_TIMEOUT_SECONDS', 900)
+# Пропущенный при простое слот выполняется после перезапуска, если опоздание не больше
+# MISFIRE_GRACE_SECONDS; одновременно наступившие слоты объединяются в один запуск
+MISFIRE_GRACE_SECONDS = _env_int('MISFIRE_GRACE_SECONDS', 900)
+JOB_COALESCE = os.getenv('JOB_COALESCE', 'true').lower() == 'true'
+# Интервал проверки изменений config/.env для перезагрузки расписания (0 - не отслеживать)
+CONFIG_WATCH_INTERVAL = _env_int('CONFIG_WATCH_INTERVAL', 5)
+
+# Выбор ведущего экземпляра через файл аренды в DATA_DIR (для нескольких реплик):
+# срок аренды и интервал ее продления в секундах
+LEADER_ELECTION = os.getenv('LEADER_ELECTION', 'false').lower() == 'true'
+LEADER_LEASE_SECONDS = _env_int('LEADER_LEASE_SECONDS', 30)
+LEADER_HEARTBEAT_SECONDS = _env_int('LEADER_HEARTBEAT_SECONDS', 10)
+
 # Настройки часового пояса
 TIMEZONE = os.getenv('TIMEZONE', 'Europe/Moscow')
 
@@ -33,24 +95,37 @@ DEFAULT_SCHEDULE = {
     "sunday": ["12:00", "18:00"]
 }
 
+
+def parse_schedule(schedule_str):
+    """
+    Разбирает строку расписания формата day:HHMM,HHMM;day:HHMM
+
+    :param schedule_str: Строка расписания
+    :return: Словарь {день недели: ["HH:MM", ...]}
+    :raises ValueError: Если строка не содержит ни одного дня
+    """
+    schedule = {}
+    # Парсим строку формата day:time1,time2;day:time1,time2
+    for day_schedule in schedule_str.split(';'):
+        if ':' in day_schedule:
+            day, times = day_schedule.split(':')
+            # Преобразуем время из формата HHMM в HH:MM
+            formatted_times = []
+            for time in times.split(','):
+                if len(time) == 4:
+                    formatted_time = f"{time[:2]}:{time[2:]}"
+                    formatted_times.append(formatted_time)
+            schedule[day.lower()] = formatted_times
+    if not schedule:
+        raise ValueError("Empty schedule")
+    return schedule
+
+
 # Загружаем расписание из .env или используем значение по умолчанию
 schedule_str = os.getenv('SCHEDULE')
 if schedule_str:
     try:
-        SCHEDULE = {}
-        # Парсим строку формата day:time1,time2;day:time1,time2
-        for day_schedule in schedule_str.split(';'):
-            if ':' in day_schedule:
-                day, times = day_schedule.split(':')
-                # Преобразуем время из формата HHMM в HH:MM
-                formatted_times = []
-                for time in times.split(','):
-                    if len(time) == 4:
-                        formatted_time = f"{time[:2]}:{time[2:]}"
-                        formatted_times.append(formatted_time)
-                SCHEDULE[day.lower()] = formatted_times
-        if not SCHEDULE:
-            raise ValueError("Empty schedule")
+        SCHEDULE = parse_schedule(schedule_str)
     except Exception as e:
         print(f"Ошибка в формате расписания: {e}. Используется значение по умолчанию.")
         SCHEDULE = DEFAULT_SCHEDULE
@@ -60,6 +135,80 @@ else:
 # URL для API
 ZENQUOTES_API_URL = 'https://zenquotes.io/api/random'
 MYMEMORY_API_URL = 'https://api.mymemory.translated.net/get'
+# Пакетный эндпоинт ZenQuotes возвращает около 50 цитат за один запрос
+ZENQUOTES_BATCH_API_URL = 'https://zenquotes.io/api/quotes'
+
+# Настройки общего HTTP-клиента (пулы соединений и таймауты в секундах)
+HTTP_POOL_CONNECTIONS = _env_int('HTTP_POOL_CONNECTIONS', 10)
+HTTP_POOL_MAXSIZE = _env_int('HTTP_POOL_MAXSIZE', 10)
+HTTP_CONNECT_TIMEOUT = _env_int('HTTP_CONNECT_TIMEOUT', 5)
+HTTP_READ_TIMEOUT = _env_int('HTTP_READ_TIMEOUT', 30)
+# Генерация изображения в GigaChat может занимать заметно больше времени
+GIGACHAT_READ_TIMEOUT = _env_int('GIGACHAT_READ_TIMEOUT', 180)
+
+# Каталог для постоянных данных (на Amvera смонтирован как persistenceMount)
+DATA_DIR = os.getenv('DATA_DIR', '/data')
+
+# Настройки пула цитат
+QUOTE_POOL_SIZE = _env_int('QUOTE_POOL_SIZE', 100)
+QUOTE_POOL_LOW_WATERMARK = _env_int('QUOTE_POOL_LOW_WATERMARK', 20)
+QUOTE_POOL_RETRY_SECONDS = _env_int('QUOTE_POOL_RETRY_SECONDS', 60)
+
+# Буфер заранее подготовленных постов (цитата, перевод, изображение) в каталоге данных:
+# дозагрузка начинается ниже POST_BUFFER_LOW_WATERMARK, между постами выдерживается
+# POST_BUFFER_REFILL_INTERVAL секунд (0 - отключить буфер)
+POST_BUFFER_SIZE = _env_int('POST_BUFFER_SIZE', 3)
+POST_BUFFER_LOW_WATERMARK = _env_int('POST_BUFFER_LOW_WATERMARK', 2)
+POST_BUFFER_REFILL_INTERVAL = _env_int('POST_BUFFER_REFILL_INTERVAL', 300)
+POST_BUFFER_RETRY_SECONDS = _env_int('POST_BUFFER_RETRY_SECONDS', 600)
+
+# Максимальный размер хранилища изображений в мегабайтах (0 - отключить хранилище)
+IMAGE_STORE_MAX_MB = _env_int('IMAGE_STORE_MAX_MB', 500)
+
+# Настройки кэша переводов (в памяти и постоянного в SQLite)
+TRANSLATION_CACHE_SIZE = _env_int('TRANSLATION_CACHE_SIZE', 1000)
+TRANSLATION_CACHE_MAX_ENTRIES = _env_int('TRANSLATION_CACHE_MAX_ENTRIES', 10000)
+
+# Ограничение MyMemory на размер запроса (в байтах) и число параллельных запросов при пакетном переводе
+MYMEMORY_MAX_QUERY_LENGTH = _env_int('MYMEMORY_MAX_QUERY_LENGTH', 500)
+TRANSLATION_MAX_CONCURRENCY = _env_int('TRANSLATION_MAX_CONCURRENCY', 4)
+
+# Постоянная очередь отправки в Telegram: число попыток и экспоненциальная задержка между ними (в секундах)
+OUTBOX_ENABLED = os.getenv('OUTBOX_ENABLED', 'true').lower() == 'true'
+OUTBOX_MAX_ATTEMPTS = _env_int('OUTBOX_MAX_ATTEMPTS', 8)
+OUTBOX_BACKOFF_BASE = _env_int('OUTBOX_BACKOFF_BASE', 5)
+OUTBOX_BACKOFF_MAX = _env_int('OUTBOX_BACKOFF_MAX', 900)
+OUTBOX_POLL_SECONDS = _env_int('OUTBOX_POLL_SECONDS', 30)
+
+# Публикация текста точно по расписанию с добавлением изображения, когда оно будет готово
+# (не позднее IMAGE_ATTACH_WINDOW_SECONDS секунд после публикации текста)
+PUBLISH_TEXT_FIRST = os.getenv('PUBLISH_TEXT_FIRST', 'false').lower() == 'true'
+IMAGE_ATTACH_WINDOW_SECONDS = _env_int('IMAGE_ATTACH_WINDOW_SECONDS', 600)
+
+# Время на публикацию с момента запуска задания (0 - без ограничения). Таймауты запросов
+# не превышают оставшегося времени; если его меньше указанных порогов, публикация упрощается:
+# без повторной генерации изображения моделью GigaChat, без изображения, без перевода
+PUBLISH_DEADLINE_SECONDS = _env_int('PUBLISH_DEADLINE_SECONDS', 120)
+DEADLINE_IMAGE_RETRY_MIN_SECONDS = _env_int('DEADLINE_IMAGE_RETRY_MIN_SECONDS', 60)
+DEADLINE_IMAGE_MIN_SECONDS = _env_int('DEADLINE_IMAGE_MIN_SECONDS', 30)
+DEADLINE_TRANSLATION_MIN_SECONDS = _env_int('DEADLINE_TRANSLATION_MIN_SECONDS', 5)
+
+# Предохранители внешних сервисов: доля ошибок в процентах среди последних CIRCUIT_WINDOW_SIZE
+# запросов (не меньше CIRCUIT_MIN_CALLS), после которой запросы отклоняются на CIRCUIT_COOLDOWN_SECONDS
+CIRCUIT_FAILURE_RATE = _env_int('CIRCUIT_FAILURE_RATE', 50)
+CIRCUIT_WINDOW_SIZE = _env_int('CIRCUIT_WINDOW_SIZE', 10)
+CIRCUIT_MIN_CALLS = _env_int('CIRCUIT_MIN_CALLS', 4)
+CIRCUIT_COOLDOWN_SECONDS = _env_int('CIRCUIT_COOLDOWN_SECONDS', 60)
+
+# Порт HTTP-сервера с эндпоинтами /metrics и /healthz (0 - не запускать сервер)
+METRICS_PORT = _env_int('METRICS_PORT', 80)
+
+# Трассировка публикаций: jsonl - в файл DATA_DIR/traces.jsonl с ротацией по размеру,
+# otlp - в OTLP-совместимый коллектор по HTTP/JSON, none - отключить экспорт
+TRACE_EXPORTER = os.getenv('TRACE_EXPORTER', 'jsonl').lower()
+TRACE_FILE_MAX_MB = _env_int('TRACE_FILE_MAX_MB', 10)
+TRACE_FILE_BACKUPS = _env_int('TRACE_FILE_BACKUPS', 3)
+OTLP_ENDPOINT = os.getenv('OTLP_ENDPOINT', 'http://localhost:4318/v1/traces')
 
 # Проверка необходимых настроек
 if not TELEGRAM_BOT_TOKEN:
@@ -71,4 +220,37 @@ if not TELEGRAM_CHANNEL_ID:
 # Проверка настроек GigaChat при включенной генерации изображений
 if ENABLE_IMAGE_GENERATION and not GIGACHAT_API_KEY:
     print("ВНИМАНИЕ: GIGACHAT_API_KEY не установлен. Генерация изображений будет отключена.")
-    ENABLE_IMAGE_GENERATION = False 
\ No newline at end of file
+    ENABLE_IMAGE_GENERATION = False 
+
+
+def reload_config():
+    """
+    Повторно читает config/.env и применяет настройки, которые можно менять без перезапуска:
+    SCHEDULE, TIMEZONE и ENABLE_IMAGE_GENERATION
+
+    Переменные из окружения процесса не перезаписываются. Если новые значения некорректны,
+    текущая конфигурация не меняется.
+
+    :return: Словарь с новыми значениями настроек
+    :raises ValueError: Если расписание или часовой пояс некорректны
+    """
+    global SCHEDULE, TIMEZONE, ENABLE_IMAGE_GENERATION
+    values = {
+        key: value for key, value in dotenv_values(env_path).items()
+        if key not in _PROCESS_ENV_KEYS and value is not None
+    }
+    environ = dict(os.environ, **values)
+
+    schedule_str = environ.get('SCHEDULE')
+    schedule = parse_schedule(schedule_str) if schedule_str else DEFAULT_SCHEDULE
+    timezone = environ.get('TIMEZONE', 'Europe/Moscow')
+    try:
+        pytz.timezone(timezone)
+    except pytz.exceptions.UnknownTimeZoneError:
+        raise ValueError(f"Неизвестный часовой пояс: {timezone}")
+    enable_images = environ.get('ENABLE_IMAGE_GENERATION', 'true').lower() == 'true' and bool(GIGACHAT_API_KEY)
+
+    # Все значения проверены - применяем их
+    os.environ.update(values)
+    SCHEDULE, TIMEZONE, ENABLE_IMAGE_GENERATION = schedule, timezone, enable_images
+    return {'SCHEDULE': schedule, 'TIMEZONE': timezone, 'ENABLE_IMAGE_GENERATION': enable_images}
\ No newline at end of file
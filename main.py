@@ -1,13 +1,40 @@
+import contextvars
 import logging
 import pytz
 import os
+import signal
+import threading
+import time
+import uuid
 from datetime import datetime
 from services.quotes_service import QuotesService
+from services.quote_pool import QuotePool
 from services.translator_service import TranslatorService
-from services.image_service import ImageService
+from services.translation_cache import TranslationCache
+from services.image_service import ImageService, token_manager
+from services.image_store import ImageStore
+from services.outbox import Outbox
+from services.post_buffer import PostBuffer, PreparedPost
 from bot.telegram_bot import TelegramBot
-from utils.scheduler import Scheduler
-from config.config import TIMEZONE, ENABLE_IMAGE_GENERATION, VERIFY_SSL
+from utils.scheduler import Scheduler, current_slot
+from utils.async_scheduler import AsyncScheduler
+from utils.job_executor import JobExecutor, check_cancelled
+from utils.job_store import JobStore
+from utils.config_watcher import ConfigWatcher
+from utils.leader_election import LeaderElector
+from utils.storage import get_data_path
+from utils import deadline
+from utils import metrics, tracing
+from utils.metrics import MetricsServer
+from utils.circuit_breaker import get_breaker_states, STATE_CLOSED
+from utils.pipeline import Pipeline
+from config.config import (
+    TIMEZONE, SCHEDULE, ENABLE_IMAGE_GENERATION, VERIFY_SSL, QUOTE_POOL_SIZE, IMAGE_STORE_MAX_MB,
+    SCHEDULER_EVENT_DRIVEN, ASYNC_MODE, CONFIG_WATCH_INTERVAL, LEADER_ELECTION, OUTBOX_ENABLED,
+    PUBLISH_TEXT_FIRST, IMAGE_ATTACH_WINDOW_SECONDS, METRICS_PORT, TRACE_EXPORTER, TRACE_FILE_MAX_MB,
+    TRACE_FILE_BACKUPS, OTLP_ENDPOINT, PUBLISH_DEADLINE_SECONDS,
+    DEADLINE_IMAGE_MIN_SECONDS, DEADLINE_TRANSLATION_MIN_SECONDS, POST_BUFFER_SIZE, env_path, reload_config
+)
 
 # Настройка логирования
 logging.basicConfig(
@@ -17,42 +44,471 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-def send_motivational_quote():
+# Долгоживущий экземпляр бота (создается при запуске в init_services)
+_telegram_bot = None
+# Постоянная очередь отправки (None - цитаты отправляются сразу)
+_outbox = None
+# Буфер заранее подготовленных постов (None - цитата готовится во время публикации)
+_post_buffer = None
+
+def get_telegram_bot():
+    """
+    Возвращает общий экземпляр бота или создает новый, если он еще не инициализирован
+    """
+    return _telegram_bot if _telegram_bot is not None else TelegramBot()
+
+def _discard_image(image_path):
+    """
+    Освобождает изображение, которое не будет отправлено
+    """
+    if not image_path:
+        return
+    image_store = ImageService.get_image_store()
+    if image_store is not None and image_store.owns(image_path):
+        image_store.release(image_path)
+    elif os.path.exists(image_path):
+        os.unlink(image_path)
+
+def _log_report(report, action):
+    """
+    Записывает в лог результат и время операции для каждого чата
+    """
+    for delivery in getattr(report, 'results', []):
+        if delivery.success:
+            logger.info(f"{action} в {delivery.chat_id}: {delivery.duration:.2f} с")
+        else:
+            logger.warning(f"{action} в {delivery.chat_id}: ошибка через {delivery.duration:.2f} с: {delivery.error}")
+
+def _attach_image_later(telegram_bot, report, quote, translated_text, deadline):
+    """
+    Генерирует изображение и добавляет его к опубликованным текстовым сообщениям
+    
+    :param deadline: Момент по time.monotonic, после которого изображение уже не добавляется
+    """
+    # Трассировка публикации уже завершена, добавление изображения продолжает ее
+    with tracing.resume_current('attach_image') as span:
+        logger.info("Генерация изображения для опубликованной цитаты...")
+        image_path = ImageService.generate_image_from_quote(translated_text or quote.text)
+        if not image_path:
+            span.set_attribute('outcome', tracing.OUTCOME_EMPTY)
+            logger.warning("Не удалось создать изображение, цитата останется без изображения")
+            return
+        if time.monotonic() > deadline:
+            span.set_attribute('outcome', tracing.OUTCOME_EMPTY)
+            logger.warning("Изображение готово после окончания окна добавления, цитата останется без изображения")
+            _discard_image(image_path)
+            return
+        _log_report(telegram_bot.attach_image(report, quote, translated_text, image_path), "Добавление изображения")
+
+@metrics.timed('send')
+def publish_text_first(quote, translated_text, fencing_check=None):
+    """
+    Публикует текст цитаты сразу, а изображение добавляет в фоне, когда оно будет готово
+    
+    :param quote: Объект цитаты
+    :param translated_text: Переведенный текст цитаты
+    :param fencing_check: Функция проверки, что экземпляр все еще ведущий
+    :return: SendReport отправки текста или None, если публикация отменена
+    """
+    check_cancelled()
+    if fencing_check is not None and not fencing_check():
+        logger.warning("Экземпляр больше не является ведущим, публикация отменена")
+        return None
+    telegram_bot = get_telegram_bot()
+    report = telegram_bot.send_quote(quote, translated_text)
+    _log_report(report, "Доставка")
+    if not report:
+        logger.error("Не удалось отправить цитату")
+        return report
+    logger.info("Текст цитаты опубликован, изображение будет добавлено после генерации")
+    
+    # Поток генерации получает контекст публикации: трассировку, крайний срок и токен отмены
+    deadline = time.monotonic() + IMAGE_ATTACH_WINDOW_SECONDS
+    threading.Thread(
+        target=contextvars.copy_context().run,
+        args=(_attach_image_later, telegram_bot, report, quote, translated_text, deadline),
+        name='image-attach',
+        daemon=True
+    ).start()
+    return report
+
+def send_motivational_quote(fencing_check=None):
     """
     Основная функция для получения, перевода и отправки мотивационной цитаты
+    
+    Если буфер подготовленных постов не пуст, публикуется готовый пост без запросов
+    к внешним сервисам. Иначе все запросы публикации укладываются в PUBLISH_DEADLINE_SECONDS:
+    при нехватке времени публикация упрощается (без повторной генерации изображения,
+    без изображения, без перевода).
+    
+    :param fencing_check: Функция проверки, что экземпляр все еще ведущий
+        (вызывается непосредственно перед отправкой)
+    """
+    # Каждая публикация записывается отдельной трассировкой с интервалами всех сервисов
+    with tracing.start_trace('send_motivational_quote') as root:
+        # Получаем текущее время в заданном часовом поясе
+        tz = pytz.timezone(TIMEZONE)
+        now = datetime.now(tz)
+        logger.info(
+            f"Запуск отправки мотивационной цитаты в {now.strftime('%Y-%m-%d %H:%M:%S %Z')} (трассировка {root.trace_id})"
+        )
+        
+        if _post_buffer is not None:
+            post = _post_buffer.pop()
+            if post is not None:
+                logger.info(f"Публикуется подготовленный пост {post.post_id}: {post.quote}")
+                root.set_attribute('source', 'buffer')
+                publish_post(post.quote, post.translated_text, post.image_path, fencing_check, post.post_id)
+                return
+            logger.warning("Буфер подготовленных постов пуст, цитата готовится во время публикации")
+        
+        root.set_attribute('source', 'live')
+        with deadline.deadline_scope(PUBLISH_DEADLINE_SECONDS):
+            _publish_quote(fencing_check)
+
+def translate_quotes(quotes):
     """
-    # Получаем текущее время в заданном часовом поясе
-    tz = pytz.timezone(TIMEZONE)
-    now = datetime.now(tz)
-    logger.info(f"Запуск отправки мотивационной цитаты в {now.strftime('%Y-%m-%d %H:%M:%S %Z')}")
+    Переводит партию цитат пула пакетными запросами и сохраняет переводы в кэш
     
+    :param quotes: Список объектов Quote
+    """
+    TranslatorService.translate_many([quote.text for quote in quotes])
+    logger.info(f"Переведена партия цитат пула: {len(quotes)}")
+
+def prepare_post():
+    """
+    Готовит пост для буфера: получает цитату, переводит ее и генерирует изображение
+    
+    :return: Объект PreparedPost или None, если перевод или изображение получить не удалось
+    """
+    quote = QuotesService.get_random_quote()
+    translated_text = TranslatorService.translate(quote.text)
+    if not translated_text or translated_text == quote.text:
+        logger.warning("Не удалось перевести цитату для буфера постов")
+        return None
+    image_path = None
+    if ENABLE_IMAGE_GENERATION:
+        image_path = ImageService.generate_image_from_quote(translated_text)
+        if not image_path:
+            logger.warning("Не удалось создать изображение для буфера постов")
+            return None
+    return PreparedPost(quote, translated_text, image_path)
+
+@metrics.timed('quote')
+def _fetch_quote():
     # Получаем случайную цитату
     quote = QuotesService.get_random_quote()
     logger.info(f"Получена цитата: {quote}")
+    return quote
+
+@metrics.timed('translate')
+def _translate_quote(quote):
+    # Этапы проверяют отмену задания по таймауту перед началом работы
+    check_cancelled()
     
-    # Переводим цитату на русский язык
+    # Переводим цитату на русский язык (если на перевод осталось время)
+    if not deadline.has_budget(DEADLINE_TRANSLATION_MIN_SECONDS):
+        deadline.record_degradation(deadline.DEGRADE_SKIP_TRANSLATION)
+        return None
     translated_text = TranslatorService.translate(quote.text)
     logger.info(f"Переведенная цитата: {translated_text}")
+    return translated_text
+
+@metrics.timed('token')
+def _warm_up_token():
+    # Токен GigaChat не зависит от цитаты, поэтому запрашивается параллельно с ней и переводом
+    if deadline.has_budget(DEADLINE_IMAGE_MIN_SECONDS):
+        ImageService.get_access_token()
+
+@metrics.timed('image')
+def _generate_image(quote, translate, token):
+    # Генерируем изображение на основе цитаты (если на генерацию осталось время)
+    if not deadline.has_budget(DEADLINE_IMAGE_MIN_SECONDS):
+        deadline.record_degradation(deadline.DEGRADE_SKIP_IMAGE)
+        return None
+    check_cancelled()
+    logger.info("Генерация изображения на основе цитаты...")
+    image_path = ImageService.generate_image_from_quote(translate or quote.text)
+    if image_path:
+        logger.info(f"Изображение успешно создано: {image_path}")
+    else:
+        logger.warning("Не удалось создать изображение для цитаты")
+    return image_path
+
+def _publish_quote(fencing_check=None):
+    """
+    Готовит и отправляет цитату конвейером этапов: каждый этап запускается,
+    как только готовы этапы, от которых он зависит
+    """
+    pipeline = Pipeline()
+    pipeline.add('quote', _fetch_quote)
+    pipeline.add('translate', _translate_quote, deps=('quote',))
+    if ENABLE_IMAGE_GENERATION and PUBLISH_TEXT_FIRST:
+        # Текст публикуется точно по расписанию, изображение добавляется позже
+        pipeline.add(
+            'send', lambda quote, translate: publish_text_first(quote, translate, fencing_check),
+            deps=('quote', 'translate')
+        )
+    elif ENABLE_IMAGE_GENERATION:
+        pipeline.add('token', _warm_up_token)
+        pipeline.add('image', _generate_image, deps=('quote', 'translate', 'token'))
+        pipeline.add(
+            'send', lambda quote, translate, image: publish_post(quote, translate, image, fencing_check),
+            deps=('quote', 'translate', 'image')
+        )
+    else:
+        pipeline.add(
+            'send', lambda quote, translate: publish_post(quote, translate, None, fencing_check),
+            deps=('quote', 'translate')
+        )
+    try:
+        pipeline.run()
+    finally:
+        logger.info(f"Этапы публикации: {pipeline.format_timings()}")
+
+def _outbox_key(post_id=None):
+    """
+    Ключ идемпотентности поста в очереди отправки: идентификатор подготовленного поста
+    или слот расписания и номинальное время запуска, поэтому повторный запуск того же
+    слота (например, другим экземпляром при смене ведущего) не публикует второй пост
     
-    # Генерируем изображение на основе цитаты (если включено)
-    image_path = None
-    if ENABLE_IMAGE_GENERATION:
-        logger.info("Генерация изображения на основе цитаты...")
-        image_path = ImageService.generate_image_from_quote(translated_text)
-        if image_path:
-            logger.info(f"Изображение успешно создано: {image_path}")
-        else:
-            logger.warning("Не удалось создать изображение для цитаты")
+    :param post_id: Идентификатор поста из буфера или None
+    """
+    if post_id:
+        return post_id
+    slot = current_slot()
+    if slot is None:
+        # Публикация вне расписания ничего не повторяет
+        return str(uuid.uuid4())
+    key, nominal = slot
+    return f"{key}@{int(nominal)}"
+
+@metrics.timed('send')
+def publish_post(quote, translated_text, image_path, fencing_check=None, post_id=None):
+    """
+    Отправляет подготовленную цитату с изображением (если есть) в Telegram
     
-    # Отправляем цитату с изображением (если есть) в Telegram
-    telegram_bot = TelegramBot()
+    :param quote: Объект цитаты
+    :param translated_text: Переведенный текст цитаты
+    :param image_path: Путь к изображению или None
+    :param fencing_check: Функция проверки, что экземпляр все еще ведущий
+    :param post_id: Идентификатор подготовленного поста (ключ идемпотентности очереди отправки)
+    """
+    check_cancelled()
+    if fencing_check is not None and not fencing_check():
+        logger.warning("Экземпляр больше не является ведущим, публикация отменена")
+        _discard_image(image_path)
+        return
+    telegram_bot = get_telegram_bot()
+    if _outbox is not None:
+        # Подготовленный пост записывается один раз, доставку и повторы выполняет очередь
+        message = telegram_bot.format_message(quote, translated_text)
+        if _outbox.enqueue(_outbox_key(post_id), message, image_path, telegram_bot.destinations):
+            logger.info("Цитата поставлена в очередь отправки")
+        else:
+            # Пост этого слота уже в очереди, повторно подготовленное изображение не нужно
+            _discard_image(image_path)
+        return
     result = telegram_bot.send_quote(quote, translated_text, image_path)
+    _log_report(result, "Доставка")
     
     if result:
         logger.info("Цитата успешно отправлена")
     else:
         logger.error("Не удалось отправить цитату")
 
+def _cache_samples(name, hits, misses):
+    """
+    Показатели кэша для /metrics: попадания, промахи и доля попаданий
+    """
+    labels = {'cache': name}
+    lookups = hits + misses
+    return [
+        ('motiveminder_cache_hits', 'Попадания в кэш', hits, labels),
+        ('motiveminder_cache_misses', 'Промахи кэша', misses, labels),
+        ('motiveminder_cache_hit_ratio', 'Доля попаданий в кэш', hits / lookups if lookups else None, labels)
+    ]
+
+def collect_metrics():
+    """
+    Собирает показатели кэшей, буферов, очереди отправки и предохранителей для /metrics
+    """
+    cache_stats = TranslatorService.get_cache_stats()
+    samples = _cache_samples('translation_memory', cache_stats['memory']['hits'], cache_stats['memory']['misses'])
+    if 'persistent' in cache_stats:
+        persistent = cache_stats['persistent']
+        samples += _cache_samples('translation_persistent', persistent['hits'], persistent['misses'])
+    image_store = ImageService.get_image_store()
+    if image_store is not None:
+        samples += _cache_samples('image_store', image_store.hits, image_store.misses)
+    if _post_buffer is not None:
+        samples.append(('motiveminder_post_buffer_size', 'Подготовленных постов в буфере', len(_post_buffer), {}))
+    if _outbox is not None:
+        for status, count in _outbox.stats().items():
+            samples.append(('motiveminder_outbox_deliveries', 'Доставки в очереди отправки', count, {'status': status}))
+    for name, state in get_breaker_states().items():
+        samples.append((
+            'motiveminder_circuit_open', 'Предохранитель сервиса разомкнут',
+            int(state['state'] != STATE_CLOSED), {'service': name}
+        ))
+    return samples
+
+def init_services():
+    """
+    Подготавливает долгоживущие компоненты сервисов (пулы, кэши) перед запуском планировщика
+    """
+    global _telegram_bot, _outbox, _post_buffer
+    _telegram_bot = TelegramBot()
+    
+    trace_path = get_data_path('traces.jsonl') if TRACE_EXPORTER == 'jsonl' else None
+    if trace_path:
+        tracing.set_exporter(tracing.JsonlExporter(
+            trace_path, max_bytes=TRACE_FILE_MAX_MB * 1024 * 1024, backup_count=TRACE_FILE_BACKUPS
+        ))
+        logger.info(f"Трассировки публикаций записываются в {trace_path}")
+    elif TRACE_EXPORTER == 'otlp':
+        tracing.set_exporter(tracing.OtlpExporter(OTLP_ENDPOINT))
+        logger.info(f"Трассировки публикаций отправляются в {OTLP_ENDPOINT}")
+    
+    translation_cache_path = get_data_path('translations.sqlite3')
+    if translation_cache_path:
+        translation_cache = TranslationCache(translation_cache_path)
+        TranslatorService.set_persistent_cache(translation_cache)
+        logger.info(f"Постоянный кэш переводов подключен, записей: {len(translation_cache)}")
+    
+    if QUOTE_POOL_SIZE > 0:
+        # Каждая загруженная партия переводится заранее несколькими пакетными запросами,
+        # поэтому при публикации перевод цитаты из пула берется из кэша
+        quote_pool = QuotePool(storage_path=get_data_path('quotes_pool.json'), on_refill=translate_quotes)
+        quote_pool.start()
+        QuotesService.set_pool(quote_pool)
+        logger.info(f"Пул цитат запущен, загружено цитат: {len(quote_pool)}")
+    
+    if ENABLE_IMAGE_GENERATION:
+        # Токен GigaChat переживает перезапуск и обновляется в фоне до истечения
+        token_manager.set_storage_path(get_data_path('gigachat_token.json'))
+        token_manager.start()
+        
+        image_store_path = get_data_path('images', '')
+        if image_store_path and IMAGE_STORE_MAX_MB > 0:
+            image_store = ImageStore(image_store_path)
+            ImageService.set_image_store(image_store)
+            logger.info(f"Хранилище изображений подключено, изображений: {len(image_store)}")
+    
+    outbox_path = get_data_path('outbox.sqlite3') if OUTBOX_ENABLED else None
+    if outbox_path:
+        _outbox = Outbox(outbox_path, artifacts_dir=get_data_path('outbox', ''))
+        _outbox.start(_telegram_bot)
+        logger.info(f"Очередь отправки запущена, доставок по статусам: {_outbox.stats()}")
+    
+    post_buffer_path = get_data_path('posts', '') if POST_BUFFER_SIZE > 0 else None
+    if post_buffer_path:
+        # Посты готовятся в фоне между слотами, задание по расписанию только отправляет их
+        _post_buffer = PostBuffer(post_buffer_path, prepare_post)
+        if not LEADER_ELECTION:
+            # При выборе ведущего буфер пополняет только ведущий экземпляр
+            _post_buffer.start()
+        logger.info(f"Буфер подготовленных постов подключен, постов: {len(_post_buffer)}")
+
+def reload_settings(scheduler):
+    """
+    Перечитывает конфигурацию и применяет новое расписание без перезапуска процесса
+    
+    Кэши, токены и пулы соединений при этом сохраняются.
+    
+    :param scheduler: Запущенный планировщик (None, если экземпляр ведомый)
+    :return: True, если конфигурация применена
+    """
+    global ENABLE_IMAGE_GENERATION, TIMEZONE, SCHEDULE
+    try:
+        settings = reload_config()
+    except ValueError as e:
+        logger.error(f"Некорректная конфигурация, продолжаем работу с текущей: {e}")
+        return False
+    
+    ENABLE_IMAGE_GENERATION = settings['ENABLE_IMAGE_GENERATION']
+    TIMEZONE = settings['TIMEZONE']
+    SCHEDULE = settings['SCHEDULE']
+    if scheduler is not None:
+        scheduler.reload(settings['SCHEDULE'], settings['TIMEZONE'])
+    logger.info(
+        f"Конфигурация перезагружена (часовой пояс: {TIMEZONE}, "
+        f"генерация изображений: {'включена' if ENABLE_IMAGE_GENERATION else 'отключена'})"
+    )
+    return True
+
+def create_scheduler(job_function, executor, job_store):
+    """
+    Создает планировщик с актуальным (в том числе перезагруженным) расписанием
+    """
+    if ASYNC_MODE:
+        # Слоты обслуживаются циклом asyncio вместо пула потоков JobExecutor; публикация
+        # выполняется в потоке исполнителя цикла с тем же таймаутом и отменой, что и в JobExecutor
+        if executor is not None:
+            scheduler = AsyncScheduler(job_function, job_store=job_store, timeout=executor.timeout)
+        else:
+            scheduler = AsyncScheduler(job_function, job_store=job_store)
+    else:
+        scheduler = Scheduler(job_function, event_driven=SCHEDULER_EVENT_DRIVEN, executor=executor, job_store=job_store)
+    if scheduler.schedule != SCHEDULE or scheduler.timezone.zone != TIMEZONE:
+        scheduler.reload(SCHEDULE, TIMEZONE)
+    return scheduler
+
+def run_leader_terms(leader, executor, job_store, current, shutdown):
+    """
+    Запускает планировщик на каждый срок лидерства до остановки бота
+    
+    Планировщик создается заново для каждого токена ограждения и останавливается,
+    когда экземпляр теряет лидерство или снова получает его с другим токеном
+    (например, если после паузы процесса аренду успел забрать другой экземпляр).
+    
+    :param leader: Объект LeaderElector (запущенный)
+    :param executor: JobExecutor для заданий планировщика
+    :param job_store: JobStore или None
+    :param current: Словарь с текущим планировщиком (для SIGTERM, SIGHUP и метрик)
+    :param shutdown: Событие остановки бота
+    """
+    term = {'token': None}
+    term_lock = threading.Lock()
+    
+    def on_leadership_changed(token=None):
+        # Планировщик прежнего срока не должен продолжать работу со старым токеном
+        with term_lock:
+            scheduler = current['scheduler']
+            if scheduler is not None and term['token'] != token:
+                scheduler.stop()
+    
+    leader.on_elected = on_leadership_changed
+    leader.on_demoted = on_leadership_changed
+    while not shutdown.is_set():
+        if not leader.wait_for_leadership(leader.heartbeat_interval):
+            continue
+        token = leader.fencing_token
+        if shutdown.is_set() or token is None:
+            continue
+        
+        def job(token=token):
+            # Публикация разрешена, только пока токен ограждения действителен
+            send_motivational_quote(fencing_check=lambda: leader.validate(token))
+        
+        scheduler = create_scheduler(job, executor, job_store)
+        with term_lock:
+            current['scheduler'] = scheduler
+            term['token'] = token
+            # Лидерство сменилось или пришел SIGTERM, пока создавался планировщик
+            if shutdown.is_set() or leader.fencing_token != token:
+                scheduler.stop()
+        if _post_buffer is not None:
+            # Каталог буфера общий, поэтому посты готовит и публикует только ведущий
+            _post_buffer.reload()
+            _post_buffer.start()
+        scheduler.start()
+        with term_lock:
+            current['scheduler'] = None
+            term['token'] = None
+        if _post_buffer is not None:
+            _post_buffer.stop()
+
 def main():
     """
     Основная функция запуска бота
@@ -63,9 +519,59 @@ def main():
         logger.info(f"Генерация изображений: {'включена' if ENABLE_IMAGE_GENERATION else 'отключена'}")
         logger.info(f"Проверка SSL сертификатов: {'включена' if VERIFY_SSL else 'отключена'}")
         
-        # Создаем планировщик и запускаем его
-        scheduler = Scheduler(send_motivational_quote)
-        scheduler.start()
+        init_services()
+        
+        # Счетчики записываются всегда, сервер на порту контейнера отдает их по запросу
+        metrics.register_collector(collect_metrics)
+        if METRICS_PORT > 0:
+            MetricsServer(port=METRICS_PORT).start()
+        
+        # Задания выполняются в пуле потоков, чтобы медленная публикация не задерживала следующий слот
+        executor = JobExecutor()
+        # Время последних запусков слотов переживает перезапуск контейнера
+        job_store_path = get_data_path('jobs.sqlite3')
+        job_store = JobStore(job_store_path) if job_store_path else None
+        
+        lease_path = get_data_path('leader.lease') if LEADER_ELECTION else None
+        leader = LeaderElector(lease_path) if lease_path else None
+        
+        # Планировщик создается заново на каждый срок лидерства и заменяется здесь
+        current = {'scheduler': None}
+        shutdown = threading.Event()
+        
+        def collect_next_run():
+            scheduler = current['scheduler']
+            next_run = scheduler.get_next_run_timestamp() if scheduler is not None else None
+            return [('motiveminder_next_run_timestamp_seconds', 'Время ближайшей публикации', next_run, {})]
+        
+        metrics.register_collector(collect_next_run)
+        # После SIGTERM /healthz отвечает 503, чтобы балансировщик перестал направлять запросы
+        metrics.register_health_check('running', lambda: not shutdown.is_set())
+        
+        def on_sigterm(signum, frame):
+            shutdown.set()
+            if current['scheduler'] is not None:
+                current['scheduler'].stop()
+        
+        # SIGTERM (остановка контейнера) прерывает ожидание планировщика без задержки
+        signal.signal(signal.SIGTERM, on_sigterm)
+        # SIGHUP и изменение config/.env перезагружают расписание без перезапуска
+        if hasattr(signal, 'SIGHUP'):
+            signal.signal(signal.SIGHUP, lambda signum, frame: reload_settings(current['scheduler']))
+        if CONFIG_WATCH_INTERVAL > 0:
+            ConfigWatcher(env_path, lambda: reload_settings(current['scheduler']), CONFIG_WATCH_INTERVAL).start()
+        
+        if leader is None:
+            current['scheduler'] = create_scheduler(send_motivational_quote, executor, job_store)
+            current['scheduler'].start()
+            return
+        
+        # Ведомый экземпляр держит кэши и пулы прогретыми и ждет истечения аренды ведущего
+        leader.start()
+        try:
+            run_leader_terms(leader, executor, job_store, current, shutdown)
+        finally:
+            leader.stop()
         
     except KeyboardInterrupt:
         logger.info("Бот остановлен вручную")
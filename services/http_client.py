@@ -0,0 +1,137 @@
+import logging
+import threading
+from urllib.parse import urlparse
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from utils.job_executor import check_cancelled
+from utils.deadline import cap_timeout
+from utils.circuit_breaker import get_breaker
+from utils import metrics, tracing
+from config.config import (
+    VERIFY_SSL, HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE, HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT
+)
+
+# Отключаем предупреждения о небезопасных запросах, если проверка SSL отключена
+if not VERIFY_SSL:
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+logger = logging.getLogger(__name__)
+
+# Общая сессия для всех внешних сервисов (создается при первом запросе)
+_session = None
+_session_lock = threading.Lock()
+
+
+def create_session(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE):
+    """
+    Создает сессию requests с пулами keep-alive соединений
+
+    :param pool_connections: Количество хостов, для которых хранятся пулы соединений
+    :param pool_maxsize: Максимальное количество соединений в пуле одного хоста
+    :return: Объект requests.Session
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.verify = VERIFY_SSL
+    return session
+
+
+def get_session():
+    """
+    Возвращает общую сессию, создавая ее при первом обращении
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+                logger.info(
+                    f"HTTP-клиент инициализирован (пулов: {HTTP_POOL_CONNECTIONS}, "
+                    f"соединений на хост: {HTTP_POOL_MAXSIZE})"
+                )
+    return _session
+
+
+def close_session():
+    """
+    Закрывает общую сессию и все открытые соединения
+    """
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def _is_upstream_failure(response):
+    """
+    Ответ говорит о сбое или перегрузке сервиса (а не об ошибке в запросе)
+    """
+    status_code = getattr(response, 'status_code', None)
+    return isinstance(status_code, int) and (status_code >= 500 or status_code == 429)
+
+
+def request(method, url, breaker=None, **kwargs):
+    """
+    Выполняет HTTP-запрос через общую сессию с таймаутами и проверкой SSL по умолчанию
+
+    Таймаут ограничивается оставшимся временем публикации (utils.deadline).
+
+    :param method: HTTP-метод
+    :param url: URL запроса
+    :param breaker: Имя предохранителя сервиса: при разомкнутом предохранителе запрос
+        отклоняется исключением CircuitOpenError без обращения к сети
+    :param kwargs: Аргументы requests.Session.request
+    :return: Объект requests.Response
+    """
+    # Отмененное по таймауту задание не начинает новых запросов
+    check_cancelled()
+    # Таймаут не превышает времени, оставшегося до крайнего срока публикации
+    kwargs['timeout'] = cap_timeout(kwargs.get('timeout', (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)))
+    kwargs.setdefault('verify', VERIFY_SSL)
+    host = urlparse(url).hostname
+    with tracing.span(f"http {method}", host=host) as span:
+        circuit = get_breaker(breaker) if breaker is not None else None
+        if circuit is not None:
+            circuit.before_request()
+        # Ошибки учитываются по имени предохранителя сервиса, а без него - по имени хоста
+        service = breaker or host
+        try:
+            response = get_session().request(method, url, **kwargs)
+        except requests.RequestException as e:
+            metrics.record_upstream_error(service, type(e).__name__)
+            if circuit is not None:
+                circuit.record_failure()
+            raise
+        status_code = getattr(response, 'status_code', None)
+        if isinstance(status_code, int):
+            span.set_attribute('status_code', status_code)
+            if status_code >= 400:
+                metrics.record_upstream_error(service, status_code)
+        # Тело потокового ответа учитывается при чтении (например, при сохранении изображения)
+        content = getattr(response, 'content', None) if not kwargs.get('stream') else None
+        if isinstance(content, bytes):
+            span.add_bytes(len(content))
+        if circuit is not None:
+            if _is_upstream_failure(response):
+                circuit.record_failure()
+            else:
+                circuit.record_success()
+        return response
+
+
+def get(url, **kwargs):
+    """
+    Выполняет GET-запрос через общую сессию
+    """
+    return request('GET', url, **kwargs)
+
+
+def post(url, **kwargs):
+    """
+    Выполняет POST-запрос через общую сессию
+    """
+    return request('POST', url, **kwargs)
\ No newline at end of file
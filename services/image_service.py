@@ -4,71 +4,67 @@ import json
 import logging
 import requests
 import tempfile
-import urllib3
-import uuid
+import itertools
 import re
-from datetime import datetime, timedelta
+import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from bs4 import BeautifulSoup
-from config.config import GIGACHAT_API_KEY, VERIFY_SSL, GIGACHAT_MODEL
-
-# Отключаем предупреждения о небезопасных запросах, если проверка SSL отключена
-if not VERIFY_SSL:
-    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+from config.config import (
+    GIGACHAT_MODEL, GIGACHAT_FALLBACK_MODEL, GIGACHAT_HEDGE_DELAY_SECONDS,
+    HTTP_CONNECT_TIMEOUT, GIGACHAT_READ_TIMEOUT, DEADLINE_IMAGE_RETRY_MIN_SECONDS
+)
+from services import http_client
+from services.token_manager import TokenManager, GIGACHAT_BREAKER
+from services.model_router import ModelRouter
+from utils import metrics, tracing
+from utils.deadline import has_budget, record_degradation, DEGRADE_SKIP_IMAGE_RETRY
 
 logger = logging.getLogger(__name__)
 
-# Глобальные переменные для хранения токена
-access_token = None
-token_expiry = None
+# Общий менеджер токена доступа к GigaChat API
+token_manager = TokenManager()
+# Общий маршрутизатор моделей GigaChat (накапливает статистику задержек и ответов)
+model_router = ModelRouter()
+# Пул потоков для параллельных запросов к запасной модели
+_hedge_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix='gigachat-hedge')
+
+GIGACHAT_COMPLETIONS_URL = "https://gigachat.devices.sberbank.ru/api/v1/chat/completions"
+# Размер части при потоковом чтении изображения
+IMAGE_CHUNK_SIZE = 64 * 1024
+
+# Системное сообщение для стилизации изображений
+SYSTEM_MESSAGE = "Ты — опытный художник, специализирующийся на создании философских визуализаций. Основной объект — реалистичный персонаж, воплощающий дух мотивационной биографии, находящийся в естественной, вне времени обстановке. Изображение должно быть выполнено в киношном стиле с использованием кинематографичного градиента, легкого движения (развевающиеся волосы, туман, свет) и легких акцентов (птички, лунный свет, отражения), создающих вдохновляющую, светлую и оптимистичную атмосферу. В ключевых моментах избегай абстрактных элементов и буквального отображения текста. Важно: избегай любых надписей или букв — на итоговом изображении не должно быть текста."
 
 class ImageService:
+    # Хранилище сгенерированных изображений (подключается при запуске бота)
+    _image_store = None
+    
+    @classmethod
+    def set_image_store(cls, store):
+        """
+        Подключает хранилище изображений с адресацией по содержимому
+        
+        :param store: Объект ImageStore или None для отключения
+        """
+        cls._image_store = store
+    
+    @classmethod
+    def get_image_store(cls):
+        """
+        Возвращает подключенное хранилище изображений или None
+        """
+        return cls._image_store
+    
     @staticmethod
+    @tracing.traced('gigachat.get_access_token')
     def get_access_token():
         """
         Получает токен доступа к GigaChat API
         
         :return: Токен доступа или None в случае ошибки
         """
-        global access_token, token_expiry
-        
-        # Проверяем, есть ли действующий токен
-        if access_token and token_expiry and datetime.now() < token_expiry:
-            logger.info("Используем существующий токен доступа")
-            return access_token
-            
-        try:
-            rq_uid = str(uuid.uuid4())
-            url = "https://ngw.devices.sberbank.ru:9443/api/v2/oauth"
-            
-            headers = {
-                "Content-Type": "application/x-www-form-urlencoded",
-                "Accept": "application/json",
-                "RqUID": rq_uid,
-                "Authorization": f"Basic {GIGACHAT_API_KEY}"
-            }
-            
-            payload = {
-                "scope": "GIGACHAT_API_PERS"
-            }
-            
-            logger.info("Получение токена доступа к GigaChat API")
-            response = requests.post(url, headers=headers, data=payload, verify=VERIFY_SSL)
-            response.raise_for_status()
-            
-            data = response.json()
-            if 'access_token' in data:
-                access_token = data['access_token']
-                # Устанавливаем срок действия токена на 30 минут
-                token_expiry = datetime.now() + timedelta(minutes=30)
-                logger.info("Токен доступа получен успешно")
-                return access_token
-            else:
-                logger.error("Токен доступа не найден в ответе от GigaChat API")
-                return None
-                
-        except requests.RequestException as e:
-            logger.error(f"Ошибка при получении токена доступа: {e}")
-            return None
+        return token_manager.get_token()
     
     @staticmethod
     def extract_image_uuid(content):
@@ -102,149 +98,269 @@ class ImageService:
             return None
             
     @staticmethod
+    def _find_image_uuid(response_data):
+        """
+        Ищет UUID изображения в ответе chat/completions (в тексте или в function_call)
+        
+        :param response_data: Разобранный JSON ответа
+        :return: UUID изображения или None, если модель не вернула изображение
+        :raises ValueError: Если формат ответа не соответствует ожидаемому
+        """
+        try:
+            message = response_data['choices'][0]['message']
+            content = message['content']
+        except (KeyError, IndexError, TypeError):
+            raise ValueError(f"Неожиданный формат ответа от GigaChat API: {response_data}")
+        logger.info(f"Получен ответ от GigaChat: {content}")
+        
+        image_uuid = ImageService.extract_image_uuid(content)
+        function_call = message.get('function_call')
+        if not image_uuid and function_call and function_call.get('name') == 'text2image':
+            try:
+                image_uuid = json.loads(function_call['arguments']).get('uuid')
+                logger.info(f"UUID изображения найден в function_call: {image_uuid}")
+            except Exception as e:
+                logger.error(f"Ошибка при разборе аргументов функции: {e}")
+        return image_uuid
+    
+    @staticmethod
+    def _request_image_uuid(model, quote_text, headers):
+        """
+        Запрашивает генерацию изображения у одной модели и учитывает результат в маршрутизаторе
+        
+        :param model: Имя модели GigaChat
+        :param quote_text: Текст цитаты
+        :param headers: Заголовки запроса с токеном доступа
+        :return: UUID изображения или None, если модель не вернула изображение
+        """
+        payload = {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": SYSTEM_MESSAGE},
+                {"role": "user", "content": f"Нарисуй изображение, иллюстрирующее цитату: {quote_text}"}
+            ],
+            "temperature": 1.0,
+            "function_call": "auto"
+        }
+        # Генерация изображения занимает больше времени, чем обычный запрос
+        generation_timeout = (HTTP_CONNECT_TIMEOUT, GIGACHAT_READ_TIMEOUT)
+        
+        logger.info(f"Отправка запроса на генерацию изображения в GigaChat (модель: {model})")
+        started = time.monotonic()
+        image_uuid = None
+        with tracing.span('gigachat.completions', model=model) as span:
+            try:
+                response = http_client.post(
+                    GIGACHAT_COMPLETIONS_URL, headers=headers, json=payload, timeout=generation_timeout,
+                    breaker=GIGACHAT_BREAKER
+                )
+                response.raise_for_status()
+                response_data = response.json()
+                logger.debug(f"Ответ GigaChat: {response_data}")
+                image_uuid = ImageService._find_image_uuid(response_data)
+                return image_uuid
+            finally:
+                span.set_attribute('outcome', tracing.OUTCOME_OK if image_uuid else tracing.OUTCOME_EMPTY)
+                model_router.record(model, time.monotonic() - started, bool(image_uuid))
+    
+    @staticmethod
+    def _candidate_models():
+        """
+        Возвращает модели для генерации от лучшей к худшей по оценке маршрутизатора
+        """
+        models = [GIGACHAT_MODEL]
+        if GIGACHAT_FALLBACK_MODEL and GIGACHAT_FALLBACK_MODEL not in models:
+            models.append(GIGACHAT_FALLBACK_MODEL)
+        return model_router.order(models)
+    
+    @staticmethod
+    def _can_try_next_model():
+        """
+        Проверяет, хватает ли времени публикации на запрос к следующей модели
+        """
+        if has_budget(DEADLINE_IMAGE_RETRY_MIN_SECONDS):
+            return True
+        record_degradation(DEGRADE_SKIP_IMAGE_RETRY)
+        return False
+    
+    @staticmethod
+    def _generate_sequential(models, quote_text, headers):
+        """
+        Опрашивает модели по очереди, пока одна из них не вернет изображение
+        
+        :return: Кортеж (модель, UUID изображения) или (None, None)
+        """
+        for index, model in enumerate(models):
+            if index > 0:
+                if not ImageService._can_try_next_model():
+                    break
+                logger.warning(f"UUID изображения не найден при использовании модели {models[index - 1]}. Пробуем с моделью {model}")
+            image_uuid = ImageService._request_image_uuid(model, quote_text, headers)
+            if image_uuid:
+                return model, image_uuid
+        return None, None
+    
+    @staticmethod
+    def _generate_hedged(models, quote_text, headers, delay):
+        """
+        Запускает следующую модель параллельно, если предыдущая не ответила за delay секунд
+        
+        Возвращается первый ответ с изображением; результат остальных запросов
+        игнорируется (прервать уже начатый HTTP-запрос requests не позволяет).
+        
+        :return: Кортеж (модель, UUID изображения) или (None, None)
+        """
+        pending = list(models)
+        running = {}
+        
+        def launch():
+            model = pending.pop(0)
+            # Запрос в пуле видит крайний срок и токен отмены текущей публикации
+            context = contextvars.copy_context()
+            running[_hedge_pool.submit(context.run, ImageService._request_image_uuid, model, quote_text, headers)] = model
+        
+        launch()
+        while running:
+            done, _ = wait(list(running), timeout=delay if pending else None, return_when=FIRST_COMPLETED)
+            for future in done:
+                model = running.pop(future)
+                try:
+                    image_uuid = future.result()
+                except Exception as e:
+                    logger.error(f"Ошибка генерации изображения моделью {model}: {e}")
+                    image_uuid = None
+                if image_uuid:
+                    for other in running:
+                        other.cancel()
+                    if running:
+                        logger.info(f"Изображение получено от модели {model}, остальные запросы отменены")
+                    return model, image_uuid
+            if not pending:
+                continue
+            # Ответ без изображения или истекшая задержка запускают следующую модель
+            reason = "ответ без изображения" if done else f"нет ответа за {delay} с"
+            if ImageService._can_try_next_model():
+                logger.info(f"Параллельный запрос к модели {pending[0]} ({reason})")
+                launch()
+            else:
+                pending.clear()
+        return None, None
+    
+    @staticmethod
+    def _count_bytes(chunks):
+        """
+        Передает фрагменты дальше, добавляя их размер к текущему span трассировки
+        """
+        for chunk in chunks:
+            tracing.add_bytes(len(chunk))
+            yield chunk
+    
+    @staticmethod
+    def _save_image(image_response, image_store, store_key):
+        """
+        Сохраняет изображение из потокового ответа в хранилище или во временный файл
+        
+        :param image_response: Ответ requests, полученный с stream=True
+        :param image_store: Хранилище изображений или None
+        :param store_key: Ключ изображения в хранилище
+        :return: Путь к файлу с изображением или None, если ответ пустой
+        """
+        chunks = ImageService._count_bytes(
+            chunk for chunk in image_response.iter_content(chunk_size=IMAGE_CHUNK_SIZE) if chunk
+        )
+        # Проверка наличия содержимого до создания файла
+        first_chunk = next(chunks, None)
+        if first_chunk is None:
+            logger.error("Пустой ответ при получении изображения")
+            return None
+        chunks = itertools.chain([first_chunk], chunks)
+        
+        # Сохраняем изображение в хранилище, если оно подключено
+        if image_store is not None:
+            return image_store.put(store_key, chunks)
+        
+        # Иначе сохраняем изображение во временный файл
+        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.jpg')
+        try:
+            for chunk in chunks:
+                temp_file.write(chunk)
+            temp_file.close()
+        except Exception:
+            temp_file.close()
+            os.unlink(temp_file.name)
+            raise
+        
+        logger.info(f"Изображение сохранено во временный файл: {temp_file.name}")
+        return temp_file.name
+    
+    @staticmethod
+    @tracing.traced('gigachat.generate_image_from_quote')
     def generate_image_from_quote(quote_text):
         """
         Генерирует изображение на основе цитаты с помощью GigaChat API
         
+        Модели опрашиваются в порядке оценки маршрутизатора; при GIGACHAT_HEDGE_DELAY_SECONDS > 0
+        запасная модель запускается параллельно, если первая не ответила за это время.
+        
         :param quote_text: Текст переведенной цитаты
-        :return: Путь к временному файлу с изображением или None в случае ошибки
+        :return: Путь к файлу с изображением или None в случае ошибки
         """
         try:
+            models = ImageService._candidate_models()
+            
+            # Сначала ищем готовое изображение для этой цитаты от любой из моделей в хранилище
+            image_store = ImageService.get_image_store()
+            if image_store is not None:
+                for model in models:
+                    cached_path = image_store.acquire(image_store.make_key(quote_text, model, SYSTEM_MESSAGE))
+                    if cached_path:
+                        logger.info(f"Изображение для цитаты (модель {model}) найдено в хранилище: {cached_path}")
+                        return cached_path
+            
             # Получаем токен доступа
             access_token = ImageService.get_access_token()
             if not access_token:
                 logger.error("Не удалось получить токен доступа к GigaChat API")
                 return None
             
-            # Простое сообщение для генерации изображения
-            simple_prompt = f"Нарисуй изображение, иллюстрирующее цитату: {quote_text}"
-            
-            # Добавляем системное сообщение для стилизации
-            system_message = "Ты — опытный художник, специализирующийся на создании философских визуализаций. Основной объект — реалистичный персонаж, воплощающий дух мотивационной биографии, находящийся в естественной, вне времени обстановке. Изображение должно быть выполнено в киношном стиле с использованием кинематографичного градиента, легкого движения (развевающиеся волосы, туман, свет) и легких акцентов (птички, лунный свет, отражения), создающих вдохновляющую, светлую и оптимистичную атмосферу. В ключевых моментах избегай абстрактных элементов и буквального отображения текста. Важно: избегай любых надписей или букв — на итоговом изображении не должно быть текста."
-            
-            # Запрос к GigaChat API для генерации изображения
-            url = "https://gigachat.devices.sberbank.ru/api/v1/chat/completions"
-            
             headers = {
                 "Content-Type": "application/json",
                 "Accept": "application/json",
                 "Authorization": f"Bearer {access_token}"
             }
             
-            payload = {
-                "model": GIGACHAT_MODEL,
-                "messages": [
-                    {"role": "system", "content": system_message},
-                    {"role": "user", "content": simple_prompt}
-                ],
-                "temperature": 1.0,
-                "function_call": "auto"
-            }
-            
-            # Отправляем запрос на генерацию
-            logger.info(f"Отправка запроса на генерацию изображения в GigaChat (модель: {GIGACHAT_MODEL})")
-            response = requests.post(url, headers=headers, json=payload, verify=VERIFY_SSL)
-            response.raise_for_status()
+            if GIGACHAT_HEDGE_DELAY_SECONDS > 0 and len(models) > 1:
+                model, image_uuid = ImageService._generate_hedged(
+                    models, quote_text, headers, GIGACHAT_HEDGE_DELAY_SECONDS
+                )
+            else:
+                model, image_uuid = ImageService._generate_sequential(models, quote_text, headers)
             
-            response_data = response.json()
-            logger.debug(f"Ответ GigaChat: {response_data}")
+            if not image_uuid:
+                logger.error("UUID изображения не найден в ответе GigaChat после всех попыток")
+                return None
             
-            # Проверяем наличие выбора и сообщения
-            if (
-                'choices' in response_data and 
-                len(response_data['choices']) > 0 and 
-                'message' in response_data['choices'][0] and
-                'content' in response_data['choices'][0]['message']
-            ):
-                # Получаем содержимое ответа
-                content = response_data['choices'][0]['message']['content']
-                logger.info(f"Получен ответ от GigaChat: {content}")
-                
-                # Извлекаем UUID изображения из ответа
-                image_uuid = ImageService.extract_image_uuid(content)
-                
-                if not image_uuid:
-                    # Проверяем, есть ли функция text2image в ответе (как альтернативный вариант)
-                    if 'function_call' in response_data['choices'][0]['message']:
-                        function_call = response_data['choices'][0]['message']['function_call']
-                        if function_call['name'] == 'text2image':
-                            try:
-                                function_args = json.loads(function_call['arguments'])
-                                image_uuid = function_args.get('uuid')
-                                logger.info(f"UUID изображения найден в function_call: {image_uuid}")
-                            except Exception as e:
-                                logger.error(f"Ошибка при разборе аргументов функции: {e}")
-                                return None
-                    
-                    # Если UUID все еще не найден и используется не стандартная модель,
-                    # пробуем повторно с моделью по умолчанию
-                    if not image_uuid and GIGACHAT_MODEL != 'GigaChat':
-                        logger.warning(f"UUID изображения не найден при использовании модели {GIGACHAT_MODEL}. Пробуем с моделью GigaChat")
-                        
-                        # Изменяем модель в payload на GigaChat
-                        payload['model'] = 'GigaChat'
-                        
-                        # Повторяем запрос
-                        logger.info("Отправка повторного запроса на генерацию изображения с моделью GigaChat")
-                        response = requests.post(url, headers=headers, json=payload, verify=VERIFY_SSL)
-                        response.raise_for_status()
-                        
-                        response_data = response.json()
-                        if (
-                            'choices' in response_data and 
-                            len(response_data['choices']) > 0 and 
-                            'message' in response_data['choices'][0] and
-                            'content' in response_data['choices'][0]['message']
-                        ):
-                            content = response_data['choices'][0]['message']['content']
-                            logger.info(f"Получен ответ от GigaChat (повторная попытка): {content}")
-                            image_uuid = ImageService.extract_image_uuid(content)
-                            
-                            if not image_uuid and 'function_call' in response_data['choices'][0]['message']:
-                                function_call = response_data['choices'][0]['message']['function_call']
-                                if function_call['name'] == 'text2image':
-                                    try:
-                                        function_args = json.loads(function_call['arguments'])
-                                        image_uuid = function_args.get('uuid')
-                                        logger.info(f"UUID изображения найден в function_call (повторная попытка): {image_uuid}")
-                                    except Exception as e:
-                                        logger.error(f"Ошибка при разборе аргументов функции (повторная попытка): {e}")
-                                        return None
-                    
-                    if not image_uuid:
-                        logger.error("UUID изображения не найден в ответе GigaChat после всех попыток")
-                        return None
-                
-                # Запрашиваем содержимое изображения
-                logger.info(f"Получение изображения с UUID: {image_uuid}")
-                image_url = f"https://gigachat.devices.sberbank.ru/api/v1/files/{image_uuid}/content"
-                image_response = requests.get(
+            # Запрашиваем содержимое изображения
+            logger.info(f"Получение изображения с UUID: {image_uuid}")
+            image_url = f"https://gigachat.devices.sberbank.ru/api/v1/files/{image_uuid}/content"
+            # Изображение читается потоком и записывается на диск по частям, не целиком в память
+            with metrics.STAGE_LATENCY.time(stage='download'), tracing.span('gigachat.download'):
+                image_response = http_client.get(
                     image_url,
                     headers=headers,
-                    verify=VERIFY_SSL
+                    breaker=GIGACHAT_BREAKER,
+                    stream=True
                 )
-                
-                # Проверка статуса ответа
-                if image_response.status_code != 200:
-                    logger.error(f"Ошибка при получении изображения: {image_response.status_code} {image_response.text}")
-                    return None
-                    
-                # Проверка наличия содержимого
-                if not image_response.content:
-                    logger.error("Пустой ответ при получении изображения")
-                    return None
-                
-                # Сохраняем изображение во временный файл
-                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.jpg')
-                temp_file.write(image_response.content)
-                temp_file.close()
-                
-                logger.info(f"Изображение сохранено во временный файл: {temp_file.name}")
-                return temp_file.name
-            else:
-                logger.error("Неожиданный формат ответа от GigaChat API")
-                logger.debug(f"Ответ GigaChat: {response_data}")
-                return None
+                try:
+                    # Проверка статуса ответа
+                    if image_response.status_code != 200:
+                        logger.error(f"Ошибка при получении изображения: {image_response.status_code} {image_response.text}")
+                        return None
+                    # Ключ хранилища - модель, которая действительно создала изображение
+                    store_key = image_store.make_key(quote_text, model, SYSTEM_MESSAGE) if image_store is not None else None
+                    return ImageService._save_image(image_response, image_store, store_key)
+                finally:
+                    image_response.close()
                 
         except requests.RequestException as e:
             logger.error(f"Ошибка при запросе к GigaChat API: {e}")
@@ -252,6 +368,9 @@ class ImageService:
         except json.JSONDecodeError as e:
             logger.error(f"Ошибка при разборе JSON ответа: {e}")
             return None
+        except ValueError as e:
+            logger.error(str(e))
+            return None
         except Exception as e:
             logger.error(f"Непредвиденная ошибка при генерации изображения: {e}")
             return None 
\ No newline at end of file
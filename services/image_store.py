@@ -0,0 +1,196 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from config.config import IMAGE_STORE_MAX_MB
+from utils.storage import atomic_write_json, read_json
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = 'index.json'
+
+
+class ImageStore:
+    """
+    Хранилище изображений с адресацией по содержимому
+
+    Ключ изображения - sha256 от (текста цитаты, модели, системного промпта),
+    поэтому повторная генерация для той же цитаты берется из хранилища.
+    Индекс хранит размер, время последнего обращения и дополнительные поля записи;
+    при превышении лимита размера удаляются давно не использованные изображения,
+    на которые нет активных ссылок.
+    """
+
+    def __init__(self, directory, max_bytes=IMAGE_STORE_MAX_MB * 1024 * 1024):
+        """
+        :param directory: Каталог хранилища
+        :param max_bytes: Максимальный суммарный размер изображений в байтах
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._refs = {}
+        os.makedirs(directory, exist_ok=True)
+        self._index_path = os.path.join(directory, INDEX_FILE)
+        self._index = self._load_index()
+
+    @staticmethod
+    def make_key(text, model, system_prompt):
+        """
+        Вычисляет ключ изображения по тексту, модели и системному промпту
+        """
+        digest = hashlib.sha256()
+        for part in (text, model, system_prompt):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.jpg")
+
+    def _load_index(self):
+        """
+        Загружает индекс, отбрасывая записи без файлов на диске
+        """
+        index = read_json(self._index_path, default={})
+        if not isinstance(index, dict):
+            index = {}
+        return {key: entry for key, entry in index.items() if os.path.exists(self._path(key))}
+
+    def _save_index(self):
+        try:
+            atomic_write_json(self._index_path, self._index)
+        except OSError as e:
+            logger.warning(f"Не удалось сохранить индекс хранилища изображений: {e}")
+
+    def _key_for_path(self, path):
+        if not path or os.path.dirname(os.path.abspath(path)) != os.path.abspath(self.directory):
+            return None
+        key = os.path.splitext(os.path.basename(path))[0]
+        return key if key in self._index else None
+
+    def owns(self, path):
+        """
+        Проверяет, принадлежит ли файл хранилищу
+        """
+        with self._lock:
+            return self._key_for_path(path) is not None
+
+    def acquire(self, key):
+        """
+        Возвращает путь к изображению и увеличивает счетчик ссылок на него
+
+        :return: Путь к файлу или None, если изображения нет в хранилище
+        """
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None or not os.path.exists(self._path(key)):
+                self._index.pop(key, None)
+                self.misses += 1
+                return None
+            self.hits += 1
+            entry['last_access'] = time.time()
+            self._refs[key] = self._refs.get(key, 0) + 1
+            self._save_index()
+            return self._path(key)
+
+    def put(self, key, chunks):
+        """
+        Атомарно сохраняет изображение и захватывает ссылку на него
+
+        :param key: Ключ изображения
+        :param chunks: Содержимое изображения (bytes или итерируемый набор фрагментов)
+        :return: Путь к сохраненному файлу
+        """
+        if isinstance(chunks, (bytes, bytearray)):
+            chunks = [chunks]
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-', suffix='.jpg')
+        size = 0
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    if chunk:
+                        f.write(chunk)
+                        size += len(chunk)
+            os.replace(tmp_path, self._path(key))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        with self._lock:
+            entry = self._index.get(key, {})
+            entry.update({'size': size, 'last_access': time.time()})
+            self._index[key] = entry
+            self._refs[key] = self._refs.get(key, 0) + 1
+            self._evict()
+            self._save_index()
+        logger.info(f"Изображение сохранено в хранилище: {self._path(key)}")
+        return self._path(key)
+
+    def release(self, path):
+        """
+        Освобождает ссылку на изображение, полученную через acquire или put
+        """
+        with self._lock:
+            key = self._key_for_path(path)
+            if key is None:
+                return
+            count = self._refs.get(key, 0) - 1
+            if count > 0:
+                self._refs[key] = count
+            else:
+                self._refs.pop(key, None)
+            self._evict()
+
+    def get_metadata(self, path, field):
+        """
+        Возвращает дополнительное поле записи изображения
+        """
+        with self._lock:
+            key = self._key_for_path(path)
+            return self._index[key].get(field) if key else None
+
+    def set_metadata(self, path, field, value):
+        """
+        Сохраняет дополнительное поле записи изображения в индексе
+        """
+        with self._lock:
+            key = self._key_for_path(path)
+            if key is None:
+                return
+            self._index[key][field] = value
+            self._save_index()
+
+    def total_size(self):
+        return sum(entry.get('size', 0) for entry in self._index.values())
+
+    def _evict(self):
+        """
+        Удаляет давно не использованные изображения без активных ссылок сверх лимита
+        (вызывается под блокировкой)
+        """
+        total = self.total_size()
+        if total <= self.max_bytes:
+            return
+        candidates = sorted(
+            (key for key in self._index if not self._refs.get(key)),
+            key=lambda key: self._index[key].get('last_access', 0)
+        )
+        for key in candidates:
+            if total <= self.max_bytes:
+                break
+            total -= self._index.pop(key).get('size', 0)
+            try:
+                os.unlink(self._path(key))
+            except OSError as e:
+                logger.warning(f"Не удалось удалить изображение {key} из хранилища: {e}")
+            logger.info(f"Изображение {key} вытеснено из хранилища")
+        self._save_index()
+
+    def __len__(self):
+        return len(self._index)
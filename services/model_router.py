@@ -0,0 +1,84 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Вес нового наблюдения в скользящем среднем
+EWMA_ALPHA = 0.3
+# Нижняя граница доли ответов с изображением (чтобы оценка оставалась конечной)
+MIN_SUCCESS_RATE = 0.05
+
+
+class ModelRouter:
+    """
+    Выбор модели GigaChat по наблюдаемой задержке и доле ответов без изображения
+
+    Для каждой модели хранится экспоненциальное скользящее среднее задержки
+    и доли ответов, содержащих изображение. Оценка модели - ожидаемое время
+    до получения изображения: задержка, деленная на долю успешных ответов.
+    Модель без наблюдений получает оценку худшей из известных моделей,
+    при равных оценках сохраняется порядок из конфигурации.
+    """
+
+    def __init__(self, alpha=EWMA_ALPHA):
+        """
+        :param alpha: Вес нового наблюдения в скользящем среднем (0..1)
+        """
+        self.alpha = alpha
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def record(self, model, latency, success):
+        """
+        Учитывает результат запроса к модели
+
+        :param model: Имя модели
+        :param latency: Время ответа в секундах
+        :param success: Ответ содержит изображение
+        """
+        success = 1.0 if success else 0.0
+        with self._lock:
+            stats = self._stats.get(model)
+            if stats is None:
+                self._stats[model] = {'latency': latency, 'success': success, 'count': 1}
+                return
+            stats['latency'] += self.alpha * (latency - stats['latency'])
+            stats['success'] += self.alpha * (success - stats['success'])
+            stats['count'] += 1
+
+    def score(self, model):
+        """
+        :return: Ожидаемое время до получения изображения или None, если наблюдений нет
+        """
+        with self._lock:
+            stats = self._stats.get(model)
+            if stats is None:
+                return None
+            return stats['latency'] / max(stats['success'], MIN_SUCCESS_RATE)
+
+    def order(self, models):
+        """
+        Упорядочивает модели от лучшей к худшей
+
+        :param models: Список моделей в порядке приоритета из конфигурации
+        :return: Новый список моделей
+        """
+        scores = {model: self.score(model) for model in models}
+        known = [score for score in scores.values() if score is not None]
+        default = max(known) if known else 0.0
+        ordered = sorted(
+            enumerate(models),
+            key=lambda item: (scores[item[1]] if scores[item[1]] is not None else default, item[0])
+        )
+        return [model for _, model in ordered]
+
+    def get_stats(self):
+        """
+        Возвращает скользящие средние задержки и доли ответов с изображением по моделям
+        """
+        with self._lock:
+            return {model: dict(stats) for model, stats in self._stats.items()}
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
\ No newline at end of file
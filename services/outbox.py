@@ -0,0 +1,398 @@
+import logging
+import os
+import random
+import shutil
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import telegram
+from config.config import (
+    OUTBOX_MAX_ATTEMPTS, OUTBOX_BACKOFF_BASE, OUTBOX_BACKOFF_MAX, OUTBOX_POLL_SECONDS,
+    TELEGRAM_SEND_CONCURRENCY
+)
+from services.image_service import ImageService
+from utils import tracing
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = 'pending'
+STATUS_SENDING = 'sending'
+STATUS_SENT = 'sent'
+STATUS_FAILED = 'failed'
+# Через сколько секунд незавершенная отправка (например, после падения процесса) считается брошенной
+CLAIM_TIMEOUT = 300
+# Ошибки, повтор которых не поможет
+PERMANENT_ERRORS = (telegram.error.BadRequest, telegram.error.Unauthorized, telegram.error.ChatMigrated)
+
+
+class Outbox:
+    """
+    Постоянная очередь отправки подготовленных постов в Telegram (SQLite)
+
+    Пост (текст и изображение) записывается один раз, после чего доставляется
+    в каждый чат отдельно. Ключ поста - ключ идемпотентности: повторная постановка
+    того же поста игнорируется, а доставленный чат не получает его снова.
+    Неудачная доставка повторяется с экспоненциальной задержкой и случайным
+    разбросом; при RetryAfter используется время, указанное Telegram.
+    Каждая доставка записывается в трассировку публикации, поставившей пост в очередь.
+    """
+
+    def __init__(self, db_path, artifacts_dir=None, max_attempts=OUTBOX_MAX_ATTEMPTS,
+                 backoff_base=OUTBOX_BACKOFF_BASE, backoff_max=OUTBOX_BACKOFF_MAX,
+                 poll_interval=OUTBOX_POLL_SECONDS, clock=None):
+        """
+        :param db_path: Путь к файлу базы данных SQLite
+        :param artifacts_dir: Каталог для изображений постов (None - изображения не переносятся)
+        :param max_attempts: Максимальное количество попыток доставки в один чат
+        :param backoff_base: Базовая задержка перед повтором в секундах
+        :param backoff_max: Максимальная задержка перед повтором в секундах
+        :param poll_interval: Максимальная пауза фонового обработчика в секундах
+        :param clock: Функция текущего времени (по умолчанию time.time)
+        """
+        self.db_path = db_path
+        self.artifacts_dir = artifacts_dir
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.poll_interval = poll_interval
+        self.clock = clock or time.time
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._pool = ThreadPoolExecutor(max_workers=TELEGRAM_SEND_CONCURRENCY, thread_name_prefix='outbox')
+        if artifacts_dir:
+            os.makedirs(artifacts_dir, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS posts (
+                post_id TEXT PRIMARY KEY,
+                message TEXT NOT NULL,
+                image_path TEXT,
+                photo_file_id TEXT,
+                created_at REAL NOT NULL,
+                completed INTEGER NOT NULL DEFAULT 0,
+                store_path TEXT,
+                trace_id TEXT,
+                parent_span_id TEXT
+            )
+            """
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(posts)")}
+        if 'store_path' not in columns:
+            # База, созданная до появления копий изображений из хранилища
+            self._conn.execute("ALTER TABLE posts ADD COLUMN store_path TEXT")
+        for column in ('trace_id', 'parent_span_id'):
+            if column not in columns:
+                # База, созданная до привязки доставок к трассировке публикации
+                self._conn.execute(f"ALTER TABLE posts ADD COLUMN {column} TEXT")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS deliveries (
+                post_id TEXT NOT NULL,
+                chat_id TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                message_id INTEGER,
+                last_error TEXT,
+                PRIMARY KEY (post_id, chat_id)
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_deliveries_due ON deliveries (status, next_attempt_at)"
+        )
+        self._conn.commit()
+
+    def enqueue(self, post_id, message, image_path, destinations):
+        """
+        Записывает подготовленный пост в очередь
+
+        Изображение переносится в каталог очереди, чтобы пережить перезапуск: временный
+        файл перемещается, а изображение из хранилища связывается жесткой ссылкой
+        (или копируется), потому что после перезапуска хранилище может его вытеснить.
+        Вместе с постом сохраняется текущий span, чтобы доставки продолжили трассировку.
+
+        :param post_id: Ключ идемпотентности поста
+        :param message: Текст сообщения
+        :param image_path: Путь к изображению или None
+        :param destinations: Список чатов
+        :return: True, если пост добавлен, False, если он уже был в очереди
+        """
+        now = self.clock()
+        with self._lock:
+            exists = self._conn.execute("SELECT 1 FROM posts WHERE post_id = ?", (post_id,)).fetchone()
+            if exists:
+                logger.info(f"Пост {post_id} уже есть в очереди отправки")
+                return False
+            image_store = ImageService.get_image_store()
+            store_path = image_path if image_store is not None and image_path and image_store.owns(image_path) else None
+            photo_file_id = image_store.get_metadata(store_path, 'file_id') if store_path else None
+            image_path = self._keep_image(post_id, image_path)
+            span = tracing.current_span()
+            self._conn.execute(
+                "INSERT INTO posts (post_id, message, image_path, photo_file_id, created_at, store_path, "
+                "trace_id, parent_span_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (post_id, message, image_path, photo_file_id, now, store_path, span.trace_id, span.span_id)
+            )
+            self._conn.executemany(
+                "INSERT INTO deliveries (post_id, chat_id, status, next_attempt_at) VALUES (?, ?, ?, ?)",
+                [(post_id, str(chat_id), STATUS_PENDING, now) for chat_id in destinations]
+            )
+            self._conn.commit()
+        logger.info(f"Пост {post_id} поставлен в очередь отправки в {len(destinations)} чат(а)")
+        self._wakeup.set()
+        return True
+
+    def _keep_image(self, post_id, image_path):
+        if not image_path or not os.path.exists(image_path):
+            return None
+        if not self.artifacts_dir:
+            return image_path
+        target = os.path.join(self.artifacts_dir, f"{post_id}{os.path.splitext(image_path)[1] or '.jpg'}")
+        image_store = ImageService.get_image_store()
+        if image_store is not None and image_store.owns(image_path):
+            try:
+                os.link(image_path, target)
+            except OSError:
+                shutil.copyfile(image_path, target)
+            image_store.release(image_path)
+        else:
+            shutil.move(image_path, target)
+        return target
+
+    def _claim_due(self, now):
+        """
+        Отбирает доставки, срок которых наступил, и помечает их как отправляемые
+
+        :return: Список кортежей (post_id, chat_id, attempts, message, image_path, photo_file_id,
+            trace_id, parent_span_id)
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT d.post_id, d.chat_id, d.attempts, p.message, p.image_path, p.photo_file_id, "
+                "p.trace_id, p.parent_span_id "
+                "FROM deliveries d JOIN posts p ON p.post_id = d.post_id "
+                "WHERE d.status IN (?, ?) AND d.next_attempt_at <= ? "
+                "ORDER BY d.next_attempt_at",
+                (STATUS_PENDING, STATUS_SENDING, now)
+            ).fetchall()
+            claimed = []
+            for row in rows:
+                # Условное обновление не даст двум обработчикам забрать одну доставку
+                cursor = self._conn.execute(
+                    "UPDATE deliveries SET status = ?, next_attempt_at = ? "
+                    "WHERE post_id = ? AND chat_id = ? AND status IN (?, ?) AND next_attempt_at <= ?",
+                    (STATUS_SENDING, now + CLAIM_TIMEOUT, row[0], row[1], STATUS_PENDING, STATUS_SENDING, now)
+                )
+                if cursor.rowcount:
+                    claimed.append(row)
+            self._conn.commit()
+        return claimed
+
+    def _backoff(self, attempts):
+        """
+        Задержка перед повтором: экспоненциальная с разбросом в половину интервала
+        """
+        delay = min(self.backoff_max, self.backoff_base * 2 ** max(attempts - 1, 0))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def _deliver(self, bot, row):
+        """
+        Доставляет пост в один чат и сохраняет результат
+
+        :return: file_id изображения после доставки
+        """
+        post_id, chat_id, attempts, message, image_path, photo_file_id, trace_id, parent_span_id = row
+        attempts += 1
+        try:
+            # Доставка выполняется после завершения публикации и продолжает ее трассировку
+            with tracing.start_trace(
+                'outbox.deliver', trace_id=trace_id, parent_id=parent_span_id,
+                post_id=post_id, chat_id=chat_id, attempt=attempts
+            ):
+                message_id, photo_file_id = bot.deliver(chat_id, message, image_path, photo_file_id)
+        except telegram.error.RetryAfter as e:
+            self._reschedule(post_id, chat_id, attempts, e.retry_after, str(e))
+            return photo_file_id
+        except PERMANENT_ERRORS as e:
+            self._update(post_id, chat_id, STATUS_FAILED, attempts, str(e))
+            logger.error(f"Пост {post_id} не может быть доставлен в {chat_id}: {e}")
+            return photo_file_id
+        except Exception as e:
+            self._reschedule(post_id, chat_id, attempts, self._backoff(attempts), str(e))
+            return photo_file_id
+
+        with self._lock:
+            self._conn.execute(
+                "UPDATE deliveries SET status = ?, attempts = ?, message_id = ?, last_error = NULL "
+                "WHERE post_id = ? AND chat_id = ?",
+                (STATUS_SENT, attempts, message_id, post_id, chat_id)
+            )
+            store_path = None
+            if photo_file_id:
+                self._conn.execute(
+                    "UPDATE posts SET photo_file_id = ? WHERE post_id = ?", (photo_file_id, post_id)
+                )
+                store_path = self._conn.execute(
+                    "SELECT store_path FROM posts WHERE post_id = ?", (post_id,)
+                ).fetchone()[0]
+            self._conn.commit()
+        image_store = ImageService.get_image_store()
+        # file_id сохраняется у исходного изображения в хранилище для повторного использования
+        store_path = store_path or image_path
+        if photo_file_id and image_store is not None and image_store.owns(store_path):
+            image_store.set_metadata(store_path, 'file_id', photo_file_id)
+        return photo_file_id
+
+    def _reschedule(self, post_id, chat_id, attempts, delay, error):
+        if attempts >= self.max_attempts:
+            self._update(post_id, chat_id, STATUS_FAILED, attempts, error)
+            logger.error(f"Пост {post_id} не доставлен в {chat_id} после {attempts} попыток: {error}")
+            return
+        with self._lock:
+            self._conn.execute(
+                "UPDATE deliveries SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ? "
+                "WHERE post_id = ? AND chat_id = ?",
+                (STATUS_PENDING, attempts, self.clock() + delay, error, post_id, chat_id)
+            )
+            self._conn.commit()
+        logger.warning(f"Доставка поста {post_id} в {chat_id} будет повторена через {delay:.1f} с: {error}")
+
+    def _update(self, post_id, chat_id, status, attempts, error):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE deliveries SET status = ?, attempts = ?, last_error = ? WHERE post_id = ? AND chat_id = ?",
+                (status, attempts, error, post_id, chat_id)
+            )
+            self._conn.commit()
+
+    def process_due(self, bot, now=None):
+        """
+        Доставляет все посты, срок отправки которых наступил
+
+        Изображение, еще не загруженное в Telegram, отправляется в первый чат поста,
+        остальные чаты получают его по file_id параллельно.
+
+        :param bot: Объект TelegramBot
+        :return: Количество обработанных доставок
+        """
+        now = self.clock() if now is None else now
+        claimed = self._claim_due(now)
+        by_post = {}
+        for row in claimed:
+            by_post.setdefault(row[0], []).append(row)
+
+        for post_id, rows in by_post.items():
+            if rows[0][4] and not rows[0][5]:
+                photo_file_id = self._deliver(bot, rows[0])
+                rows = [row[:5] + (photo_file_id,) + row[6:] for row in rows[1:]]
+            list(self._pool.map(lambda row: self._deliver(bot, row), rows))
+            self._complete_post(post_id)
+        return len(claimed)
+
+    def _complete_post(self, post_id):
+        """
+        Освобождает изображение поста, когда все его доставки завершены
+        """
+        with self._lock:
+            unfinished = self._conn.execute(
+                "SELECT COUNT(*) FROM deliveries WHERE post_id = ? AND status IN (?, ?)",
+                (post_id, STATUS_PENDING, STATUS_SENDING)
+            ).fetchone()[0]
+            if unfinished:
+                return
+            row = self._conn.execute(
+                "SELECT image_path FROM posts WHERE post_id = ? AND completed = 0", (post_id,)
+            ).fetchone()
+            if row is None:
+                return
+            self._conn.execute("UPDATE posts SET completed = 1 WHERE post_id = ?", (post_id,))
+            self._conn.commit()
+        image_path = row[0]
+        if not image_path:
+            return
+        image_store = ImageService.get_image_store()
+        if image_store is not None and image_store.owns(image_path):
+            image_store.release(image_path)
+        elif os.path.exists(image_path):
+            try:
+                os.unlink(image_path)
+            except OSError as e:
+                logger.warning(f"Не удалось удалить изображение {image_path}: {e}")
+
+    def get_deliveries(self, post_id):
+        """
+        Возвращает состояние доставок поста
+
+        :return: Словарь {chat_id: (статус, количество попыток, id сообщения, последняя ошибка)}
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT chat_id, status, attempts, message_id, last_error FROM deliveries WHERE post_id = ?",
+                (post_id,)
+            ).fetchall()
+        return {row[0]: row[1:] for row in rows}
+
+    def stats(self):
+        """
+        Возвращает количество доставок по статусам
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM deliveries GROUP BY status").fetchall()
+        return dict(rows)
+
+    def seconds_until_next(self, now=None):
+        """
+        :return: Секунды до ближайшей запланированной доставки или None
+        """
+        now = self.clock() if now is None else now
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(next_attempt_at) FROM deliveries WHERE status IN (?, ?)",
+                (STATUS_PENDING, STATUS_SENDING)
+            ).fetchone()
+        return None if row[0] is None else max(row[0] - now, 0.0)
+
+    def _run(self, bot):
+        while not self._stop_event.is_set():
+            self._wakeup.clear()
+            try:
+                self.process_due(bot)
+            except Exception as e:
+                logger.error(f"Ошибка обработчика очереди отправки: {e}")
+            delay = self.seconds_until_next()
+            self._wakeup.wait(self.poll_interval if delay is None else min(delay, self.poll_interval))
+
+    def start(self, bot):
+        """
+        Запускает фоновую доставку постов
+
+        :param bot: Объект TelegramBot
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, args=(bot,), name='telegram-outbox', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Останавливает фоновую доставку постов
+        """
+        self._stop_event.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def close(self):
+        self.stop()
+        self._pool.shutdown(wait=True)
+        with self._lock:
+            self._conn.close()
\ No newline at end of file
@@ -0,0 +1,234 @@
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import deque
+from config.config import (
+    POST_BUFFER_SIZE, POST_BUFFER_LOW_WATERMARK, POST_BUFFER_REFILL_INTERVAL, POST_BUFFER_RETRY_SECONDS
+)
+from services.quotes_service import Quote
+from services.image_service import ImageService
+from utils.storage import atomic_write_json, read_json
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = 'index.json'
+
+
+class PreparedPost:
+    """
+    Полностью подготовленный пост: цитата, перевод и изображение
+    """
+
+    def __init__(self, quote, translated_text=None, image_path=None, post_id=None, prepared_at=None):
+        self.quote = quote
+        self.translated_text = translated_text
+        self.image_path = image_path
+        self.post_id = post_id or uuid.uuid4().hex
+        self.prepared_at = prepared_at or time.time()
+
+    def to_dict(self):
+        return {
+            'id': self.post_id,
+            'q': self.quote.text,
+            'a': self.quote.author,
+            'translation': self.translated_text,
+            'image': os.path.basename(self.image_path) if self.image_path else None,
+            'prepared_at': self.prepared_at
+        }
+
+
+class PostBuffer:
+    """
+    Ограниченный буфер заранее подготовленных постов в каталоге постоянных данных
+
+    Фоновый поток готовит посты функцией prepare (получение цитаты, перевод,
+    генерация изображения) между слотами расписания: дозагрузка начинается,
+    когда в буфере остается меньше low_watermark постов, и продолжается до max_size.
+    Между подготовкой постов выдерживается пауза, чтобы не превышать лимиты
+    внешних сервисов. Задание по расписанию только извлекает готовый пост.
+    """
+
+    def __init__(self, directory, prepare, max_size=POST_BUFFER_SIZE, low_watermark=POST_BUFFER_LOW_WATERMARK,
+                 refill_interval=POST_BUFFER_REFILL_INTERVAL, retry_seconds=POST_BUFFER_RETRY_SECONDS):
+        """
+        :param directory: Каталог буфера (индекс и изображения постов)
+        :param prepare: Функция подготовки поста, возвращающая PreparedPost или None при ошибке
+        :param max_size: Максимальное количество постов в буфере
+        :param low_watermark: Нижняя граница, при которой запускается дозагрузка
+        :param refill_interval: Пауза между подготовкой постов в секундах
+        :param retry_seconds: Пауза перед повторной попыткой после неудачной подготовки
+        """
+        self.directory = directory
+        self.prepare = prepare
+        self.max_size = max_size
+        self.low_watermark = low_watermark
+        self.refill_interval = refill_interval
+        self.retry_seconds = retry_seconds
+        self._posts = deque()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop_event = threading.Event()
+        self._refilling = False
+        self._thread = None
+        os.makedirs(directory, exist_ok=True)
+        self._index_path = os.path.join(directory, INDEX_FILE)
+        self._load()
+
+    def __len__(self):
+        return len(self._posts)
+
+    def _load(self):
+        """
+        Загружает сохраненные посты; пост с пропавшим изображением отбрасывается
+        """
+        data = read_json(self._index_path, default=[])
+        for item in data if isinstance(data, list) else []:
+            if not isinstance(item, dict) or not item.get('q'):
+                continue
+            image_path = os.path.join(self.directory, item['image']) if item.get('image') else None
+            if image_path and not os.path.exists(image_path):
+                logger.warning(f"Изображение поста {item.get('id')} не найдено, пост отброшен")
+                continue
+            self._posts.append(PreparedPost(
+                Quote(item['q'], item.get('a', 'Unknown author')), item.get('translation'),
+                image_path, item.get('id'), item.get('prepared_at')
+            ))
+        if self._posts:
+            logger.info(f"Загружено подготовленных постов: {len(self._posts)}")
+
+    def reload(self):
+        """
+        Перечитывает буфер с диска (например, после смены ведущего экземпляра)
+        """
+        with self._lock:
+            self._posts.clear()
+        self._load()
+
+    def _save(self):
+        with self._lock:
+            data = [post.to_dict() for post in self._posts]
+        try:
+            atomic_write_json(self._index_path, data)
+        except OSError as e:
+            logger.warning(f"Не удалось сохранить буфер постов в {self._index_path}: {e}")
+
+    def _adopt_image(self, post):
+        """
+        Переносит изображение поста в каталог буфера
+
+        Временный файл перемещается; изображение из хранилища связывается жесткой
+        ссылкой (или копируется), а ссылка на него в хранилище освобождается.
+        """
+        if not post.image_path:
+            return
+        target = os.path.join(self.directory, f"{post.post_id}.jpg")
+        image_store = ImageService.get_image_store()
+        if image_store is not None and image_store.owns(post.image_path):
+            try:
+                os.link(post.image_path, target)
+            except OSError:
+                shutil.copyfile(post.image_path, target)
+            image_store.release(post.image_path)
+        else:
+            shutil.move(post.image_path, target)
+        post.image_path = target
+
+    def pop(self):
+        """
+        Извлекает подготовленный пост без сетевых запросов
+
+        Изображение поста после извлечения принадлежит вызывающему коду.
+
+        :return: Объект PreparedPost или None, если буфер пуст
+        """
+        with self._lock:
+            post = self._posts.popleft() if self._posts else None
+            remaining = len(self._posts)
+        self._save()
+        if remaining < self.low_watermark:
+            logger.info(f"В буфере подготовленных постов меньше нижней границы ({remaining}/{self.low_watermark})")
+            self._wakeup.set()
+        return post
+
+    def refill_one(self):
+        """
+        Готовит один пост и добавляет его в буфер
+
+        :return: True, если пост добавлен
+        """
+        try:
+            post = self.prepare()
+        except Exception as e:
+            logger.error(f"Ошибка при подготовке поста: {e}")
+            return False
+        if post is None:
+            return False
+        with self._lock:
+            duplicate = any(queued.quote.text == post.quote.text for queued in self._posts)
+        if duplicate:
+            logger.info("Цитата уже есть в буфере подготовленных постов, пост отброшен")
+            if post.image_path:
+                self._discard(post)
+            return False
+        self._adopt_image(post)
+        with self._lock:
+            self._posts.append(post)
+            size = len(self._posts)
+        self._save()
+        logger.info(f"Подготовлен пост {post.post_id} (в буфере: {size}/{self.max_size})")
+        return True
+
+    @staticmethod
+    def _discard(post):
+        image_store = ImageService.get_image_store()
+        if image_store is not None and image_store.owns(post.image_path):
+            image_store.release(post.image_path)
+        elif os.path.exists(post.image_path):
+            os.unlink(post.image_path)
+
+    def _needs_refill(self):
+        """
+        Определяет, нужно ли готовить пост сейчас (с учетом нижней границы)
+
+        :return: True, если буфер нужно пополнять
+        """
+        size = len(self._posts)
+        if size < self.low_watermark:
+            self._refilling = True
+        elif size >= self.max_size:
+            self._refilling = False
+        return self._refilling
+
+    def _run(self):
+        """
+        Цикл фонового потока: готовит посты, пока буфер не заполнится
+        """
+        while not self._stop_event.is_set():
+            self._wakeup.clear()
+            timeout = None
+            if self._needs_refill():
+                timeout = self.refill_interval if self.refill_one() else self.retry_seconds
+            self._wakeup.wait(timeout)
+
+    def start(self):
+        """
+        Запускает фоновую подготовку постов
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='post-buffer', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Останавливает фоновую подготовку постов
+        """
+        self._stop_event.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
\ No newline at end of file
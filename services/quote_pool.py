@@ -0,0 +1,191 @@
+import logging
+import threading
+from collections import deque
+import requests
+from services import http_client
+from config.config import (
+    ZENQUOTES_BATCH_API_URL, QUOTE_POOL_SIZE, QUOTE_POOL_LOW_WATERMARK, QUOTE_POOL_RETRY_SECONDS
+)
+from services.quotes_service import Quote, ZENQUOTES_BREAKER
+from utils.storage import atomic_write_json, read_json
+
+logger = logging.getLogger(__name__)
+
+# При превышении лимита ZenQuotes возвращает служебную "цитату" вместо данных
+RATE_LIMIT_MARKER = 'Too many requests'
+
+
+class QuotePool:
+    """
+    Ограниченный пул заранее загруженных цитат
+
+    Цитаты загружаются пакетами с эндпоинта ZenQuotes /api/quotes, хранятся в памяти
+    и сохраняются в файл, чтобы пережить перезапуск. Когда размер пула опускается
+    ниже нижней границы, фоновый поток дозагружает новую партию.
+    """
+
+    def __init__(self, storage_path=None, max_size=QUOTE_POOL_SIZE, low_watermark=QUOTE_POOL_LOW_WATERMARK,
+                 retry_seconds=QUOTE_POOL_RETRY_SECONDS, on_refill=None):
+        """
+        :param storage_path: Путь к файлу для сохранения пула (None - без сохранения)
+        :param max_size: Максимальное количество цитат в пуле
+        :param low_watermark: Нижняя граница, при которой запускается дозагрузка
+        :param retry_seconds: Пауза перед повторной попыткой после неудачной загрузки
+        :param on_refill: Функция, получающая список добавленных цитат после пополнения
+            (например, для пакетного перевода всей партии заранее)
+        """
+        self.storage_path = storage_path
+        self.max_size = max_size
+        self.low_watermark = low_watermark
+        self.retry_seconds = retry_seconds
+        self.on_refill = on_refill
+        self._quotes = deque(maxlen=max_size)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop_event = threading.Event()
+        self._dirty = False
+        self._thread = None
+        self._load()
+
+    def __len__(self):
+        return len(self._quotes)
+
+    def _load(self):
+        """
+        Загружает сохраненный пул из файла
+        """
+        data = read_json(self.storage_path, default=[])
+        for item in data if isinstance(data, list) else []:
+            if isinstance(item, dict) and item.get('q'):
+                self._quotes.append(Quote(item['q'], item.get('a', 'Unknown author')))
+        if self._quotes:
+            logger.info(f"Loaded {len(self._quotes)} quotes from {self.storage_path}")
+
+    def _save(self):
+        """
+        Сохраняет текущее содержимое пула в файл
+        """
+        if not self.storage_path:
+            return
+        with self._lock:
+            data = [{'q': quote.text, 'a': quote.author} for quote in self._quotes]
+            self._dirty = False
+        try:
+            atomic_write_json(self.storage_path, data)
+        except OSError as e:
+            logger.warning(f"Failed to persist quote pool to {self.storage_path}: {e}")
+
+    def pop(self):
+        """
+        Извлекает цитату из пула без сетевых запросов
+
+        :return: Объект Quote или None, если пул пуст
+        """
+        with self._lock:
+            quote = self._quotes.popleft() if self._quotes else None
+            self._dirty = True
+            remaining = len(self._quotes)
+
+        if self._thread is not None and self._thread.is_alive():
+            # Сохранение и дозагрузку выполняет фоновый поток
+            self._wakeup.set()
+        else:
+            self._save()
+
+        if remaining < self.low_watermark:
+            logger.info(f"Quote pool is below low watermark ({remaining}/{self.low_watermark})")
+        return quote
+
+    @staticmethod
+    def fetch_batch():
+        """
+        Загружает партию цитат с пакетного эндпоинта ZenQuotes
+
+        :return: Список объектов Quote (пустой в случае ошибки)
+        """
+        try:
+            response = http_client.get(ZENQUOTES_BATCH_API_URL, breaker=ZENQUOTES_BREAKER)
+            response.raise_for_status()
+            data = response.json()
+        except (requests.RequestException, ValueError) as e:
+            logger.error(f"Error fetching quote batch from ZenQuotes API: {e}")
+            return []
+
+        if not isinstance(data, list):
+            logger.error("Unexpected batch response format from ZenQuotes API")
+            return []
+
+        quotes = []
+        for item in data:
+            text = item.get('q') if isinstance(item, dict) else None
+            if not text or text.startswith(RATE_LIMIT_MARKER):
+                continue
+            quotes.append(Quote(text, item.get('a', 'Unknown author')))
+        return quotes
+
+    def refill(self):
+        """
+        Дозагружает цитаты до максимального размера пула
+
+        :return: Количество добавленных цитат
+        """
+        quotes = self.fetch_batch()
+        added = []
+        with self._lock:
+            known = {quote.text for quote in self._quotes}
+            for quote in quotes:
+                if len(self._quotes) >= self.max_size:
+                    break
+                if quote.text in known:
+                    continue
+                self._quotes.append(quote)
+                known.add(quote.text)
+                added.append(quote)
+            if added:
+                self._dirty = True
+        if added:
+            self._save()
+            logger.info(f"Quote pool refilled with {len(added)} quotes (size: {len(self._quotes)})")
+            if self.on_refill is not None:
+                try:
+                    self.on_refill(added)
+                except Exception as e:
+                    logger.warning(f"Quote pool refill callback failed: {e}")
+        return len(added)
+
+    def _run(self):
+        """
+        Цикл фонового потока: сохраняет изменения и дозагружает пул ниже нижней границы
+        """
+        while not self._stop_event.is_set():
+            self._wakeup.clear()
+            timeout = None
+            if self._dirty:
+                self._save()
+            if len(self._quotes) < self.low_watermark:
+                if not self.refill():
+                    # Не удалось пополнить пул - ждем перед следующей попыткой
+                    timeout = self.retry_seconds
+            self._wakeup.wait(timeout)
+
+    def start(self):
+        """
+        Запускает фоновый поток пополнения пула
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='quote-pool', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Останавливает фоновый поток и сохраняет пул
+        """
+        self._stop_event.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self._dirty:
+            self._save()
\ No newline at end of file
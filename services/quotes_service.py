@@ -1,9 +1,14 @@
 import requests
 import logging
+from services import http_client
+from utils import tracing
 from config.config import ZENQUOTES_API_URL
 
 logger = logging.getLogger(__name__)
 
+# Имя предохранителя ZenQuotes API (общий для пула цитат и одиночных запросов)
+ZENQUOTES_BREAKER = 'zenquotes'
+
 class Quote:
     def __init__(self, text, author):
         self.text = text
@@ -13,13 +18,39 @@ class Quote:
         return f'"{self.text}" - {self.author}'
 
 class QuotesService:
+    # Пул заранее загруженных цитат (подключается при запуске бота)
+    _pool = None
+
+    @classmethod
+    def set_pool(cls, pool):
+        """
+        Подключает пул цитат, из которого будут выдаваться цитаты без сетевых запросов
+
+        :param pool: Объект QuotePool или None для отключения пула
+        """
+        cls._pool = pool
+
+    @classmethod
+    @tracing.traced('zenquotes.get_random_quote')
+    def get_random_quote(cls) -> Quote:
+        """
+        Получает случайную цитату из пула, а если он пуст или не подключен - из API ZenQuotes
+        """
+        if cls._pool is not None:
+            quote = cls._pool.pop()
+            if quote is not None:
+                return quote
+            logger.warning("Quote pool is empty, fetching quote from ZenQuotes API directly")
+
+        return cls.fetch_random_quote()
+
     @staticmethod
-    def get_random_quote() -> Quote:
+    def fetch_random_quote() -> Quote:
         """
         Получает случайную цитату из API ZenQuotes
         """
         try:
-            response = requests.get(ZENQUOTES_API_URL)
+            response = http_client.get(ZENQUOTES_API_URL, breaker=ZENQUOTES_BREAKER)
             response.raise_for_status()  # Проверка на ошибки HTTP
             
             data = response.json()
@@ -36,4 +67,4 @@ class QuotesService:
         except requests.RequestException as e:
             logger.error(f"Error fetching quote from ZenQuotes API: {e}")
             # Возвращаем запасную цитату в случае ошибки
-            return Quote("Life is what happens when you're busy making other plans.", "John Lennon") 
\ No newline at end of file
+            return Quote("Life is what happens when you're busy making other plans.", "John Lennon")
\ No newline at end of file
@@ -0,0 +1,215 @@
+import logging
+import os
+import threading
+import time
+import uuid
+import requests
+from config.config import GIGACHAT_API_KEY, GIGACHAT_TOKEN_REFRESH_MARGIN
+from services import http_client
+from utils.storage import atomic_write_json, read_json
+
+logger = logging.getLogger(__name__)
+
+GIGACHAT_OAUTH_URL = "https://ngw.devices.sberbank.ru:9443/api/v2/oauth"
+# Имя предохранителя GigaChat API (общий для получения токена и генерации изображений)
+GIGACHAT_BREAKER = 'gigachat'
+# Срок действия токена, если в ответе нет expires_at
+DEFAULT_TOKEN_LIFETIME = 30 * 60
+# Минимальный остаток срока действия, при котором токен еще выдается вызывающему коду
+MIN_TOKEN_TTL = 10
+# Пауза перед повторной попыткой фонового обновления после ошибки
+REFRESH_RETRY_SECONDS = 30
+
+
+class TokenManager:
+    """
+    Менеджер токена доступа к GigaChat API
+
+    Берет срок действия из поля expires_at ответа OAuth, обновляет токен в фоне
+    заранее до истечения, сохраняет его на диск и гарантирует, что одновременные
+    вызовы ожидают одного и того же запроса на обновление.
+    """
+
+    def __init__(self, storage_path=None, refresh_margin=GIGACHAT_TOKEN_REFRESH_MARGIN):
+        """
+        :param storage_path: Путь к файлу для сохранения токена (None - без сохранения)
+        :param refresh_margin: За сколько секунд до истечения обновлять токен в фоне
+        """
+        self.refresh_margin = refresh_margin
+        self._token = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+        self._refresh_finished = threading.Condition(self._lock)
+        self._refreshing = False
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.storage_path = None
+        self.set_storage_path(storage_path)
+
+    def set_storage_path(self, storage_path):
+        """
+        Задает файл для сохранения токена и загружает из него действующий токен
+
+        :param storage_path: Путь к файлу или None
+        """
+        self.storage_path = storage_path
+        data = read_json(storage_path, default=None)
+        if isinstance(data, dict) and data.get('access_token'):
+            expires_at = float(data.get('expires_at', 0))
+            if expires_at - time.time() > MIN_TOKEN_TTL:
+                with self._lock:
+                    self._token = data['access_token']
+                    self._expires_at = expires_at
+                logger.info("Загружен сохраненный токен доступа к GigaChat API")
+
+    @property
+    def expires_at(self):
+        return self._expires_at
+
+    def _is_valid(self, min_ttl=MIN_TOKEN_TTL):
+        return self._token is not None and self._expires_at - time.time() > min_ttl
+
+    @staticmethod
+    def _parse_expires_at(data):
+        """
+        Возвращает время истечения токена в секундах epoch
+
+        GigaChat возвращает expires_at в миллисекундах; при отсутствии поля
+        используется срок действия по умолчанию.
+        """
+        expires_at = data.get('expires_at')
+        if expires_at is None:
+            return time.time() + DEFAULT_TOKEN_LIFETIME
+        expires_at = float(expires_at)
+        if expires_at > 1e12:
+            expires_at /= 1000.0
+        return expires_at
+
+    def _request_token(self):
+        """
+        Запрашивает новый токен у OAuth-эндпоинта GigaChat
+
+        :return: Кортеж (токен, время истечения) или (None, 0) в случае ошибки
+        """
+        try:
+            headers = {
+                "Content-Type": "application/x-www-form-urlencoded",
+                "Accept": "application/json",
+                "RqUID": str(uuid.uuid4()),
+                "Authorization": f"Basic {GIGACHAT_API_KEY}"
+            }
+            payload = {
+                "scope": "GIGACHAT_API_PERS"
+            }
+
+            logger.info("Получение токена доступа к GigaChat API")
+            response = http_client.post(GIGACHAT_OAUTH_URL, headers=headers, data=payload, breaker=GIGACHAT_BREAKER)
+            response.raise_for_status()
+
+            data = response.json()
+            if 'access_token' in data:
+                logger.info("Токен доступа получен успешно")
+                return data['access_token'], self._parse_expires_at(data)
+            logger.error("Токен доступа не найден в ответе от GigaChat API")
+            return None, 0.0
+
+        except (requests.RequestException, ValueError) as e:
+            logger.error(f"Ошибка при получении токена доступа: {e}")
+            return None, 0.0
+
+    def _save(self, token, expires_at):
+        if not self.storage_path:
+            return
+        try:
+            atomic_write_json(self.storage_path, {'access_token': token, 'expires_at': expires_at})
+            os.chmod(self.storage_path, 0o600)
+        except OSError as e:
+            logger.warning(f"Не удалось сохранить токен доступа в {self.storage_path}: {e}")
+
+    def refresh(self, force=False):
+        """
+        Обновляет токен; одновременные вызовы ожидают один общий запрос
+
+        :param force: Обновить токен, даже если текущий еще действует
+        :return: Токен доступа или None в случае ошибки
+        """
+        with self._lock:
+            if not force and self._is_valid():
+                return self._token
+            if self._refreshing:
+                # Токен уже обновляется в другом потоке - ждем его результат
+                while self._refreshing:
+                    self._refresh_finished.wait()
+                return self._token if self._is_valid() else None
+            self._refreshing = True
+
+        token, expires_at = None, 0.0
+        try:
+            token, expires_at = self._request_token()
+        finally:
+            with self._lock:
+                if token:
+                    self._token = token
+                    self._expires_at = expires_at
+                self._refreshing = False
+                self._refresh_finished.notify_all()
+
+        if token:
+            self._save(token, expires_at)
+            return token
+        with self._lock:
+            return self._token if self._is_valid() else None
+
+    def get_token(self):
+        """
+        Возвращает действующий токен, при необходимости обновляя его
+
+        :return: Токен доступа или None в случае ошибки
+        """
+        with self._lock:
+            if self._is_valid():
+                logger.info("Используем существующий токен доступа")
+                return self._token
+        return self.refresh()
+
+    def reset(self):
+        """
+        Сбрасывает сохраненный в памяти токен
+        """
+        with self._lock:
+            self._token = None
+            self._expires_at = 0.0
+
+    def _run(self):
+        """
+        Цикл фонового потока: обновляет токен за refresh_margin секунд до истечения
+        """
+        while not self._stop_event.is_set():
+            delay = self._expires_at - self.refresh_margin - time.time()
+            if delay > 0:
+                self._stop_event.wait(delay)
+                continue
+            previous_expires_at = self._expires_at
+            self.refresh(force=True)
+            if self._expires_at <= previous_expires_at:
+                # Обновить токен не удалось - повторяем попытку позже
+                self._stop_event.wait(REFRESH_RETRY_SECONDS)
+
+    def start(self):
+        """
+        Запускает фоновое обновление токена
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='gigachat-token', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Останавливает фоновое обновление токена
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
\ No newline at end of file
@@ -0,0 +1,115 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from config.config import TRANSLATION_CACHE_MAX_ENTRIES
+
+logger = logging.getLogger(__name__)
+
+
+class TranslationCache:
+    """
+    Постоянный кэш переводов в SQLite (второй уровень после TTLCache в памяти)
+
+    Ключ записи - (source_lang, target_lang, sha256(text)). При превышении
+    max_entries удаляются записи, к которым дольше всего не обращались.
+    """
+
+    def __init__(self, db_path, max_entries=TRANSLATION_CACHE_MAX_ENTRIES):
+        """
+        :param db_path: Путь к файлу базы данных SQLite
+        :param max_entries: Максимальное количество записей в кэше
+        """
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS translations (
+                source_lang TEXT NOT NULL,
+                target_lang TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                translation TEXT NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (source_lang, target_lang, text_hash)
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_translations_last_access ON translations (last_access)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _hash(text):
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def get(self, text, source_lang, target_lang):
+        """
+        Возвращает перевод из кэша
+
+        :return: Переведенный текст или None, если записи нет
+        """
+        key = (source_lang, target_lang, self._hash(text))
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT translation FROM translations WHERE source_lang = ? AND target_lang = ? AND text_hash = ?",
+                key
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute(
+                "UPDATE translations SET last_access = ? WHERE source_lang = ? AND target_lang = ? AND text_hash = ?",
+                (time.time(),) + key
+            )
+            self._conn.commit()
+            return row[0]
+
+    def set(self, text, source_lang, target_lang, translation):
+        """
+        Сохраняет перевод в кэш и при необходимости вытесняет старые записи
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO translations (source_lang, target_lang, text_hash, translation, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (source_lang, target_lang, self._hash(text), translation, time.time())
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """
+        Удаляет самые давно использованные записи сверх max_entries (вызывается под блокировкой)
+        """
+        count = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM translations WHERE rowid IN "
+                "(SELECT rowid FROM translations ORDER BY last_access LIMIT ?)",
+                (excess,)
+            )
+            logger.info(f"Evicted {excess} entries from translation cache")
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
+    def stats(self):
+        """
+        Возвращает счетчики попаданий и промахов кэша
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self)}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
\ No newline at end of file
@@ -1,26 +1,110 @@
 import requests
 import logging
+import threading
+from services import http_client
+from utils import tracing
+from utils.circuit_breaker import get_breaker
+from concurrent.futures import ThreadPoolExecutor
 from cachetools import TTLCache
-from config.config import MYMEMORY_API_URL, MYMEMORY_EMAIL
+from config.config import (
+    MYMEMORY_API_URL, MYMEMORY_EMAIL, TRANSLATION_CACHE_SIZE,
+    MYMEMORY_MAX_QUERY_LENGTH, TRANSLATION_MAX_CONCURRENCY
+)
 
 logger = logging.getLogger(__name__)
 
+# Имя предохранителя MyMemory API
+MYMEMORY_BREAKER = 'mymemory'
+# Признак исчерпания дневной квоты MyMemory в тексте ответа
+QUOTA_WARNING_MARKER = 'MYMEMORY WARNING'
+
 class TranslatorService:
-    # Кэш для хранения переводов (TTL - 24 часа)
-    _cache = TTLCache(maxsize=100, ttl=86400)
+    # Кэш для хранения переводов в памяти (TTL - 24 часа)
+    _cache = TTLCache(maxsize=TRANSLATION_CACHE_SIZE, ttl=86400)
+    # Постоянный кэш второго уровня (подключается при запуске бота)
+    _persistent_cache = None
+    # Счетчики попаданий и промахов кэша в памяти
+    _cache_hits = 0
+    _cache_misses = 0
+    # Блокировка кэша в памяти (TTLCache не потокобезопасен, а переводы идут из этапов публикации и пакетов)
+    _cache_lock = threading.Lock()
+    # Разделитель текстов при пакетном переводе (MyMemory сохраняет переводы строк)
+    BATCH_SEPARATOR = '\n'
     
     @classmethod
-    def translate(cls, text, source_lang='en', target_lang='ru'):
+    def set_persistent_cache(cls, cache):
         """
-        Переводит текст с использованием MyMemory API
+        Подключает постоянный кэш переводов второго уровня
+
+        :param cache: Объект TranslationCache или None для отключения
+        """
+        cls._persistent_cache = cache
+
+    @classmethod
+    def get_cache_stats(cls):
+        """
+        Возвращает счетчики попаданий и промахов обоих уровней кэша
+        """
+        with cls._cache_lock:
+            stats = {
+                'memory': {'hits': cls._cache_hits, 'misses': cls._cache_misses, 'size': len(cls._cache)}
+            }
+        if cls._persistent_cache is not None:
+            stats['persistent'] = cls._persistent_cache.stats()
+        return stats
+
+    @classmethod
+    def _get_cached(cls, text, source_lang, target_lang):
+        """
+        Ищет перевод сначала в памяти, затем в постоянном кэше
         """
         cache_key = f"{source_lang}:{target_lang}:{text}"
-        
-        # Проверяем кэш
-        if cache_key in cls._cache:
-            return cls._cache[cache_key]
-        
-        # Если перевода нет в кэше, запрашиваем API
+        with cls._cache_lock:
+            translated_text = cls._cache.get(cache_key)
+            if translated_text is not None:
+                cls._cache_hits += 1
+                return translated_text
+            cls._cache_misses += 1
+
+        if cls._persistent_cache is not None:
+            translated_text = cls._persistent_cache.get(text, source_lang, target_lang)
+            if translated_text is not None:
+                # Поднимаем запись в кэш первого уровня
+                with cls._cache_lock:
+                    cls._cache[cache_key] = translated_text
+                return translated_text
+        return None
+
+    @classmethod
+    def _set_cached(cls, text, source_lang, target_lang, translated_text):
+        """
+        Сохраняет перевод в оба уровня кэша
+        """
+        with cls._cache_lock:
+            cls._cache[f"{source_lang}:{target_lang}:{text}"] = translated_text
+        if cls._persistent_cache is not None:
+            try:
+                cls._persistent_cache.set(text, source_lang, target_lang, translated_text)
+            except Exception as e:
+                logger.warning(f"Failed to store translation in persistent cache: {e}")
+
+    @staticmethod
+    def _is_quota_exceeded(data):
+        """
+        Проверяет, сообщает ли ответ MyMemory об исчерпании квоты
+        """
+        if not isinstance(data, dict):
+            return False
+        translated_text = (data.get('responseData') or {}).get('translatedText') or ''
+        return str(data.get('responseStatus')) == '429' or translated_text.startswith(QUOTA_WARNING_MARKER)
+
+    @staticmethod
+    def _request_translation(text, source_lang, target_lang):
+        """
+        Выполняет один запрос к MyMemory API
+
+        :return: Переведенный текст или None в случае ошибки
+        """
         try:
             params = {
                 'q': text,
@@ -31,19 +115,139 @@ class TranslatorService:
             if MYMEMORY_EMAIL:
                 params['de'] = MYMEMORY_EMAIL
                 
-            response = requests.get(MYMEMORY_API_URL, params=params)
+            response = http_client.get(MYMEMORY_API_URL, params=params, breaker=MYMEMORY_BREAKER)
             response.raise_for_status()
             
             data = response.json()
+            if TranslatorService._is_quota_exceeded(data):
+                # Квота исчерпана - до конца паузы предохранителя запросы не отправляются
+                get_breaker(MYMEMORY_BREAKER).trip("исчерпана квота MyMemory")
+                return None
             if data and 'responseData' in data and 'translatedText' in data['responseData']:
-                translated_text = data['responseData']['translatedText']
-                # Сохраняем в кэш
-                cls._cache[cache_key] = translated_text
-                return translated_text
+                return data['responseData']['translatedText']
             else:
                 logger.error(f"Unexpected response format from MyMemory API: {data}")
-                return text
+                return None
                 
         except requests.RequestException as e:
             logger.error(f"Error translating text using MyMemory API: {e}")
-            return text 
\ No newline at end of file
+            return None
+
+    @classmethod
+    @tracing.traced('mymemory.translate')
+    def translate(cls, text, source_lang='en', target_lang='ru'):
+        """
+        Переводит текст с использованием MyMemory API
+        """
+        # Проверяем кэш
+        cached = cls._get_cached(text, source_lang, target_lang)
+        if cached is not None:
+            return cached
+        
+        # Если перевода нет в кэше, запрашиваем API
+        translated_text = cls._request_translation(text, source_lang, target_lang)
+        if translated_text is None:
+            return text
+        # Сохраняем в кэш
+        cls._set_cached(text, source_lang, target_lang, translated_text)
+        return translated_text
+
+    @classmethod
+    def _pack_batches(cls, texts, max_length=None):
+        """
+        Упаковывает тексты в пакеты, длина каждого из которых (с разделителями)
+        не превышает ограничение MyMemory на размер запроса
+
+        :param texts: Список уникальных текстов
+        :param max_length: Максимальный размер запроса в байтах UTF-8
+        :return: Список пакетов (списков текстов)
+        """
+        max_length = max_length or MYMEMORY_MAX_QUERY_LENGTH
+        separator_length = len(cls.BATCH_SEPARATOR.encode('utf-8'))
+        batches = []
+        current, current_length = [], 0
+
+        for text in texts:
+            length = len(text.encode('utf-8'))
+            # Текст с разделителем внутри нельзя надежно разделить обратно
+            if cls.BATCH_SEPARATOR in text or length >= max_length:
+                batches.append([text])
+                continue
+            added_length = length + (separator_length if current else 0)
+            if current and current_length + added_length > max_length:
+                batches.append(current)
+                current, current_length = [], 0
+                added_length = length
+            current.append(text)
+            current_length += added_length
+
+        if current:
+            batches.append(current)
+        return batches
+
+    @classmethod
+    def _translate_batch(cls, batch, source_lang, target_lang):
+        """
+        Переводит пакет текстов одним запросом и разделяет результат обратно
+
+        :return: Список переводов в порядке текстов пакета
+        """
+        if len(batch) == 1:
+            return [cls.translate(batch[0], source_lang, target_lang)]
+
+        joined = cls._request_translation(cls.BATCH_SEPARATOR.join(batch), source_lang, target_lang)
+        if joined is not None:
+            parts = joined.split(cls.BATCH_SEPARATOR)
+            if len(parts) == len(batch):
+                translations = [part.strip() for part in parts]
+                for text, translated_text in zip(batch, translations):
+                    cls._set_cached(text, source_lang, target_lang, translated_text)
+                return translations
+            logger.warning(
+                f"Batch translation returned {len(parts)} parts for {len(batch)} texts, "
+                f"translating them one by one"
+            )
+
+        return [cls.translate(text, source_lang, target_lang) for text in batch]
+
+    @classmethod
+    def translate_many(cls, texts, source_lang='en', target_lang='ru'):
+        """
+        Переводит список текстов минимальным числом запросов к MyMemory API
+
+        Тексты дедуплицируются и сверяются с кэшем, промахи упаковываются в пакеты
+        по ограничению длины запроса, пакеты отправляются параллельно.
+
+        :param texts: Список текстов для перевода
+        :return: Список переводов в порядке входных текстов
+        """
+        results = [None] * len(texts)
+        pending = {}
+
+        for index, text in enumerate(texts):
+            if text in pending:
+                pending[text].append(index)
+                continue
+            cached = cls._get_cached(text, source_lang, target_lang)
+            if cached is not None:
+                results[index] = cached
+            else:
+                pending[text] = [index]
+
+        if not pending:
+            return results
+
+        batches = cls._pack_batches(list(pending))
+        logger.info(f"Translating {len(pending)} texts in {len(batches)} requests")
+
+        workers = max(1, min(TRANSLATION_MAX_CONCURRENCY, len(batches)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            translated_batches = executor.map(
+                lambda batch: cls._translate_batch(batch, source_lang, target_lang), batches
+            )
+            for batch, translations in zip(batches, translated_batches):
+                for text, translated_text in zip(batch, translations):
+                    for index in pending[text]:
+                        results[index] = translated_text
+
+        return results
\ No newline at end of file
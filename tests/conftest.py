@@ -14,4 +14,20 @@ def mock_response():
 @pytest.fixture
 def mock_requests(mocker):
     """Mock для библиотеки requests"""
-    return mocker.patch('requests.post') 
\ No newline at end of file
+    return mocker.patch('requests.post') 
+
+@pytest.fixture(autouse=True)
+def reset_circuit_breakers():
+    """Замыкаем предохранители, чтобы ошибки одного теста не влияли на другие"""
+    from utils.circuit_breaker import reset_breakers
+    reset_breakers()
+    yield
+    reset_breakers()
+
+@pytest.fixture(autouse=True)
+def reset_model_router():
+    """Сбрасываем статистику моделей GigaChat, чтобы порядок моделей не зависел от других тестов"""
+    from services.image_service import model_router
+    model_router.reset()
+    yield
+    model_router.reset()
\ No newline at end of file
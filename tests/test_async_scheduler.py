@@ -0,0 +1,143 @@
+"""
+Tests for AsyncScheduler
+"""
+import asyncio
+import threading
+import time
+import pytest
+import pytz
+from datetime import datetime
+from unittest.mock import Mock, patch
+from utils.async_scheduler import AsyncScheduler
+from utils.schedule_engine import ScheduleEngine
+
+
+def make_engine(delay=0.05):
+    """Движок с одним слотом, наступающим через delay секунд (часы идут в реальном темпе)"""
+    slot_time = pytz.timezone('Europe/Moscow').localize(datetime(2024, 1, 1, 9, 0)).timestamp()
+    offset = slot_time - delay - time.monotonic()
+    engine = ScheduleEngine('Europe/Moscow', clock=lambda: time.monotonic() + offset)
+    engine.add('monday', '09:00')
+    engine.rebuild()
+    return engine
+
+
+class TestAsyncScheduler:
+    """Тесты планировщика на цикле asyncio"""
+
+    @pytest.fixture
+    def scheduler(self):
+        """Фикстура - планировщик без заданий из конфигурации"""
+        with patch('utils.scheduler.SCHEDULE', {}):
+            scheduler = AsyncScheduler(Mock())
+        yield scheduler
+        scheduler.stop()
+
+    def test_runs_coroutine_job(self, scheduler):
+        """Тест запуска задания-корутины в срок"""
+        calls = []
+
+        async def job():
+            calls.append(threading.current_thread())
+            scheduler.stop()
+
+        scheduler._engine = make_engine()
+        scheduler.job_function = job
+
+        started = time.monotonic()
+        scheduler.start()
+
+        assert calls == [threading.main_thread()]
+        assert time.monotonic() - started < 1
+        assert scheduler.get_lateness_stats()['count'] == 1
+
+    def test_runs_sync_job_in_executor_thread(self, scheduler):
+        """Тест выполнения обычной функции в потоке исполнителя цикла"""
+        calls = []
+
+        def job():
+            calls.append(threading.current_thread())
+            scheduler.stop()
+
+        scheduler._engine = make_engine()
+        scheduler.job_function = job
+        scheduler.start()
+
+        assert len(calls) == 1
+        assert calls[0] is not threading.main_thread()
+
+    def test_sync_job_sees_its_slot(self, scheduler):
+        """Тест передачи слота расписания обычной функции в поток исполнителя цикла"""
+        from utils.scheduler import current_slot
+        seen = []
+
+        def job():
+            seen.append(current_slot())
+            scheduler.stop()
+
+        scheduler._engine = make_engine()
+        scheduler.job_function = job
+        scheduler.start()
+
+        nominal = pytz.timezone('Europe/Moscow').localize(datetime(2024, 1, 1, 9, 0)).timestamp()
+        assert seen == [('monday 09:00', nominal)]
+
+    def test_stop_from_other_thread_waits_for_running_job(self, scheduler):
+        """Тест остановки из другого потока с ожиданием выполняемого задания"""
+        finished = []
+
+        async def job():
+            threading.Timer(0.01, scheduler.stop).start()
+            await asyncio.sleep(0.1)
+            finished.append(True)
+
+        scheduler._engine = make_engine()
+        scheduler.job_function = job
+        scheduler.start()
+
+        assert finished == [True]
+
+    def test_job_timeout_cancels_sync_job(self, scheduler):
+        """Тест отмены обычной функции по таймауту: этап после таймаута не выполняется"""
+        from utils.job_executor import check_cancelled
+        release = threading.Event()
+        stages = []
+
+        def job():
+            release.wait(1)
+            check_cancelled()
+            stages.append('send')
+
+        def on_timeout():
+            scheduler.stop()
+            release.set()
+
+        scheduler._engine = make_engine()
+        scheduler.job_function = job
+        scheduler.timeout = 0.05
+        threading.Timer(0.3, on_timeout).start()
+        scheduler.start()
+        time.sleep(0.1)
+
+        assert scheduler.timeouts == 1
+        assert stages == []
+
+    def test_stop_does_not_wait_for_hung_job_forever(self, scheduler):
+        """Тест ограничения ожидания зависшего задания при остановке"""
+        release = threading.Event()
+
+        def job():
+            threading.Timer(0.01, scheduler.stop).start()
+            release.wait(5)
+
+        scheduler._engine = make_engine()
+        scheduler.job_function = job
+        scheduler.timeout = None
+        scheduler.stop_timeout = 0.1
+
+        started = time.monotonic()
+        try:
+            scheduler.start()
+            assert time.monotonic() - started < 2
+        finally:
+            release.set()
\ No newline at end of file
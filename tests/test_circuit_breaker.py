@@ -0,0 +1,103 @@
+"""
+Tests for CircuitBreaker
+"""
+import pytest
+import requests
+from unittest.mock import Mock
+from utils.circuit_breaker import (
+    CircuitBreaker, CircuitOpenError, get_breaker, get_breaker_states, reset_breakers,
+    STATE_CLOSED, STATE_OPEN, STATE_HALF_OPEN
+)
+
+
+class TestCircuitBreaker:
+    """Тесты для предохранителя внешнего сервиса"""
+    
+    @pytest.fixture
+    def clock(self):
+        """Фикстура - управляемые монотонные часы"""
+        return Mock(return_value=0.0)
+    
+    @pytest.fixture
+    def breaker(self, clock):
+        """Фикстура - предохранитель с окном из 4 запросов и паузой 60 секунд"""
+        return CircuitBreaker('test', failure_rate=0.5, window_size=4, min_calls=4, cooldown=60, clock=clock)
+    
+    def test_opens_on_failure_rate(self, breaker):
+        """Тест размыкания при достижении доли ошибок в окне"""
+        breaker.record_success()
+        breaker.record_failure()
+        breaker.record_success()
+        assert breaker.state == STATE_CLOSED
+        
+        breaker.record_failure()
+        
+        assert breaker.state == STATE_OPEN
+        assert not breaker.allow_request()
+        assert breaker.rejected == 1
+    
+    def test_needs_min_calls(self, breaker):
+        """Тест того, что единичные ошибки не размыкают предохранитель"""
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_failure()
+        
+        assert breaker.state == STATE_CLOSED
+        assert breaker.allow_request()
+    
+    def test_failures_leave_window(self, breaker):
+        """Тест учета только последних запросов"""
+        breaker.record_failure()
+        for _ in range(4):
+            breaker.record_success()
+        breaker.record_failure()
+        
+        assert breaker.state == STATE_CLOSED
+    
+    def test_half_open_trial_success_closes(self, breaker, clock):
+        """Тест замыкания после успешного пробного запроса"""
+        breaker.trip("тест")
+        clock.return_value = 60.0
+        
+        assert breaker.state == STATE_HALF_OPEN
+        assert breaker.allow_request()
+        # Пока идет пробный запрос, остальные отклоняются
+        assert not breaker.allow_request()
+        breaker.record_success()
+        
+        assert breaker.state == STATE_CLOSED
+        assert breaker.allow_request()
+    
+    def test_half_open_trial_failure_reopens(self, breaker, clock):
+        """Тест повторного размыкания после неудачного пробного запроса"""
+        breaker.trip("тест")
+        clock.return_value = 60.0
+        assert breaker.allow_request()
+        
+        breaker.record_failure()
+        
+        assert breaker.state == STATE_OPEN
+        clock.return_value = 119.0
+        assert not breaker.allow_request()
+        clock.return_value = 120.0
+        assert breaker.allow_request()
+    
+    def test_before_request_raises_request_exception(self, breaker):
+        """Тест отказа без обращения к сети исключением, которое обрабатывают сервисы"""
+        breaker.trip("тест")
+        
+        with pytest.raises(CircuitOpenError) as exc_info:
+            breaker.before_request()
+        assert isinstance(exc_info.value, requests.RequestException)
+    
+    def test_registry(self):
+        """Тест общего реестра предохранителей"""
+        breaker = get_breaker('registry-test')
+        assert get_breaker('registry-test') is breaker
+        
+        breaker.trip("тест")
+        assert get_breaker_states()['registry-test']['state'] == STATE_OPEN
+        
+        reset_breakers()
+        assert get_breaker('registry-test') is not breaker
+        assert get_breaker('registry-test').state == STATE_CLOSED
\ No newline at end of file
@@ -36,12 +36,20 @@ class TestConfigIntegration:
         Проверяем, что ImageService корректно работает с параметрами конфигурации,
         такими как GIGACHAT_API_KEY, GIGACHAT_MODEL и VERIFY_SSL
         """
+        # Запросы проходят через общий HTTP-клиент, поэтому подменяем его сессию,
+        # а GET и POST направляем в отдельные моки
+        mock_post = Mock()
+        mock_get = Mock()
+        mock_session = Mock()
+        mock_session.request.side_effect = lambda method, url, **kwargs: (
+            mock_post if method == 'POST' else mock_get
+        )(url, **kwargs)
+        
         # Патчим только конфигурационные параметры
-        with patch('services.image_service.GIGACHAT_API_KEY', 'test_api_key'), \
+        with patch('services.token_manager.GIGACHAT_API_KEY', 'test_api_key'), \
              patch('services.image_service.GIGACHAT_MODEL', 'GigaChat-Test'), \
-             patch('services.image_service.VERIFY_SSL', False), \
-             patch('services.image_service.requests.post') as mock_post, \
-             patch('services.image_service.requests.get') as mock_get:
+             patch('services.http_client.VERIFY_SSL', False), \
+             patch('services.http_client.get_session', return_value=mock_session):
             
             # Настраиваем моки для запросов
             mock_post_response = Mock()
@@ -83,7 +91,7 @@ class TestConfigIntegration:
             
             mock_get_response = Mock()
             mock_get_response.status_code = 200
-            mock_get_response.content = b"test_image_data"
+            mock_get_response.iter_content.return_value = [b"test_image_data"]
             mock_get.return_value = mock_get_response
             
             with patch.object(ImageService, 'extract_image_uuid', return_value="test-uuid"), \
@@ -135,7 +143,8 @@ class TestConfigIntegration:
             bot = TelegramBot()
             
             # Проверяем, что бот был инициализирован с правильными параметрами
-            mock_bot_class.assert_called_once_with(token='test_bot_token')
+            mock_bot_class.assert_called_once()
+            assert mock_bot_class.call_args[1]['token'] == 'test_bot_token'
             assert bot.channel_id == '@test_channel'
             assert bot.group_id == '@test_group'
             
@@ -0,0 +1,56 @@
+"""
+Tests for ConfigWatcher
+"""
+import os
+from unittest.mock import Mock
+from utils.config_watcher import ConfigWatcher
+
+
+class TestConfigWatcher:
+    """Тесты для отслеживания изменений файла конфигурации"""
+    
+    def test_no_change(self, tmp_path):
+        """Тест отсутствия вызова обработчика без изменения файла"""
+        env_file = tmp_path / '.env'
+        env_file.write_text("SCHEDULE=monday:0900\n")
+        callback = Mock()
+        
+        watcher = ConfigWatcher(env_file, callback)
+        
+        assert watcher.check() is False
+        callback.assert_not_called()
+    
+    def test_change_triggers_callback_once(self, tmp_path):
+        """Тест однократного вызова обработчика после изменения файла"""
+        env_file = tmp_path / '.env'
+        env_file.write_text("SCHEDULE=monday:0900\n")
+        callback = Mock()
+        watcher = ConfigWatcher(env_file, callback)
+        
+        env_file.write_text("SCHEDULE=monday:0900,1800\n")
+        os.utime(env_file, ns=(0, 10 ** 18))
+        
+        assert watcher.check() is True
+        assert watcher.check() is False
+        callback.assert_called_once()
+    
+    def test_created_file_triggers_callback(self, tmp_path):
+        """Тест вызова обработчика при появлении файла"""
+        env_file = tmp_path / '.env'
+        callback = Mock()
+        watcher = ConfigWatcher(env_file, callback)
+        
+        env_file.write_text("TIMEZONE=Europe/Berlin\n")
+        
+        assert watcher.check() is True
+        callback.assert_called_once()
+    
+    def test_callback_error_is_logged(self, tmp_path):
+        """Тест обработки ошибки в обработчике"""
+        env_file = tmp_path / '.env'
+        callback = Mock(side_effect=RuntimeError("boom"))
+        watcher = ConfigWatcher(env_file, callback)
+        
+        env_file.write_text("TIMEZONE=Europe/Berlin\n")
+        
+        assert watcher.check() is True
\ No newline at end of file
@@ -0,0 +1,71 @@
+"""
+Tests for deadline
+"""
+import pytest
+from unittest.mock import Mock
+from utils import deadline
+
+
+class TestDeadline:
+    """Тесты для крайнего срока публикации"""
+    
+    @pytest.fixture(autouse=True)
+    def reset_stats(self):
+        """Сбрасываем счетчики деградаций до и после каждого теста"""
+        deadline.reset_degradation_stats()
+        yield
+        deadline.reset_degradation_stats()
+    
+    @pytest.fixture
+    def clock(self):
+        """Фикстура - управляемые монотонные часы"""
+        return Mock(return_value=100.0)
+    
+    def test_no_deadline_outside_scope(self):
+        """Тест отсутствия ограничений вне крайнего срока"""
+        assert deadline.remaining() is None
+        assert deadline.has_budget(10 ** 6)
+        assert deadline.cap_timeout((5, 30)) == (5, 30)
+    
+    def test_zero_budget_disables_deadline(self):
+        """Тест отключения крайнего срока нулевым бюджетом"""
+        with deadline.deadline_scope(0) as current:
+            assert current is None
+            assert deadline.remaining() is None
+    
+    def test_cap_timeout_by_remaining_time(self, clock):
+        """Тест ограничения таймаутов запроса оставшимся временем"""
+        with deadline.deadline_scope(60, clock=clock):
+            clock.return_value = 140.0
+            assert deadline.remaining() == pytest.approx(20)
+            assert deadline.cap_timeout((5, 180)) == (5, 20.0)
+            assert deadline.cap_timeout(30) == 20.0
+            assert deadline.cap_timeout(None) == 20.0
+            assert deadline.has_budget(20)
+            assert not deadline.has_budget(21)
+        
+        assert deadline.remaining() is None
+    
+    def test_cap_timeout_after_deadline(self, clock):
+        """Тест отказа от запроса после истечения времени"""
+        with deadline.deadline_scope(60, clock=clock) as current:
+            clock.return_value = 160.0
+            assert current.expired
+            with pytest.raises(deadline.DeadlineExceeded):
+                deadline.cap_timeout((5, 30))
+    
+    def test_deadline_exceeded_is_request_timeout(self):
+        """Тест обработки истечения времени как обычного таймаута requests"""
+        import requests
+        assert issubclass(deadline.DeadlineExceeded, requests.RequestException)
+    
+    def test_record_degradation(self):
+        """Тест подсчета деградаций по этапам"""
+        deadline.record_degradation(deadline.DEGRADE_SKIP_IMAGE)
+        deadline.record_degradation(deadline.DEGRADE_SKIP_IMAGE)
+        deadline.record_degradation(deadline.DEGRADE_SKIP_TRANSLATION)
+        
+        assert deadline.get_degradation_stats() == {
+            deadline.DEGRADE_SKIP_IMAGE: 2,
+            deadline.DEGRADE_SKIP_TRANSLATION: 1
+        }
\ No newline at end of file
@@ -239,4 +239,64 @@ class TestEnvConfigIntegration:
                 assert isinstance(day, str)  # День - это строка
                 assert isinstance(times, list)  # Время - это список
                 assert len(times) > 0  # В каждом дне есть хотя бы одно время
-                assert all(':' in t for t in times)  # Все элементы времени имеют формат с двоеточием 
\ No newline at end of file
+                assert all(':' in t for t in times)  # Все элементы времени имеют формат с двоеточием 
+    
+    def test_reload_config_applies_new_schedule(self, tmp_path):
+        """
+        Тест перезагрузки расписания и часового пояса из измененного .env файла
+        """
+        import config.config as config_module
+        
+        env_file = tmp_path / '.env'
+        env_file.write_text("SCHEDULE=monday:0900;friday:1800\nTIMEZONE=Europe/Berlin\n")
+        
+        with patch.object(config_module, 'env_path', env_file), \
+             patch.object(config_module, '_PROCESS_ENV_KEYS', set()), \
+             patch.object(config_module, 'SCHEDULE', config_module.SCHEDULE), \
+             patch.object(config_module, 'TIMEZONE', config_module.TIMEZONE), \
+             patch.object(config_module, 'ENABLE_IMAGE_GENERATION', config_module.ENABLE_IMAGE_GENERATION), \
+             patch.dict(os.environ):
+            settings = config_module.reload_config()
+            
+            assert settings['SCHEDULE'] == {'monday': ['09:00'], 'friday': ['18:00']}
+            assert settings['TIMEZONE'] == 'Europe/Berlin'
+            assert config_module.SCHEDULE == settings['SCHEDULE']
+            assert config_module.TIMEZONE == 'Europe/Berlin'
+    
+    def test_reload_config_keeps_process_environment(self, tmp_path):
+        """
+        Тест приоритета переменных окружения процесса над .env файлом при перезагрузке
+        """
+        import config.config as config_module
+        
+        env_file = tmp_path / '.env'
+        env_file.write_text("TIMEZONE=Europe/Berlin\n")
+        
+        with patch.object(config_module, 'env_path', env_file), \
+             patch.object(config_module, '_PROCESS_ENV_KEYS', {'TIMEZONE'}), \
+             patch.object(config_module, 'SCHEDULE', config_module.SCHEDULE), \
+             patch.object(config_module, 'TIMEZONE', config_module.TIMEZONE), \
+             patch.object(config_module, 'ENABLE_IMAGE_GENERATION', config_module.ENABLE_IMAGE_GENERATION), \
+             patch.dict(os.environ, {'TIMEZONE': 'Asia/Tokyo'}):
+            settings = config_module.reload_config()
+            
+            assert settings['TIMEZONE'] == 'Asia/Tokyo'
+    
+    def test_reload_config_rejects_invalid_values(self, tmp_path):
+        """
+        Тест отказа от некорректной конфигурации с сохранением текущей
+        """
+        import config.config as config_module
+        
+        env_file = tmp_path / '.env'
+        env_file.write_text("TIMEZONE=Mars/Olympus\n")
+        
+        with patch.object(config_module, 'env_path', env_file), \
+             patch.object(config_module, '_PROCESS_ENV_KEYS', set()), \
+             patch.object(config_module, 'TIMEZONE', 'Europe/Moscow'), \
+             patch.dict(os.environ):
+            with pytest.raises(ValueError):
+                config_module.reload_config()
+            
+            assert config_module.TIMEZONE == 'Europe/Moscow'
+            assert os.environ.get('TIMEZONE') != 'Mars/Olympus'
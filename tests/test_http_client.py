@@ -0,0 +1,104 @@
+"""
+Tests for http_client
+"""
+import pytest
+from unittest.mock import Mock, patch
+from services import http_client
+
+
+class TestHttpClient:
+    """Тесты для общего HTTP-клиента"""
+    
+    @pytest.fixture(autouse=True)
+    def reset_session(self):
+        """Сбрасываем общую сессию до и после каждого теста"""
+        http_client.close_session()
+        yield
+        http_client.close_session()
+    
+    def test_get_session_is_shared(self):
+        """Тест того, что все вызовы используют одну сессию"""
+        session = http_client.get_session()
+        assert http_client.get_session() is session
+    
+    def test_create_session_pool_settings(self):
+        """Тест настройки пулов соединений и проверки SSL в сессии"""
+        with patch('services.http_client.VERIFY_SSL', False):
+            session = http_client.create_session(pool_connections=3, pool_maxsize=7)
+        
+        adapter = session.get_adapter('https://gigachat.devices.sberbank.ru')
+        assert adapter._pool_connections == 3
+        assert adapter._pool_maxsize == 7
+        assert session.get_adapter('http://example.com') is adapter
+        assert session.verify is False
+    
+    def test_request_defaults(self):
+        """Тест таймаутов и проверки SSL по умолчанию"""
+        mock_session = Mock()
+        with patch('services.http_client.get_session', return_value=mock_session), \
+             patch('services.http_client.VERIFY_SSL', False), \
+             patch('services.http_client.HTTP_CONNECT_TIMEOUT', 2), \
+             patch('services.http_client.HTTP_READ_TIMEOUT', 9):
+            http_client.get('https://zenquotes.io/api/random', params={'a': 1})
+            
+            mock_session.request.assert_called_once_with(
+                'GET', 'https://zenquotes.io/api/random', params={'a': 1}, timeout=(2, 9), verify=False
+            )
+    
+    def test_request_explicit_timeout(self):
+        """Тест переопределения таймаута для отдельного запроса"""
+        mock_session = Mock()
+        with patch('services.http_client.get_session', return_value=mock_session):
+            http_client.post('https://example.com', json={}, timeout=(1, 120))
+            
+            args, kwargs = mock_session.request.call_args
+            assert args == ('POST', 'https://example.com')
+            assert kwargs['timeout'] == (1, 120)
+    
+    def test_request_timeout_capped_by_deadline(self):
+        """Тест ограничения таймаута запроса оставшимся временем публикации"""
+        from utils.deadline import deadline_scope, DeadlineExceeded
+        clock = Mock(return_value=0.0)
+        mock_session = Mock()
+        with patch('services.http_client.get_session', return_value=mock_session), \
+             deadline_scope(10, clock=clock):
+            http_client.post('https://example.com', timeout=(5, 180))
+            assert mock_session.request.call_args[1]['timeout'] == (5, 10.0)
+            
+            clock.return_value = 10.0
+            with pytest.raises(DeadlineExceeded):
+                http_client.get('https://example.com')
+            assert mock_session.request.call_count == 1
+    
+    def test_request_open_breaker_skips_network(self):
+        """Тест отказа от запроса без обращения к сети при разомкнутом предохранителе"""
+        from utils.circuit_breaker import get_breaker, CircuitOpenError
+        mock_session = Mock()
+        mock_session.request.return_value = Mock(status_code=503)
+        with patch('services.http_client.get_session', return_value=mock_session):
+            breaker = get_breaker('http-test')
+            breaker.min_calls = 2
+            for _ in range(2):
+                http_client.get('https://example.com', breaker='http-test')
+            
+            with pytest.raises(CircuitOpenError):
+                http_client.get('https://example.com', breaker='http-test')
+            assert mock_session.request.call_count == 2
+    
+    def test_request_counts_upstream_errors(self):
+        """Тест учета ошибок внешних сервисов по сервису и коду ответа"""
+        import requests
+        from utils.metrics import UPSTREAM_ERRORS
+        mock_session = Mock()
+        mock_session.request.return_value = Mock(status_code=429)
+        before = UPSTREAM_ERRORS.get(service='metrics-test', status='429')
+        with patch('services.http_client.get_session', return_value=mock_session):
+            http_client.get('https://example.com', breaker='metrics-test')
+            http_client.get('https://example.com/ok', breaker='metrics-test')
+            
+            mock_session.request.side_effect = requests.ConnectTimeout("timeout")
+            with pytest.raises(requests.ConnectTimeout):
+                http_client.get('https://example.com')
+        
+        assert UPSTREAM_ERRORS.get(service='metrics-test', status='429') == before + 2
+        assert UPSTREAM_ERRORS.get(service='example.com', status='ConnectTimeout') >= 1
\ No newline at end of file
@@ -1,6 +1,7 @@
 """
 Tests for ImageService
 """
+import os
 import pytest
 from unittest.mock import Mock, patch
 import json
@@ -8,11 +9,10 @@ import requests
 from services.image_service import ImageService, GIGACHAT_MODEL
 
 @pytest.fixture(autouse=True)
-def reset_globals():
-    """Сбрасываем глобальные переменные перед каждым тестом"""
+def reset_token():
+    """Сбрасываем токен доступа перед каждым тестом"""
     import services.image_service as image_service
-    image_service.access_token = None
-    image_service.token_expiry = None
+    image_service.token_manager.reset()
 
 @pytest.fixture
 def mock_response():
@@ -40,7 +40,7 @@ class TestImageService:
 
     def test_get_access_token_success(self, mock_response):
         """Тест успешного получения токена доступа"""
-        with patch('services.image_service.requests.post') as mock_post:
+        with patch('services.image_service.http_client.post') as mock_post:
             # Мокаем успешный ответ
             mock_response.json.return_value = {"access_token": "test-token"}
             mock_post.return_value = mock_response
@@ -51,7 +51,7 @@ class TestImageService:
 
     def test_get_access_token_failure(self, mock_response):
         """Тест неудачного получения токена доступа"""
-        with patch('services.image_service.requests.post') as mock_post:
+        with patch('services.image_service.http_client.post') as mock_post:
             # Мокаем ответ без токена
             mock_response.json.return_value = {"error": "unauthorized"}
             mock_post.return_value = mock_response
@@ -66,8 +66,8 @@ class TestImageService:
     ])
     def test_generate_image_retry_logic(self, mock_response, model, should_retry):
         """Тест логики повторных попыток генерации изображения"""
-        with patch('services.image_service.requests.post') as mock_post, \
-             patch('services.image_service.requests.get') as mock_get, \
+        with patch('services.image_service.http_client.post') as mock_post, \
+             patch('services.image_service.http_client.get') as mock_get, \
              patch('services.image_service.GIGACHAT_MODEL', model):
             
             # Мокаем ответ для получения токена
@@ -90,7 +90,7 @@ class TestImageService:
             # Мокаем запрос изображения
             image_response = Mock()
             image_response.status_code = 200
-            image_response.content = b"fake_image_data"
+            image_response.iter_content.return_value = [b"fake_image_data"]
             mock_get.return_value = image_response
             
             result = ImageService.generate_image_from_quote("test quote")
@@ -101,8 +101,8 @@ class TestImageService:
 
     def test_generate_image_function_call_response(self, mock_response):
         """Тест обработки ответа в формате function_call"""
-        with patch('services.image_service.requests.post') as mock_post, \
-             patch('services.image_service.requests.get') as mock_get:
+        with patch('services.image_service.http_client.post') as mock_post, \
+             patch('services.image_service.http_client.get') as mock_get:
             # Мокаем ответ для получения токена
             token_response = Mock()
             token_response.json.return_value = {"access_token": "test-token"}
@@ -126,7 +126,7 @@ class TestImageService:
             # Мокаем запрос изображения
             image_response = Mock()
             image_response.status_code = 200
-            image_response.content = b"fake_image_data"
+            image_response.iter_content.return_value = [b"fake_image_data"]
             mock_get.return_value = image_response
             
             result = ImageService.generate_image_from_quote("test quote")
@@ -136,8 +136,8 @@ class TestImageService:
 
     def test_generate_image_invalid_response(self, mock_response):
         """Тест обработки некорректного ответа API"""
-        with patch('services.image_service.requests.post') as mock_post, \
-             patch('services.image_service.requests.get') as mock_get:
+        with patch('services.image_service.http_client.post') as mock_post, \
+             patch('services.image_service.http_client.get') as mock_get:
             # Мокаем ответ для получения токена
             token_response = Mock()
             token_response.json.return_value = {"access_token": "test-token"}
@@ -155,8 +155,8 @@ class TestImageService:
     def test_generate_image_api_error(self):
         """Тест обработки ошибки API"""
         # Мокируем только нужные методы requests
-        with patch('services.image_service.requests.post') as mock_post, \
-             patch('services.image_service.requests.get') as mock_get:
+        with patch('services.image_service.http_client.post') as mock_post, \
+             patch('services.image_service.http_client.get') as mock_get:
 
             # Мокаем ответ для получения токена
             token_response = Mock()
@@ -178,4 +178,119 @@ class TestImageService:
             # Проверяем, что mock_get не был вызван, так как ошибка произошла раньше
             mock_get.assert_not_called()
             # Проверяем, что mock_post был вызван дважды
-            assert mock_post.call_count == 2 
\ No newline at end of file
+            assert mock_post.call_count == 2
+    
+    def test_generate_image_skips_retry_without_time(self, mock_response):
+        """Тест отказа от повторной генерации моделью GigaChat при нехватке времени"""
+        from utils import deadline
+        deadline.reset_degradation_stats()
+        with patch('services.image_service.http_client.post') as mock_post, \
+             patch('services.image_service.http_client.get') as mock_get, \
+             patch('services.image_service.token_manager.get_token', return_value="test-token"), \
+             patch('services.image_service.GIGACHAT_MODEL', 'GigaChat-Max'), \
+             patch('services.image_service.has_budget', return_value=False):
+            
+            response = Mock()
+            response.json.return_value = {"choices": [{"message": {"content": "Не удалось нарисовать"}}]}
+            mock_post.return_value = response
+            
+            result = ImageService.generate_image_from_quote("test quote")
+            
+            assert result is None
+            mock_post.assert_called_once()
+            mock_get.assert_not_called()
+            assert deadline.get_degradation_stats() == {deadline.DEGRADE_SKIP_IMAGE_RETRY: 1}
+        deadline.reset_degradation_stats()
+    
+    def test_generate_image_uses_best_model_first(self):
+        """Тест обращения сначала к модели с лучшей оценкой маршрутизатора"""
+        from services.image_service import model_router
+        model_router.record('GigaChat-Max', 60.0, False)
+        model_router.record('GigaChat', 10.0, True)
+        
+        with patch('services.image_service.http_client.post') as mock_post, \
+             patch('services.image_service.http_client.get') as mock_get, \
+             patch('services.image_service.token_manager.get_token', return_value="test-token"), \
+             patch('services.image_service.GIGACHAT_MODEL', 'GigaChat-Max'), \
+             patch('services.image_service.GIGACHAT_HEDGE_DELAY_SECONDS', 0):
+            
+            response = Mock()
+            response.json.return_value = {"choices": [{"message": {"content": '<img src="best-uuid" fuse="true"/>'}}]}
+            mock_post.return_value = response
+            mock_get.return_value = Mock(status_code=200, **{"iter_content.return_value": [b"fake_image_data"]})
+            
+            result = ImageService.generate_image_from_quote("test quote")
+            
+            assert result is not None
+            mock_post.assert_called_once()
+            assert mock_post.call_args[1]['json']['model'] == 'GigaChat'
+        os.unlink(result)
+    
+    def test_generate_image_hedged_request(self):
+        """Тест параллельного запроса к запасной модели, если основная не ответила вовремя"""
+        import threading
+        release_primary = threading.Event()
+        
+        def post(url, json, **kwargs):
+            response = Mock()
+            if json['model'] == 'GigaChat-Max':
+                release_primary.wait(5)
+                response.json.return_value = {"choices": [{"message": {"content": '<img src="slow-uuid" fuse="true"/>'}}]}
+            else:
+                response.json.return_value = {"choices": [{"message": {"content": '<img src="fast-uuid" fuse="true"/>'}}]}
+            return response
+        
+        with patch('services.image_service.http_client.post', side_effect=post) as mock_post, \
+             patch('services.image_service.http_client.get') as mock_get, \
+             patch('services.image_service.token_manager.get_token', return_value="test-token"), \
+             patch('services.image_service.GIGACHAT_MODEL', 'GigaChat-Max'), \
+             patch('services.image_service.GIGACHAT_FALLBACK_MODEL', 'GigaChat'), \
+             patch('services.image_service.GIGACHAT_HEDGE_DELAY_SECONDS', 0.05):
+            mock_get.return_value = Mock(status_code=200, **{"iter_content.return_value": [b"fake_image_data"]})
+            
+            try:
+                result = ImageService.generate_image_from_quote("test quote")
+            finally:
+                release_primary.set()
+            
+            assert result is not None
+            assert "fast-uuid" in mock_get.call_args[0][0]
+            assert [c[1]['json']['model'] for c in mock_post.call_args_list] == ['GigaChat-Max', 'GigaChat']
+        os.unlink(result)
+    
+    def test_generate_image_streams_download(self):
+        """Тест потоковой загрузки изображения по частям"""
+        with patch('services.image_service.http_client.post') as mock_post, \
+             patch('services.image_service.http_client.get') as mock_get, \
+             patch('services.image_service.token_manager.get_token', return_value="test-token"):
+            response = Mock()
+            response.json.return_value = {"choices": [{"message": {"content": '<img src="stream-uuid" fuse="true"/>'}}]}
+            mock_post.return_value = response
+            image_response = Mock(status_code=200)
+            image_response.iter_content.return_value = iter([b"part1-", b"", b"part2"])
+            mock_get.return_value = image_response
+            
+            result = ImageService.generate_image_from_quote("test quote")
+            
+            assert mock_get.call_args[1]['stream'] is True
+            image_response.close.assert_called_once()
+            with open(result, 'rb') as f:
+                assert f.read() == b"part1-part2"
+        os.unlink(result)
+    
+    def test_generate_image_empty_stream(self):
+        """Тест обработки пустого ответа без создания файла"""
+        with patch('services.image_service.http_client.post') as mock_post, \
+             patch('services.image_service.http_client.get') as mock_get, \
+             patch('services.image_service.token_manager.get_token', return_value="test-token"), \
+             patch('services.image_service.tempfile.NamedTemporaryFile') as mock_tempfile:
+            response = Mock()
+            response.json.return_value = {"choices": [{"message": {"content": '<img src="empty-uuid" fuse="true"/>'}}]}
+            mock_post.return_value = response
+            image_response = Mock(status_code=200)
+            image_response.iter_content.return_value = iter([])
+            mock_get.return_value = image_response
+            
+            assert ImageService.generate_image_from_quote("test quote") is None
+            mock_tempfile.assert_not_called()
+            image_response.close.assert_called_once()
\ No newline at end of file
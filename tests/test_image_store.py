@@ -0,0 +1,148 @@
+"""
+Tests for ImageStore
+"""
+import os
+import pytest
+from unittest.mock import Mock, patch
+from services.image_store import ImageStore
+from services.image_service import ImageService
+
+
+class TestImageStore:
+    """Тесты для хранилища изображений"""
+    
+    @pytest.fixture
+    def store(self, tmp_path):
+        """Фикстура - хранилище во временном каталоге"""
+        return ImageStore(str(tmp_path / "images"), max_bytes=10)
+    
+    def test_make_key_depends_on_all_parts(self):
+        """Тест зависимости ключа от текста, модели и системного промпта"""
+        key = ImageStore.make_key("text", "GigaChat", "prompt")
+        assert key == ImageStore.make_key("text", "GigaChat", "prompt")
+        assert key != ImageStore.make_key("text", "GigaChat-Max", "prompt")
+        assert key != ImageStore.make_key("text", "GigaChat", "other prompt")
+        assert key != ImageStore.make_key("other text", "GigaChat", "prompt")
+    
+    def test_put_and_acquire(self, store):
+        """Тест сохранения и повторного получения изображения"""
+        key = store.make_key("text", "model", "prompt")
+        assert store.acquire(key) is None
+        
+        path = store.put(key, [b"abc", b"def"])
+        assert os.path.exists(path)
+        with open(path, 'rb') as f:
+            assert f.read() == b"abcdef"
+        
+        assert store.acquire(key) == path
+        assert store.owns(path)
+        assert store.hits == 1
+        assert store.misses == 1
+    
+    def test_eviction_skips_referenced_images(self, store):
+        """Тест вытеснения только изображений без активных ссылок"""
+        first = store.put("first", b"12345")
+        second = store.put("second", b"12345")
+        # Превышение лимита, но все изображения используются
+        third = store.put("third", b"12345")
+        assert len(store) == 3
+        
+        store.release(first)
+        assert not os.path.exists(first)
+        assert os.path.exists(second)
+        assert os.path.exists(third)
+        assert len(store) == 2
+    
+    def test_index_survives_restart(self, tmp_path):
+        """Тест загрузки индекса после перезапуска"""
+        directory = str(tmp_path / "images")
+        store = ImageStore(directory)
+        path = store.put("key", b"image")
+        store.set_metadata(path, 'file_id', 'telegram-file-id')
+        
+        restored = ImageStore(directory)
+        assert restored.acquire("key") == path
+        assert restored.get_metadata(path, 'file_id') == 'telegram-file-id'
+    
+    def test_foreign_path_not_owned(self, store, tmp_path):
+        """Тест того, что посторонние файлы не считаются частью хранилища"""
+        foreign = tmp_path / "foreign.jpg"
+        foreign.write_bytes(b"data")
+        
+        assert not store.owns(str(foreign))
+        store.release(str(foreign))
+        assert foreign.exists()
+
+
+class TestImageServiceStore:
+    """Тесты использования хранилища в ImageService"""
+    
+    @pytest.fixture
+    def store(self, tmp_path):
+        """Подключаем хранилище на время теста"""
+        store = ImageStore(str(tmp_path / "images"))
+        ImageService.set_image_store(store)
+        yield store
+        ImageService.set_image_store(None)
+    
+    def test_generate_image_cache_hit_skips_api(self, store):
+        """Тест выдачи изображения из хранилища без обращения к GigaChat"""
+        from services.image_service import GIGACHAT_MODEL, SYSTEM_MESSAGE
+        path = store.put(store.make_key("test quote", GIGACHAT_MODEL, SYSTEM_MESSAGE), b"cached")
+        store.release(path)
+        
+        with patch('services.image_service.http_client.post') as mock_post, \
+             patch('services.image_service.http_client.get') as mock_get:
+            assert ImageService.generate_image_from_quote("test quote") == path
+            
+            mock_post.assert_not_called()
+            mock_get.assert_not_called()
+    
+    def test_generate_image_saved_to_store(self, store):
+        """Тест сохранения сгенерированного изображения в хранилище"""
+        with patch.object(ImageService, 'get_access_token', return_value="token"), \
+             patch('services.image_service.http_client.post') as mock_post, \
+             patch('services.image_service.http_client.get') as mock_get:
+            generation_response = Mock()
+            generation_response.json.return_value = {
+                "choices": [{"message": {"content": '<img src="store-uuid" fuse="true"/>'}}]
+            }
+            mock_post.return_value = generation_response
+            
+            image_response = Mock()
+            image_response.status_code = 200
+            image_response.iter_content.return_value = [b"generated"]
+            mock_get.return_value = image_response
+            
+            path = ImageService.generate_image_from_quote("new quote")
+            
+            assert store.owns(path)
+            with open(path, 'rb') as f:
+                assert f.read() == b"generated"    
+    def test_generate_image_stored_under_producing_model(self, store):
+        """Тест сохранения изображения под ключом модели, которая его создала (запасной)"""
+        from services.image_service import SYSTEM_MESSAGE, model_router
+        model_router.reset()
+        
+        def post(url, json, **kwargs):
+            response = Mock()
+            content = '<img src="fallback-uuid" fuse="true"/>' if json['model'] == 'GigaChat' else "Не удалось нарисовать"
+            response.json.return_value = {"choices": [{"message": {"content": content}}]}
+            return response
+        
+        with patch.object(ImageService, 'get_access_token', return_value="token"), \
+             patch('services.image_service.http_client.post', side_effect=post) as mock_post, \
+             patch('services.image_service.http_client.get') as mock_get, \
+             patch('services.image_service.GIGACHAT_MODEL', 'GigaChat-Max'), \
+             patch('services.image_service.GIGACHAT_FALLBACK_MODEL', 'GigaChat'), \
+             patch('services.image_service.GIGACHAT_HEDGE_DELAY_SECONDS', 0):
+            mock_get.return_value = Mock(status_code=200, **{"iter_content.return_value": [b"fallback"]})
+            
+            path = ImageService.generate_image_from_quote("fallback quote")
+            store.release(path)
+            
+            assert path == store._path(store.make_key("fallback quote", 'GigaChat', SYSTEM_MESSAGE))
+            # Повторная генерация берет изображение запасной модели из хранилища
+            assert ImageService.generate_image_from_quote("fallback quote") == path
+            assert mock_post.call_count == 2
+        model_router.reset()
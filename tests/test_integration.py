@@ -53,7 +53,7 @@ class TestQuoteToTelegramFlow:
         Проверяем, что полученная от QuotesService цитата может быть корректно
         обработана TranslatorService для перевода
         """
-        with patch('services.translator_service.requests.get') as mock_get:
+        with patch('services.translator_service.http_client.get') as mock_get:
             # Настраиваем мок для сервиса перевода
             mock_response = Mock()
             mock_response.json.return_value = {
@@ -95,8 +95,8 @@ class TestQuoteToTelegramFlow:
         
         with patch.object(ImageService, 'get_access_token', return_value="mock_token"), \
              patch.object(ImageService, 'extract_image_uuid', return_value="mock-uuid"), \
-             patch('services.image_service.requests.post') as mock_post, \
-             patch('services.image_service.requests.get') as mock_get, \
+             patch('services.image_service.http_client.post') as mock_post, \
+             patch('services.image_service.http_client.get') as mock_get, \
              patch('tempfile.NamedTemporaryFile') as mock_tempfile:
             
             # Настраиваем мок для временного файла
@@ -116,7 +116,7 @@ class TestQuoteToTelegramFlow:
             # Настраиваем мок для получения содержимого изображения
             mock_get_response = Mock()
             mock_get_response.status_code = 200
-            mock_get_response.content = b"Test image content"
+            mock_get_response.iter_content.return_value = [b"Test image content"]
             mock_get.return_value = mock_get_response
             
             # Генерируем изображение на основе переведенного текста
@@ -155,7 +155,7 @@ class TestQuoteToTelegramFlow:
             result = bot.send_quote(quote=mock_quote, translated_text=translated_text, image_path=temp_image_file)
             
             # Проверяем результаты
-            assert result is True
+            assert result
             
             # Проверяем, что вызов send_photo был выполнен с правильными параметрами
             # Так как у нас настроены и канал, и группа, метод должен быть вызван дважды
@@ -191,6 +191,7 @@ class TestQuoteToTelegramFlow:
         with patch.object(QuotesService, 'get_random_quote', return_value=mock_quote), \
              patch.object(TranslatorService, 'translate', return_value=translated_text), \
              patch.object(ImageService, 'generate_image_from_quote', return_value=temp_image_file), \
+             patch.object(ImageService, 'get_access_token', return_value='test_token'), \
              patch('bot.telegram_bot.telegram.Bot') as mock_bot_class, \
              patch('main.ENABLE_IMAGE_GENERATION', True), \
              patch('bot.telegram_bot.TELEGRAM_CHANNEL_ID', 'test_channel'), \
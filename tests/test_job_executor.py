@@ -0,0 +1,127 @@
+"""
+Tests for JobExecutor
+"""
+import threading
+import time
+import pytest
+from unittest.mock import Mock
+from utils.job_executor import JobExecutor, check_cancelled
+
+
+def wait_until(condition, timeout=2):
+    """Ожидает выполнения условия, проверяя его каждые 10 мс"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("Условие не выполнено за отведенное время")
+        time.sleep(0.01)
+
+
+class TestJobExecutor:
+    """Тесты для исполнителя заданий планировщика"""
+    
+    @pytest.fixture
+    def release(self):
+        """Фикстура - событие, до которого блокируются задания"""
+        event = threading.Event()
+        yield event
+        event.set()
+    
+    def test_runs_job_in_pool(self):
+        """Тест выполнения задания в отдельном потоке"""
+        executor = JobExecutor(timeout=None)
+        caller = threading.current_thread()
+        threads = []
+        
+        run = executor.submit(lambda: threads.append(threading.current_thread()), key='monday 09:00')
+        wait_until(lambda: run.status == 'ok')
+        
+        assert threads and threads[0] is not caller
+        assert run.queue_wait >= 0
+        assert run.duration >= 0
+        executor.shutdown()
+    
+    def test_skip_policy_drops_overlapping_job(self, release):
+        """Тест пропуска задания, пока предыдущее еще выполняется"""
+        executor = JobExecutor(overlap_policy='skip', timeout=None)
+        second_job = Mock()
+        
+        executor.submit(release.wait)
+        assert executor.submit(second_job) is None
+        
+        release.set()
+        wait_until(lambda: executor.active_count == 0)
+        second_job.assert_not_called()
+        assert executor.skipped == 1
+        assert executor.get_stats()['statuses'] == {'skipped': 1, 'ok': 1}
+    
+    def test_queue_policy_runs_job_after_previous(self, release):
+        """Тест очереди: задание запускается после завершения предыдущего"""
+        executor = JobExecutor(overlap_policy='queue', timeout=None)
+        second_job = Mock()
+        
+        executor.submit(release.wait)
+        second_run = executor.submit(second_job)
+        assert executor.pending_count == 1
+        time.sleep(0.05)
+        second_job.assert_not_called()
+        
+        release.set()
+        wait_until(lambda: second_run.status == 'ok')
+        second_job.assert_called_once()
+        # Время ожидания в очереди учитывается отдельно от выполнения
+        assert second_run.queue_wait >= 0.05
+    
+    def test_allows_n_concurrent_jobs(self, release):
+        """Тест одновременного выполнения нескольких заданий"""
+        executor = JobExecutor(overlap_policy='skip', max_concurrent=2, timeout=None)
+        
+        first = executor.submit(release.wait)
+        second = executor.submit(release.wait)
+        third = executor.submit(Mock())
+        
+        assert first is not None and second is not None
+        assert third is None
+        assert executor.active_count == 2
+        release.set()
+    
+    def test_timeout_cancels_job_and_frees_slot(self, release):
+        """Тест отмены зависшего задания по таймауту"""
+        executor = JobExecutor(overlap_policy='skip', timeout=0.05)
+        later_stage = Mock()
+        
+        def stuck_job():
+            release.wait()
+            check_cancelled()
+            later_stage()
+        
+        run = executor.submit(stuck_job)
+        wait_until(lambda: run.status == 'timeout')
+        
+        # Место освобождено до завершения зависшего этапа
+        assert executor.active_count == 0
+        assert executor.timeouts == 1
+        assert executor.submit(Mock()) is not None
+        
+        # После возврата зависшего этапа следующий этап не выполняется
+        release.set()
+        time.sleep(0.05)
+        later_stage.assert_not_called()
+    
+    def test_job_error_is_recorded(self):
+        """Тест записи ошибки задания в статистику"""
+        executor = JobExecutor(timeout=None)
+        
+        run = executor.submit(Mock(side_effect=RuntimeError("boom")))
+        wait_until(lambda: run.status == 'error')
+        
+        assert executor.get_stats()['statuses'] == {'error': 1}
+    
+    def test_check_cancelled_outside_job(self):
+        """Тест проверки отмены вне задания"""
+        check_cancelled()
+    
+    def test_unknown_policy(self):
+        """Тест неизвестной политики перекрытия"""
+        with pytest.raises(ValueError):
+            JobExecutor(overlap_policy='drop')
\ No newline at end of file
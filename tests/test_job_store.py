@@ -0,0 +1,45 @@
+"""
+Tests for JobStore
+"""
+import pytest
+from utils.job_store import JobStore
+
+
+class TestJobStore:
+    """Тесты для хранилища состояния слотов расписания"""
+    
+    @pytest.fixture
+    def store(self, tmp_path):
+        """Фикстура - хранилище во временном каталоге"""
+        store = JobStore(str(tmp_path / "jobs.sqlite3"))
+        yield store
+        store.close()
+    
+    def test_empty_store(self, store):
+        """Тест загрузки пустого хранилища"""
+        assert store.load() == {}
+    
+    def test_record_and_load(self, store):
+        """Тест сохранения и загрузки времени последнего запуска"""
+        store.record('monday 09:00', 100.0)
+        store.record('tuesday 10:00', 200.0)
+        
+        assert store.load() == {'monday 09:00': 100.0, 'tuesday 10:00': 200.0}
+    
+    def test_earlier_time_does_not_overwrite(self, store):
+        """Тест сохранения только более позднего времени запуска"""
+        store.record('monday 09:00', 200.0)
+        store.record('monday 09:00', 100.0)
+        
+        assert store.load() == {'monday 09:00': 200.0}
+    
+    def test_state_survives_reopen(self, tmp_path):
+        """Тест сохранения состояния после перезапуска"""
+        path = str(tmp_path / "jobs.sqlite3")
+        store = JobStore(path)
+        store.record('monday 09:00', 100.0)
+        store.close()
+        
+        reopened = JobStore(path)
+        assert reopened.load() == {'monday 09:00': 100.0}
+        reopened.close()
\ No newline at end of file
@@ -0,0 +1,92 @@
+"""
+Tests for LeaderElector
+"""
+import pytest
+from unittest.mock import Mock, patch
+from utils.leader_election import LeaderElector
+
+
+class TestLeaderElector:
+    """Тесты для выбора ведущего экземпляра"""
+    
+    @pytest.fixture
+    def lease_path(self, tmp_path):
+        """Фикстура - путь к файлу аренды"""
+        return str(tmp_path / "leader.lease")
+    
+    def make_elector(self, lease_path, node_id):
+        """Создает участника выбора с коротким сроком аренды"""
+        return LeaderElector(lease_path, node_id=node_id, lease_seconds=30, heartbeat_interval=10)
+    
+    def test_first_node_becomes_leader(self, lease_path):
+        """Тест захвата свободной аренды"""
+        elector = self.make_elector(lease_path, 'a')
+        elector.on_elected = Mock()
+        
+        assert elector.try_acquire() is True
+        assert elector.is_leader
+        assert elector.fencing_token == 1
+        assert elector.wait_for_leadership(0)
+        elector.on_elected.assert_called_once_with(1)
+    
+    def test_renewal_keeps_token(self, lease_path):
+        """Тест продления аренды без смены токена ограждения"""
+        elector = self.make_elector(lease_path, 'a')
+        elector.on_elected = Mock()
+        
+        elector.try_acquire()
+        elector.try_acquire()
+        
+        assert elector.fencing_token == 1
+        elector.on_elected.assert_called_once()
+    
+    def test_follower_waits_while_lease_is_valid(self, lease_path):
+        """Тест отказа в захвате действующей аренды"""
+        leader = self.make_elector(lease_path, 'a')
+        follower = self.make_elector(lease_path, 'b')
+        
+        leader.try_acquire()
+        
+        assert follower.try_acquire() is False
+        assert not follower.is_leader
+        assert follower.fencing_token is None
+        assert leader.validate(1) is True
+        assert follower.validate(1) is False
+    
+    def test_takeover_after_expiry_fences_old_leader(self, lease_path):
+        """Тест перехвата истекшей аренды и ограждения прежнего ведущего"""
+        old_leader = self.make_elector(lease_path, 'a')
+        new_leader = self.make_elector(lease_path, 'b')
+        old_leader.on_demoted = Mock()
+        
+        with patch('utils.leader_election.time.time', return_value=1000.0):
+            old_leader.try_acquire()
+        # Прежний ведущий перестал продлевать аренду, и она истекла
+        with patch('utils.leader_election.time.time', return_value=1031.0):
+            assert new_leader.try_acquire() is True
+            assert new_leader.fencing_token == 2
+            
+            # Устаревший ведущий не проходит проверку токена и теряет лидерство
+            assert old_leader.validate(1) is False
+            assert old_leader.try_acquire() is False
+        
+        assert not old_leader.is_leader
+        old_leader.on_demoted.assert_called_once()
+    
+    def test_release_allows_immediate_takeover(self, lease_path):
+        """Тест досрочного освобождения аренды"""
+        leader = self.make_elector(lease_path, 'a')
+        follower = self.make_elector(lease_path, 'b')
+        leader.try_acquire()
+        
+        leader.release()
+        
+        assert not leader.is_leader
+        assert follower.try_acquire() is True
+        assert follower.fencing_token == 2
+    
+    def test_validate_without_token(self, lease_path):
+        """Тест проверки отсутствующего токена"""
+        elector = self.make_elector(lease_path, 'a')
+        
+        assert elector.validate(None) is False
\ No newline at end of file
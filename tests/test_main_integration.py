@@ -9,7 +9,7 @@ import pytest
 import tempfile
 import os
 from unittest.mock import patch, Mock, mock_open
-from main import send_motivational_quote
+from main import send_motivational_quote, _attach_image_later
 from services.quotes_service import Quote
 
 
@@ -52,6 +52,7 @@ class TestMainIntegration:
              patch('main.TranslatorService.translate', return_value=translated_text), \
              patch('main.ImageService.generate_image_from_quote', return_value=temp_image_file), \
              patch('main.TelegramBot') as mock_telegram_bot_class, \
+             patch('main.ImageService.get_access_token', return_value='test_token'), \
              patch('main.ENABLE_IMAGE_GENERATION', True), \
              patch('main.logger') as mock_logger:
             
@@ -123,6 +124,7 @@ class TestMainIntegration:
              patch('main.TranslatorService.translate', return_value=translated_text), \
              patch('main.ImageService.generate_image_from_quote', return_value=None), \
              patch('main.TelegramBot') as mock_telegram_bot_class, \
+             patch('main.ImageService.get_access_token', return_value='test_token'), \
              patch('main.ENABLE_IMAGE_GENERATION', True), \
              patch('main.logger') as mock_logger:
             
@@ -154,6 +156,7 @@ class TestMainIntegration:
              patch('main.TranslatorService.translate', return_value=translated_text), \
              patch('main.ImageService.generate_image_from_quote', return_value=temp_image_file), \
              patch('main.TelegramBot') as mock_telegram_bot_class, \
+             patch('main.ImageService.get_access_token', return_value='test_token'), \
              patch('main.ENABLE_IMAGE_GENERATION', True), \
              patch('main.logger') as mock_logger, \
              patch('os.unlink') as mock_unlink:
@@ -170,4 +173,312 @@ class TestMainIntegration:
             mock_logger.error.assert_called_with("Не удалось отправить цитату")
             
             # Проверяем, что временный файл был удален вручную (т.к. это не произошло в TelegramBot)
-            # mock_unlink.assert_called_with(temp_image_file) 
\ No newline at end of file
+            # mock_unlink.assert_called_with(temp_image_file)
+    
+    def test_reload_settings_updates_scheduler(self):
+        """
+        Тест применения перезагруженной конфигурации к планировщику
+        """
+        from main import reload_settings
+        
+        settings = {
+            'SCHEDULE': {'monday': ['09:00']},
+            'TIMEZONE': 'Europe/Berlin',
+            'ENABLE_IMAGE_GENERATION': False
+        }
+        scheduler = Mock()
+        
+        with patch('main.reload_config', return_value=settings), \
+             patch('main.ENABLE_IMAGE_GENERATION', True), \
+             patch('main.TIMEZONE', 'Europe/Moscow'):
+            import main
+            
+            assert reload_settings(scheduler) is True
+            assert main.ENABLE_IMAGE_GENERATION is False
+            assert main.TIMEZONE == 'Europe/Berlin'
+        
+        scheduler.reload.assert_called_once_with({'monday': ['09:00']}, 'Europe/Berlin')
+    
+    def test_reload_settings_keeps_config_on_error(self):
+        """
+        Тест сохранения текущей конфигурации при ошибке перезагрузки
+        """
+        from main import reload_settings
+        
+        scheduler = Mock()
+        
+        with patch('main.reload_config', side_effect=ValueError("Неизвестный часовой пояс")), \
+             patch('main.logger') as mock_logger:
+            assert reload_settings(scheduler) is False
+        
+        scheduler.reload.assert_not_called()
+        assert mock_logger.error.call_count == 1
+    
+    def test_send_motivational_quote_fenced_off(self, mock_quote, translated_text):
+        """
+        Тест отмены публикации, если экземпляр перестал быть ведущим
+        """
+        with patch('main.QuotesService.get_random_quote', return_value=mock_quote), \
+             patch('main.TranslatorService.translate', return_value=translated_text), \
+             patch('main.TelegramBot') as mock_telegram_bot_class, \
+             patch('main.ENABLE_IMAGE_GENERATION', False):
+            
+            send_motivational_quote(fencing_check=lambda: False)
+            
+            mock_telegram_bot_class.return_value.send_quote.assert_not_called()
+
+    
+    def test_send_motivational_quote_text_first(self, mock_quote, translated_text):
+        """
+        Тест публикации текста до генерации изображения
+        
+        Текст отправляется сразу, изображение генерируется и добавляется в фоновом потоке
+        """
+        with patch('main.QuotesService.get_random_quote', return_value=mock_quote), \
+             patch('main.TranslatorService.translate', return_value=translated_text), \
+             patch('main.ImageService.generate_image_from_quote') as mock_generate, \
+             patch('main.TelegramBot') as mock_telegram_bot_class, \
+             patch('main.threading.Thread') as mock_thread, \
+             patch('main.ENABLE_IMAGE_GENERATION', True), \
+             patch('main.PUBLISH_TEXT_FIRST', True):
+            
+            mock_telegram_bot = mock_telegram_bot_class.return_value
+            mock_telegram_bot.send_quote.return_value = True
+            
+            send_motivational_quote()
+            
+            mock_telegram_bot.send_quote.assert_called_once_with(mock_quote, translated_text)
+            mock_generate.assert_not_called()
+            # Поток генерации выполняется в копии контекста публикации
+            assert mock_thread.call_args[1]['args'][0] is _attach_image_later
+            mock_thread.return_value.start.assert_called_once()
+    
+    def test_attach_thread_keeps_publish_context(self, mock_quote, translated_text):
+        """
+        Тест передачи крайнего срока публикации потоку генерации изображения
+        """
+        import threading
+        from main import publish_text_first
+        from utils import deadline
+        
+        seen = []
+        done = threading.Event()
+        
+        def generate(text):
+            seen.append(deadline.remaining())
+            done.set()
+            return None
+        
+        with patch('main.ImageService.generate_image_from_quote', side_effect=generate), \
+             patch('main.TelegramBot') as mock_telegram_bot_class:
+            mock_telegram_bot_class.return_value.send_quote.return_value.results = []
+            with deadline.deadline_scope(60):
+                publish_text_first(mock_quote, translated_text)
+            assert done.wait(5)
+        
+        assert seen[0] is not None and 0 < seen[0] <= 60
+    
+    def test_attach_image_later(self, mock_quote, translated_text, temp_image_file):
+        """
+        Тест добавления изображения к опубликованному тексту в пределах окна
+        """
+        telegram_bot = Mock()
+        telegram_bot.attach_image.return_value.results = []
+        report = Mock()
+        
+        with patch('main.ImageService.generate_image_from_quote', return_value=temp_image_file):
+            _attach_image_later(telegram_bot, report, mock_quote, translated_text, deadline=float('inf'))
+        
+        telegram_bot.attach_image.assert_called_once_with(report, mock_quote, translated_text, temp_image_file)
+    
+    def test_attach_image_later_after_window(self, mock_quote, translated_text, temp_image_file):
+        """
+        Тест отказа от изображения, готового после окончания окна добавления
+        """
+        telegram_bot = Mock()
+        
+        with patch('main.ImageService.generate_image_from_quote', return_value=temp_image_file):
+            _attach_image_later(telegram_bot, Mock(), mock_quote, translated_text, deadline=0)
+        
+        telegram_bot.attach_image.assert_not_called()
+        assert not os.path.exists(temp_image_file)
+    
+    def test_send_motivational_quote_degrades_without_time(self, mock_quote):
+        """
+        Тест упрощения публикации, когда времени не хватает на перевод и изображение
+        """
+        from utils import deadline
+        deadline.reset_degradation_stats()
+        with patch('main.QuotesService.get_random_quote', return_value=mock_quote), \
+             patch('main.TranslatorService.translate') as mock_translate, \
+             patch('main.ImageService.generate_image_from_quote') as mock_generate, \
+             patch('main.TelegramBot') as mock_telegram_bot_class, \
+             patch('main.ENABLE_IMAGE_GENERATION', True), \
+             patch('main.PUBLISH_DEADLINE_SECONDS', 10), \
+             patch('main.DEADLINE_IMAGE_MIN_SECONDS', 30), \
+             patch('main.DEADLINE_TRANSLATION_MIN_SECONDS', 30):
+            
+            send_motivational_quote()
+            
+            mock_translate.assert_not_called()
+            mock_generate.assert_not_called()
+            mock_telegram_bot_class.return_value.send_quote.assert_called_once_with(mock_quote, None, None)
+            assert deadline.get_degradation_stats() == {
+                deadline.DEGRADE_SKIP_TRANSLATION: 1,
+                deadline.DEGRADE_SKIP_IMAGE: 1
+            }
+        deadline.reset_degradation_stats()
+    
+    def test_send_motivational_quote_from_post_buffer(self, mock_quote, translated_text, temp_image_file):
+        """
+        Тест публикации подготовленного поста без обращения к внешним сервисам
+        """
+        from services.post_buffer import PreparedPost
+        post_buffer = Mock()
+        post_buffer.pop.return_value = PreparedPost(mock_quote, translated_text, temp_image_file)
+        
+        with patch('main._post_buffer', post_buffer), \
+             patch('main.QuotesService.get_random_quote') as mock_get_quote, \
+             patch('main.TranslatorService.translate') as mock_translate, \
+             patch('main.ImageService.generate_image_from_quote') as mock_generate, \
+             patch('main.TelegramBot') as mock_telegram_bot_class, \
+             patch('main.ENABLE_IMAGE_GENERATION', True):
+            
+            send_motivational_quote()
+            
+            mock_get_quote.assert_not_called()
+            mock_translate.assert_not_called()
+            mock_generate.assert_not_called()
+            mock_telegram_bot_class.return_value.send_quote.assert_called_once_with(
+                mock_quote, translated_text, temp_image_file
+            )
+    
+    def test_buffered_post_id_is_outbox_key(self, mock_quote, translated_text):
+        """
+        Тест постановки подготовленного поста в очередь отправки под его идентификатором
+        """
+        from services.post_buffer import PreparedPost
+        post = PreparedPost(mock_quote, translated_text, None)
+        post_buffer = Mock()
+        post_buffer.pop.return_value = post
+        outbox = Mock()
+        
+        with patch('main._post_buffer', post_buffer), \
+             patch('main._outbox', outbox), \
+             patch('main.TelegramBot'):
+            send_motivational_quote()
+        
+        assert outbox.enqueue.call_args[0][0] == post.post_id
+    
+    def test_outbox_key_is_slot_and_nominal_time(self, mock_quote, translated_text):
+        """
+        Тест ключа идемпотентности очереди отправки: повторный запуск того же слота
+        не ставит в очередь второй пост
+        """
+        from main import publish_post
+        from utils.scheduler import _current_slot
+        
+        outbox = Mock()
+        with patch('main._outbox', outbox), \
+             patch('main.TelegramBot') as mock_telegram_bot_class:
+            mock_telegram_bot_class.return_value.destinations = ['@a']
+            token = _current_slot.set(('monday 09:00', 1704088800.0))
+            try:
+                publish_post(mock_quote, translated_text, None)
+                publish_post(mock_quote, translated_text, None)
+            finally:
+                _current_slot.reset(token)
+        
+        keys = [call[0][0] for call in outbox.enqueue.call_args_list]
+        assert keys == ['monday 09:00@1704088800'] * 2
+    
+    def test_duplicate_slot_releases_image(self, mock_quote, translated_text, tmp_path):
+        """
+        Тест освобождения изображения повторного запуска слота, пост которого
+        уже есть в очереди отправки
+        """
+        from main import publish_post
+        from services.outbox import Outbox
+        from utils.scheduler import _current_slot
+        
+        outbox = Outbox(str(tmp_path / "outbox.db"), artifacts_dir=str(tmp_path / "artifacts"))
+        images = []
+        for name in ('first.jpg', 'second.jpg'):
+            image_path = tmp_path / name
+            image_path.write_bytes(b"image")
+            images.append(str(image_path))
+        try:
+            with patch('main._outbox', outbox), \
+                 patch('main.ImageService.get_image_store', return_value=None), \
+                 patch('services.outbox.ImageService.get_image_store', return_value=None), \
+                 patch('main.TelegramBot') as mock_telegram_bot_class:
+                mock_telegram_bot_class.return_value.destinations = ['@a']
+                mock_telegram_bot_class.return_value.format_message.return_value = translated_text
+                token = _current_slot.set(('monday 09:00', 1704088800.0))
+                try:
+                    for image_path in images:
+                        publish_post(mock_quote, translated_text, image_path)
+                finally:
+                    _current_slot.reset(token)
+        finally:
+            outbox.close()
+        
+        assert os.listdir(tmp_path / "artifacts") == ['monday 09:00@1704088800.jpg']
+        assert not os.path.exists(images[1])
+    
+    def test_leader_terms_rebuild_scheduler_on_new_token(self, tmp_path):
+        """
+        Тест смены планировщика при повторном лидерстве с новым токеном и остановки
+        планировщика в режиме опроса при потере лидерства
+        """
+        import threading
+        import time
+        from main import run_leader_terms
+        from utils.leader_election import LeaderElector
+        
+        lease_path = str(tmp_path / "leader.lease")
+        node_a = LeaderElector(lease_path, node_id='a', lease_seconds=30, heartbeat_interval=0.05)
+        node_b = LeaderElector(lease_path, node_id='b', lease_seconds=30, heartbeat_interval=0.05)
+        current = {'scheduler': None}
+        shutdown = threading.Event()
+        
+        def wait_until(predicate):
+            deadline = time.monotonic() + 5
+            while not predicate() and time.monotonic() < deadline:
+                time.sleep(0.01)
+            return predicate()
+        
+        with patch('main.SCHEDULE', {}), \
+             patch('utils.scheduler.SCHEDULE', {}), \
+             patch('main.SCHEDULER_EVENT_DRIVEN', False), \
+             patch('main.ASYNC_MODE', False), \
+             patch('main._post_buffer', None), \
+             patch('utils.leader_election.time.time') as mock_time:
+            mock_time.return_value = 1000.0
+            node_a.try_acquire()
+            thread = threading.Thread(target=run_leader_terms, args=(node_a, None, None, current, shutdown))
+            thread.start()
+            try:
+                assert wait_until(lambda: current['scheduler'] is not None)
+                first = current['scheduler']
+                
+                # Пока процесс стоял на паузе, аренду забрал и освободил другой экземпляр
+                mock_time.return_value = 1031.0
+                node_b.try_acquire()
+                node_b.release()
+                node_a.try_acquire()
+                assert node_a.fencing_token == 3
+                assert wait_until(lambda: current['scheduler'] not in (None, first))
+                
+                # Потеря лидерства останавливает планировщик, новый не создается
+                mock_time.return_value = 1100.0
+                node_b.try_acquire()
+                node_a.try_acquire()
+                assert wait_until(lambda: current['scheduler'] is None)
+            finally:
+                shutdown.set()
+                if current['scheduler'] is not None:
+                    current['scheduler'].stop()
+                thread.join(timeout=5)
+            
+            assert not thread.is_alive()
\ No newline at end of file
@@ -0,0 +1,88 @@
+"""
+Tests for metrics
+"""
+import urllib.error
+import urllib.request
+import pytest
+from utils import metrics
+from utils.metrics import Counter, Histogram, MetricsServer
+
+
+class TestMetrics:
+    """Тесты для метрик и HTTP-сервера /metrics"""
+
+    @pytest.fixture(autouse=True)
+    def reset_metrics(self):
+        """Сбрасываем метрики, сборщики и проверки состояния"""
+        metrics.reset()
+        yield
+        metrics.reset()
+
+    def test_histogram_buckets(self):
+        """Тест распределения наблюдений по накопительным корзинам"""
+        histogram = Histogram('test_seconds', 'Test', labels=('stage',), buckets=(1, 5))
+        histogram.observe(0.5, stage='quote')
+        histogram.observe(1, stage='quote')
+        histogram.observe(7, stage='quote')
+
+        lines = histogram.collect()
+        assert 'test_seconds_bucket{stage="quote",le="1"} 2' in lines
+        assert 'test_seconds_bucket{stage="quote",le="5"} 2' in lines
+        assert 'test_seconds_bucket{stage="quote",le="+Inf"} 3' in lines
+        assert 'test_seconds_sum{stage="quote"} 8.5' in lines
+        assert 'test_seconds_count{stage="quote"} 3' in lines
+
+    def test_counter_labels(self):
+        """Тест счетчика с метками"""
+        counter = Counter('test_total', 'Test', labels=('service', 'status'))
+        counter.inc(service='zenquotes', status=429)
+        counter.inc(service='zenquotes', status=429)
+
+        assert counter.get(service='zenquotes', status=429) == 2
+        assert 'test_total{service="zenquotes",status="429"} 2' in counter.collect()
+
+    def test_timed_records_stage_latency(self):
+        """Тест записи длительности этапа декоратором"""
+        @metrics.timed('quote')
+        def fetch():
+            return "quote"
+
+        assert fetch() == "quote"
+        assert metrics.STAGE_LATENCY.get_count(stage='quote') == 1
+
+    def test_render_with_collectors(self):
+        """Тест вывода показателей сборщиков, пропуская пустые значения"""
+        metrics.register_collector(lambda: [
+            ('test_cache_hit_ratio', 'Test', 0.75, {'cache': 'translation'}),
+            ('test_next_run', 'Test', None, {})
+        ])
+        metrics.register_collector(lambda: 1 / 0)
+
+        text = metrics.render()
+        assert '# TYPE test_cache_hit_ratio gauge' in text
+        assert 'test_cache_hit_ratio{cache="translation"} 0.75' in text
+        assert 'test_next_run' not in text
+        assert '# TYPE motiveminder_stage_duration_seconds histogram' in text
+
+    def test_server_endpoints(self):
+        """Тест эндпоинтов /metrics и /healthz встроенного сервера"""
+        healthy = {'value': True}
+        metrics.register_health_check('running', lambda: healthy['value'])
+        metrics.PUBLISH_LAG.observe(0.2)
+        server = MetricsServer(host='127.0.0.1', port=0)
+        assert server.start()
+        try:
+            base_url = f"http://127.0.0.1:{server.port}"
+            with urllib.request.urlopen(f"{base_url}/metrics", timeout=5) as response:
+                assert response.status == 200
+                assert 'motiveminder_publish_lag_seconds_count 1' in response.read().decode('utf-8')
+
+            with urllib.request.urlopen(f"{base_url}/healthz", timeout=5) as response:
+                assert response.status == 200
+
+            healthy['value'] = False
+            with pytest.raises(urllib.error.HTTPError) as error:
+                urllib.request.urlopen(f"{base_url}/healthz", timeout=5)
+            assert error.value.code == 503
+        finally:
+            server.stop()
\ No newline at end of file
@@ -0,0 +1,54 @@
+"""
+Tests for ModelRouter
+"""
+import pytest
+from services.model_router import ModelRouter
+
+
+class TestModelRouter:
+    """Тесты для маршрутизатора моделей GigaChat"""
+    
+    @pytest.fixture
+    def router(self):
+        """Фикстура - маршрутизатор с весом нового наблюдения 0.5"""
+        return ModelRouter(alpha=0.5)
+    
+    def test_config_order_without_observations(self, router):
+        """Тест сохранения порядка из конфигурации, пока наблюдений нет"""
+        assert router.order(['GigaChat-Max', 'GigaChat']) == ['GigaChat-Max', 'GigaChat']
+    
+    def test_unobserved_model_does_not_overtake(self, router):
+        """Тест того, что модель без наблюдений не обгоняет основную модель"""
+        router.record('GigaChat-Max', 10.0, True)
+        
+        assert router.order(['GigaChat-Max', 'GigaChat']) == ['GigaChat-Max', 'GigaChat']
+    
+    def test_faster_model_goes_first(self, router):
+        """Тест выбора модели с меньшей ожидаемой задержкой"""
+        router.record('GigaChat-Max', 30.0, True)
+        router.record('GigaChat', 10.0, True)
+        
+        assert router.order(['GigaChat-Max', 'GigaChat']) == ['GigaChat', 'GigaChat-Max']
+    
+    def test_no_image_rate_penalized(self, router):
+        """Тест понижения модели, которая часто отвечает без изображения"""
+        router.record('GigaChat-Max', 10.0, True)
+        router.record('GigaChat-Max', 10.0, False)
+        router.record('GigaChat', 15.0, True)
+        
+        # 10 / 0.5 = 20 секунд до изображения против 15 у второй модели
+        assert router.score('GigaChat-Max') == pytest.approx(20.0)
+        assert router.order(['GigaChat-Max', 'GigaChat']) == ['GigaChat', 'GigaChat-Max']
+    
+    def test_ewma(self, router):
+        """Тест экспоненциального сглаживания задержки"""
+        router.record('GigaChat', 10.0, True)
+        router.record('GigaChat', 20.0, True)
+        
+        stats = router.get_stats()['GigaChat']
+        assert stats['latency'] == pytest.approx(15.0)
+        assert stats['success'] == pytest.approx(1.0)
+        assert stats['count'] == 2
+        
+        router.reset()
+        assert router.get_stats() == {}
\ No newline at end of file
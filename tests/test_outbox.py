@@ -0,0 +1,182 @@
+"""
+Tests for Outbox
+"""
+import os
+import pytest
+import telegram
+from unittest.mock import Mock, patch
+from services.outbox import Outbox, STATUS_SENT, STATUS_PENDING, STATUS_FAILED
+
+
+class TestOutbox:
+    """Тесты для постоянной очереди отправки в Telegram"""
+    
+    @pytest.fixture
+    def clock(self):
+        """Фикстура - управляемые часы"""
+        clock = Mock(return_value=1000.0)
+        return clock
+    
+    @pytest.fixture
+    def outbox(self, tmp_path, clock):
+        """Фикстура - очередь во временном каталоге"""
+        outbox = Outbox(str(tmp_path / "outbox.sqlite3"), artifacts_dir=str(tmp_path / "outbox"),
+                        max_attempts=3, backoff_base=10, backoff_max=100, clock=clock)
+        yield outbox
+        outbox.close()
+    
+    @pytest.fixture
+    def bot(self):
+        """Фикстура - бот, успешно доставляющий сообщения"""
+        bot = Mock()
+        bot.deliver.side_effect = lambda chat_id, message, image_path, photo_file_id: (1, 'file-id' if image_path else None)
+        return bot
+    
+    def test_enqueue_is_idempotent(self, outbox):
+        """Тест повторной постановки поста с тем же ключом"""
+        assert outbox.enqueue('post-1', 'Текст', None, ['@a', '@b'])
+        assert not outbox.enqueue('post-1', 'Текст', None, ['@a', '@b'])
+        
+        assert outbox.stats() == {STATUS_PENDING: 2}
+    
+    def test_process_due_delivers_to_all_chats(self, outbox, bot):
+        """Тест доставки поста во все чаты"""
+        outbox.enqueue('post-1', 'Текст', None, ['@a', '@b'])
+        
+        assert outbox.process_due(bot) == 2
+        
+        deliveries = outbox.get_deliveries('post-1')
+        assert {chat_id: state[0] for chat_id, state in deliveries.items()} == {'@a': STATUS_SENT, '@b': STATUS_SENT}
+        # Доставленный пост не отправляется повторно
+        assert outbox.process_due(bot) == 0
+        assert bot.deliver.call_count == 2
+    
+    def test_image_uploaded_once_and_reused(self, outbox, bot, tmp_path):
+        """Тест загрузки изображения в первый чат и переиспользования file_id"""
+        image_path = tmp_path / "image.jpg"
+        image_path.write_bytes(b"image")
+        
+        outbox.enqueue('post-1', 'Текст', str(image_path), ['@a', '@b', '@c'])
+        outbox.process_due(bot)
+        
+        # Временное изображение перенесено в каталог очереди и удалено после доставки
+        assert not image_path.exists()
+        stored_path = str(tmp_path / "outbox" / "post-1.jpg")
+        assert not os.path.exists(stored_path)
+        file_ids = [call[0][3] for call in bot.deliver.call_args_list]
+        assert file_ids.count(None) == 1
+        assert file_ids.count('file-id') == 2
+    
+    def test_retry_after_is_respected(self, outbox, clock):
+        """Тест повтора после времени, указанного в RetryAfter"""
+        bot = Mock()
+        bot.deliver.side_effect = [telegram.error.RetryAfter(42), (5, None)]
+        outbox.enqueue('post-1', 'Текст', None, ['@a'])
+        
+        outbox.process_due(bot)
+        
+        assert outbox.get_deliveries('post-1')['@a'][:2] == (STATUS_PENDING, 1)
+        assert outbox.seconds_until_next() == pytest.approx(42)
+        clock.return_value = 1041.0
+        assert outbox.process_due(bot) == 0
+        clock.return_value = 1042.0
+        assert outbox.process_due(bot) == 1
+        assert outbox.get_deliveries('post-1')['@a'][:3] == (STATUS_SENT, 2, 5)
+    
+    def test_exponential_backoff_until_failure(self, outbox, clock):
+        """Тест экспоненциальной задержки и прекращения попыток после max_attempts"""
+        bot = Mock()
+        bot.deliver.side_effect = telegram.error.NetworkError("timeout")
+        outbox.enqueue('post-1', 'Текст', None, ['@a'])
+        
+        with patch('services.outbox.random.uniform', side_effect=lambda low, high: high):
+            outbox.process_due(bot)
+            assert outbox.seconds_until_next() == pytest.approx(10)
+            clock.return_value += 10
+            outbox.process_due(bot)
+            assert outbox.seconds_until_next() == pytest.approx(20)
+            clock.return_value += 20
+            outbox.process_due(bot)
+        
+        status, attempts, _, error = outbox.get_deliveries('post-1')['@a']
+        assert (status, attempts) == (STATUS_FAILED, 3)
+        assert 'timeout' in error
+        assert outbox.seconds_until_next() is None
+    
+    def test_permanent_error_is_not_retried(self, outbox):
+        """Тест прекращения доставки при ошибке, которую повтор не исправит"""
+        bot = Mock()
+        bot.deliver.side_effect = [telegram.error.BadRequest("Chat not found"), (1, None)]
+        outbox.enqueue('post-1', 'Текст', None, ['@a', '@b'])
+        
+        outbox.process_due(bot)
+        
+        deliveries = outbox.get_deliveries('post-1')
+        assert sorted(state[0] for state in deliveries.values()) == [STATUS_FAILED, STATUS_SENT]
+        assert outbox.process_due(bot) == 0
+    
+    def test_pending_posts_survive_restart(self, tmp_path, clock, bot):
+        """Тест доставки поста, поставленного в очередь до перезапуска"""
+        path = str(tmp_path / "outbox.sqlite3")
+        outbox = Outbox(path, clock=clock)
+        outbox.enqueue('post-1', 'Текст', None, ['@a'])
+        outbox.close()
+        
+        outbox = Outbox(path, clock=clock)
+        try:
+            assert outbox.process_due(bot) == 1
+            bot.deliver.assert_called_once_with('@a', 'Текст', None, None)
+        finally:
+            outbox.close()
+    
+    def test_abandoned_claim_is_retried(self, outbox, clock, bot):
+        """Тест повторной доставки, брошенной после падения процесса"""
+        outbox.enqueue('post-1', 'Текст', None, ['@a'])
+        outbox._claim_due(clock())
+        
+        assert outbox.process_due(bot) == 0
+        clock.return_value += 300
+        assert outbox.process_due(bot) == 1    
+    def test_store_image_copied_and_survives_eviction(self, outbox, bot, tmp_path):
+        """Тест копирования изображения из хранилища: после перезапуска хранилище может его вытеснить"""
+        from services.image_service import ImageService
+        from services.image_store import ImageStore
+        store = ImageStore(str(tmp_path / "images"), max_bytes=10)
+        ImageService.set_image_store(store)
+        try:
+            store_path = store.put(store.make_key("quote", "model", "prompt"), b"image")
+            outbox.enqueue('post-1', 'Текст', store_path, ['@a'])
+            
+            # Ссылка хранилища освобождена, пост хранит собственную копию изображения
+            queued_path = str(tmp_path / "outbox" / "post-1.jpg")
+            with open(queued_path, 'rb') as f:
+                assert f.read() == b"image"
+            store.put(store.make_key("other", "model", "prompt"), b"other image")
+            assert not os.path.exists(store_path)
+            
+            outbox.process_due(bot)
+            
+            assert bot.deliver.call_args[0][2] == queued_path
+            assert outbox.get_deliveries('post-1')['@a'][0] == STATUS_SENT
+            assert not os.path.exists(queued_path)
+        finally:
+            ImageService.set_image_store(None)
+    
+    def test_file_id_saved_to_store_image(self, outbox, bot, tmp_path):
+        """Тест сохранения file_id у исходного изображения в хранилище после доставки копии"""
+        from services.image_service import ImageService
+        from services.image_store import ImageStore
+        store = ImageStore(str(tmp_path / "images"))
+        ImageService.set_image_store(store)
+        try:
+            store_path = store.put(store.make_key("quote", "model", "prompt"), b"image")
+            outbox.enqueue('post-1', 'Текст', store_path, ['@a'])
+            outbox.process_due(bot)
+            
+            assert store.get_metadata(store_path, 'file_id') == 'file-id'
+            # Следующий пост с тем же изображением не загружает его повторно
+            outbox.enqueue('post-2', 'Текст', store.acquire(store.make_key("quote", "model", "prompt")), ['@b'])
+            outbox.process_due(bot)
+            assert bot.deliver.call_args[0][3] == 'file-id'
+        finally:
+            ImageService.set_image_store(None)
\ No newline at end of file
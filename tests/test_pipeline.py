@@ -0,0 +1,69 @@
+"""
+Tests for Pipeline
+"""
+import contextvars
+import threading
+import pytest
+from utils.pipeline import Pipeline, PipelineError
+
+
+class TestPipeline:
+    """Тесты для исполнителя конвейера этапов"""
+
+    def test_results_passed_to_dependent_stages(self):
+        """Тест передачи результатов этапов зависимым этапам"""
+        pipeline = Pipeline()
+        pipeline.add('quote', lambda: "Quote")
+        pipeline.add('translate', lambda quote: f"Перевод {quote}", deps=('quote',))
+        pipeline.add('send', lambda quote, translate: (quote, translate), deps=('quote', 'translate'))
+
+        results = pipeline.run()
+
+        assert results['send'] == ("Quote", "Перевод Quote")
+        assert set(pipeline.timings) == {'quote', 'translate', 'send'}
+
+    def test_independent_stages_run_in_parallel(self):
+        """Тест одновременного запуска независимых этапов"""
+        barrier = threading.Barrier(2, timeout=5)
+        pipeline = Pipeline()
+        # Этапы завершатся, только если оба запущены одновременно
+        pipeline.add('quote', lambda: barrier.wait())
+        pipeline.add('token', lambda: barrier.wait())
+        pipeline.add('image', lambda quote, token: "image", deps=('quote', 'token'))
+
+        assert pipeline.run()['image'] == "image"
+
+    def test_stage_error_stops_dependent_stages(self):
+        """Тест проброса ошибки этапа без запуска зависимых этапов"""
+        send_calls = []
+
+        def fail():
+            raise ValueError("quote error")
+
+        pipeline = Pipeline()
+        pipeline.add('quote', fail)
+        pipeline.add('send', lambda quote: send_calls.append(quote), deps=('quote',))
+
+        with pytest.raises(ValueError):
+            pipeline.run()
+        assert send_calls == []
+
+    def test_context_propagated_to_stages(self):
+        """Тест передачи контекстных переменных вызывающего потока этапам"""
+        variable = contextvars.ContextVar('test_variable', default=None)
+        variable.set("value")
+        pipeline = Pipeline()
+        pipeline.add('read', lambda: variable.get())
+
+        assert pipeline.run()['read'] == "value"
+
+    def test_invalid_graph(self):
+        """Тест отклонения неизвестной зависимости и цикла"""
+        pipeline = Pipeline()
+        pipeline.add('send', lambda image: None, deps=('image',))
+        with pytest.raises(PipelineError):
+            pipeline.run()
+
+        pipeline.add('image', lambda send: None, deps=('send',))
+        with pytest.raises(PipelineError):
+            pipeline.run()
\ No newline at end of file
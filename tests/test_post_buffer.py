@@ -0,0 +1,103 @@
+"""
+Tests for PostBuffer
+"""
+import json
+import os
+import pytest
+from services.post_buffer import PostBuffer, PreparedPost, INDEX_FILE
+from services.quotes_service import Quote
+
+
+class TestPostBuffer:
+    """Тесты для буфера подготовленных постов"""
+
+    @pytest.fixture
+    def directory(self, tmp_path):
+        """Фикстура - каталог буфера во временном каталоге"""
+        return str(tmp_path / "posts")
+
+    @pytest.fixture
+    def make_prepare(self, tmp_path):
+        """Фикстура - фабрика функции подготовки постов с временными изображениями"""
+        def factory(texts):
+            texts = iter(texts)
+
+            def prepare():
+                text = next(texts)
+                if text is None:
+                    return None
+                image_path = str(tmp_path / f"{text}.jpg")
+                with open(image_path, 'wb') as f:
+                    f.write(b"image")
+                return PreparedPost(Quote(text, "Author"), f"Перевод {text}", image_path)
+            return prepare
+        return factory
+
+    def test_refill_and_pop(self, directory, make_prepare, tmp_path):
+        """Тест подготовки поста и извлечения его из буфера"""
+        buffer = PostBuffer(directory, make_prepare(["Quote 1"]), max_size=3, low_watermark=1)
+
+        assert buffer.refill_one() is True
+        assert not os.path.exists(tmp_path / "Quote 1.jpg")
+
+        post = buffer.pop()
+        assert post.quote.text == "Quote 1"
+        assert post.translated_text == "Перевод Quote 1"
+        assert os.path.dirname(post.image_path) == directory
+        assert os.path.exists(post.image_path)
+        assert buffer.pop() is None
+
+    def test_prepare_failure_and_duplicate(self, directory, make_prepare, tmp_path):
+        """Тест отказа от неудачно подготовленного поста и повторной цитаты"""
+        buffer = PostBuffer(directory, make_prepare(["Quote 1", None, "Quote 1"]), max_size=3, low_watermark=1)
+
+        assert buffer.refill_one() is True
+        assert buffer.refill_one() is False
+        assert buffer.refill_one() is False
+        assert len(buffer) == 1
+        assert len(os.listdir(directory)) == 2
+
+    def test_buffer_survives_restart(self, directory, make_prepare):
+        """Тест сохранения буфера на диск и загрузки после перезапуска"""
+        buffer = PostBuffer(directory, make_prepare(["Quote 1", "Quote 2", "Quote 3"]), max_size=3, low_watermark=1)
+        for _ in range(3):
+            buffer.refill_one()
+        buffer.pop()
+
+        with open(os.path.join(directory, INDEX_FILE), encoding='utf-8') as f:
+            assert len(json.load(f)) == 2
+
+        restored = PostBuffer(directory, make_prepare([]), max_size=3, low_watermark=1)
+        assert len(restored) == 2
+        post = restored.pop()
+        assert post.quote.text == "Quote 2"
+        assert post.translated_text == "Перевод Quote 2"
+        assert os.path.exists(post.image_path)
+
+    def test_post_without_image_file_is_dropped(self, directory, make_prepare):
+        """Тест отбрасывания сохраненного поста, изображение которого пропало"""
+        buffer = PostBuffer(directory, make_prepare(["Quote 1", "Quote 2"]), max_size=3, low_watermark=1)
+        buffer.refill_one()
+        buffer.refill_one()
+        os.unlink(buffer._posts[0].image_path)
+
+        restored = PostBuffer(directory, make_prepare([]), max_size=3, low_watermark=1)
+        assert len(restored) == 1
+        assert restored.pop().quote.text == "Quote 2"
+
+    def test_background_refill_up_to_max_size(self, directory, make_prepare):
+        """Тест фонового пополнения буфера до максимального размера"""
+        buffer = PostBuffer(
+            directory, make_prepare([f"Quote {i}" for i in range(10)]),
+            max_size=3, low_watermark=1, refill_interval=0, retry_seconds=0
+        )
+        buffer.start()
+        try:
+            for _ in range(100):
+                if len(buffer) == 3:
+                    break
+                buffer._stop_event.wait(0.01)
+        finally:
+            buffer.stop()
+
+        assert len(buffer) == 3
\ No newline at end of file
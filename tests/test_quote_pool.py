@@ -0,0 +1,157 @@
+"""
+Tests for QuotePool
+"""
+import json
+import pytest
+import requests
+from unittest.mock import Mock, patch
+from services.quote_pool import QuotePool
+from services.quotes_service import Quote, QuotesService
+
+
+def make_batch(count, prefix="Quote"):
+    """Формирует ответ пакетного эндпоинта ZenQuotes"""
+    return [{"q": f"{prefix} {i}", "a": f"Author {i}", "h": ""} for i in range(count)]
+
+
+class TestQuotePool:
+    """Тесты для пула цитат"""
+
+    @pytest.fixture
+    def storage_path(self, tmp_path):
+        """Фикстура - путь к файлу пула во временном каталоге"""
+        return str(tmp_path / "quotes_pool.json")
+
+    def test_refill_and_pop(self, storage_path):
+        """Тест пополнения пула и извлечения цитат"""
+        mock_response = Mock()
+        mock_response.json.return_value = make_batch(5)
+
+        with patch('services.quote_pool.http_client.get', return_value=mock_response) as mock_get:
+            pool = QuotePool(storage_path=storage_path, max_size=10, low_watermark=2)
+            assert pool.refill() == 5
+            mock_get.assert_called_once()
+
+        quote = pool.pop()
+        assert isinstance(quote, Quote)
+        assert quote.text == "Quote 0"
+        assert quote.author == "Author 0"
+        assert len(pool) == 4
+
+    def test_refill_respects_max_size_and_deduplicates(self, storage_path):
+        """Тест ограничения размера пула и удаления дубликатов"""
+        mock_response = Mock()
+        mock_response.json.return_value = make_batch(3) + make_batch(10)
+
+        with patch('services.quote_pool.http_client.get', return_value=mock_response):
+            pool = QuotePool(storage_path=storage_path, max_size=5, low_watermark=1)
+            assert pool.refill() == 5
+
+        texts = [pool.pop().text for _ in range(5)]
+        assert len(set(texts)) == 5
+        assert pool.pop() is None
+
+    def test_rate_limit_response_is_ignored(self, storage_path):
+        """Тест отбрасывания служебного ответа о превышении лимита"""
+        mock_response = Mock()
+        mock_response.json.return_value = [
+            {"q": "Too many requests. Obtain an auth key for unlimited access.", "a": "zenquotes.io"}
+        ]
+
+        with patch('services.quote_pool.http_client.get', return_value=mock_response):
+            pool = QuotePool(storage_path=storage_path, max_size=5, low_watermark=1)
+            assert pool.refill() == 0
+            assert len(pool) == 0
+
+    def test_fetch_batch_http_error(self):
+        """Тест обработки ошибки HTTP при пакетной загрузке"""
+        with patch('services.quote_pool.http_client.get', side_effect=requests.RequestException("HTTP Error")):
+            assert QuotePool.fetch_batch() == []
+
+    def test_pool_survives_restart(self, storage_path):
+        """Тест сохранения пула в файл и загрузки после перезапуска"""
+        mock_response = Mock()
+        mock_response.json.return_value = make_batch(3)
+
+        with patch('services.quote_pool.http_client.get', return_value=mock_response):
+            pool = QuotePool(storage_path=storage_path, max_size=10, low_watermark=1)
+            pool.refill()
+        pool.pop()
+
+        with open(storage_path, encoding='utf-8') as f:
+            assert len(json.load(f)) == 2
+
+        restored = QuotePool(storage_path=storage_path, max_size=10, low_watermark=1)
+        assert len(restored) == 2
+        assert restored.pop().text == "Quote 1"
+
+    def test_background_refill_below_low_watermark(self, storage_path):
+        """Тест фонового пополнения пула при опускании ниже нижней границы"""
+        mock_response = Mock()
+        mock_response.json.return_value = make_batch(4)
+
+        with patch('services.quote_pool.http_client.get', return_value=mock_response) as mock_get:
+            pool = QuotePool(storage_path=storage_path, max_size=4, low_watermark=2)
+            pool.start()
+            try:
+                for _ in range(50):
+                    if len(pool) == 4:
+                        break
+                    pool._stop_event.wait(0.01)
+            finally:
+                pool.stop()
+
+            assert len(pool) == 4
+            assert mock_get.call_count >= 1
+
+    def test_on_refill_receives_added_quotes(self, storage_path):
+        """Тест передачи добавленных цитат функции on_refill (ошибка в ней не прерывает пополнение)"""
+        mock_response = Mock()
+        mock_response.json.return_value = make_batch(3)
+        on_refill = Mock(side_effect=RuntimeError("translation failed"))
+
+        with patch('services.quote_pool.http_client.get', return_value=mock_response):
+            pool = QuotePool(storage_path=storage_path, max_size=10, low_watermark=1, on_refill=on_refill)
+            assert pool.refill() == 3
+            # Повторная партия с теми же цитатами ничего не добавляет
+            assert pool.refill() == 0
+
+        on_refill.assert_called_once()
+        assert [quote.text for quote in on_refill.call_args[0][0]] == ["Quote 0", "Quote 1", "Quote 2"]
+
+
+class TestQuotesServicePool:
+    """Тесты получения цитат из пула в QuotesService"""
+
+    @pytest.fixture(autouse=True)
+    def reset_pool(self):
+        """Отключаем пул после каждого теста"""
+        yield
+        QuotesService.set_pool(None)
+
+    def test_get_random_quote_from_pool(self):
+        """Тест выдачи цитаты из пула без сетевого запроса"""
+        pool = Mock()
+        pool.pop.return_value = Quote("Pooled quote", "Pool author")
+        QuotesService.set_pool(pool)
+
+        with patch('services.quotes_service.http_client.get') as mock_get:
+            quote = QuotesService.get_random_quote()
+
+            mock_get.assert_not_called()
+            assert quote.text == "Pooled quote"
+
+    def test_get_random_quote_empty_pool_falls_back_to_api(self):
+        """Тест обращения к API, если пул пуст"""
+        pool = Mock()
+        pool.pop.return_value = None
+        QuotesService.set_pool(pool)
+
+        mock_response = Mock()
+        mock_response.json.return_value = [{"q": "Direct quote", "a": "Direct author"}]
+
+        with patch('services.quotes_service.http_client.get', return_value=mock_response) as mock_get:
+            quote = QuotesService.get_random_quote()
+
+            mock_get.assert_called_once()
+            assert quote.text == "Direct quote"
\ No newline at end of file
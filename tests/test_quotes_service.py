@@ -37,7 +37,7 @@ class TestQuotesService:
         ]
         
         # Патчим метод requests.get, чтобы он возвращал наш мок
-        with patch('services.quotes_service.requests.get', return_value=mock_response) as mock_get:
+        with patch('services.quotes_service.http_client.get', return_value=mock_response) as mock_get:
             quote = QuotesService.get_random_quote()
             
             # Проверяем, что requests.get был вызван с правильным URL
@@ -55,7 +55,7 @@ class TestQuotesService:
         mock_response.json.return_value = []
         
         # Патчим метод requests.get, чтобы он возвращал наш мок
-        with patch('services.quotes_service.requests.get', return_value=mock_response) as mock_get:
+        with patch('services.quotes_service.http_client.get', return_value=mock_response) as mock_get:
             quote = QuotesService.get_random_quote()
             
             # Проверяем, что requests.get был вызван с правильным URL
@@ -73,7 +73,7 @@ class TestQuotesService:
         mock_response.json.return_value = {"error": "Invalid response"}
         
         # Патчим метод requests.get, чтобы он возвращал наш мок
-        with patch('services.quotes_service.requests.get', return_value=mock_response) as mock_get:
+        with patch('services.quotes_service.http_client.get', return_value=mock_response) as mock_get:
             quote = QuotesService.get_random_quote()
             
             # Проверяем, что requests.get был вызван
@@ -96,7 +96,7 @@ class TestQuotesService:
         ]
         
         # Патчим метод requests.get, чтобы он возвращал наш мок
-        with patch('services.quotes_service.requests.get', return_value=mock_response) as mock_get:
+        with patch('services.quotes_service.http_client.get', return_value=mock_response) as mock_get:
             quote = QuotesService.get_random_quote()
             
             # Проверяем, что requests.get был вызван
@@ -109,7 +109,7 @@ class TestQuotesService:
     def test_get_random_quote_http_error(self):
         """Тест получения цитаты при ошибке HTTP"""
         # Патчим метод requests.get, чтобы он вызывал исключение RequestException
-        with patch('services.quotes_service.requests.get', side_effect=requests.RequestException("HTTP Error")) as mock_get:
+        with patch('services.quotes_service.http_client.get', side_effect=requests.RequestException("HTTP Error")) as mock_get:
             quote = QuotesService.get_random_quote()
             
             # Проверяем, что requests.get был вызван
@@ -122,7 +122,7 @@ class TestQuotesService:
     def test_get_random_quote_network_error(self):
         """Тест получения цитаты при сетевой ошибке (ConnectionError)"""
         # Патчим метод requests.get, чтобы он вызывал исключение ConnectionError
-        with patch('services.quotes_service.requests.get', side_effect=requests.ConnectionError("Connection Error")) as mock_get:
+        with patch('services.quotes_service.http_client.get', side_effect=requests.ConnectionError("Connection Error")) as mock_get:
             quote = QuotesService.get_random_quote()
             
             # Проверяем, что requests.get был вызван
@@ -135,7 +135,7 @@ class TestQuotesService:
     def test_get_random_quote_timeout_error(self):
         """Тест получения цитаты при таймауте запроса"""
         # Патчим метод requests.get, чтобы он вызывал исключение Timeout
-        with patch('services.quotes_service.requests.get', side_effect=requests.Timeout("Request timed out")) as mock_get:
+        with patch('services.quotes_service.http_client.get', side_effect=requests.Timeout("Request timed out")) as mock_get:
             quote = QuotesService.get_random_quote()
             
             # Проверяем, что requests.get был вызван
@@ -0,0 +1,51 @@
+"""
+Tests for RateLimiter
+"""
+import pytest
+from unittest.mock import patch
+from utils.rate_limiter import RateLimiter
+
+
+class TestRateLimiter:
+    """Тесты для ограничителя частоты отправки"""
+    
+    @pytest.fixture
+    def clock(self):
+        """Фикстура с управляемыми монотонными часами"""
+        with patch('utils.rate_limiter.time.monotonic', return_value=100.0) as mock_monotonic:
+            yield mock_monotonic
+    
+    def test_first_request_is_not_delayed(self, clock):
+        """Тест отправки без ожидания, если лимиты не исчерпаны"""
+        limiter = RateLimiter(global_interval=0.1, per_key_interval=3.0)
+        
+        assert limiter.reserve('@channel') == 0
+    
+    def test_global_interval_between_chats(self, clock):
+        """Тест общего интервала между отправками в разные чаты"""
+        limiter = RateLimiter(global_interval=0.1, per_key_interval=3.0)
+        
+        delays = [limiter.reserve(chat_id) for chat_id in ('@a', '@b', '@c')]
+        
+        assert delays == pytest.approx([0, 0.1, 0.2])
+    
+    def test_per_chat_interval(self, clock):
+        """Тест интервала между отправками в один и тот же чат"""
+        limiter = RateLimiter(global_interval=0.1, per_key_interval=3.0)
+        
+        limiter.reserve('@channel')
+        assert limiter.reserve('@channel') == pytest.approx(3.0)
+        
+        # После истечения интервала ожидание не требуется
+        clock.return_value = 110.0
+        assert limiter.reserve('@channel') == 0
+    
+    def test_acquire_sleeps_for_reserved_delay(self, clock):
+        """Тест ожидания в acquire до разрешенного момента"""
+        limiter = RateLimiter(global_interval=0.5, per_key_interval=0)
+        
+        with patch('utils.rate_limiter.time.sleep') as mock_sleep:
+            limiter.acquire('@a')
+            limiter.acquire('@b')
+        
+        mock_sleep.assert_called_once_with(pytest.approx(0.5))
\ No newline at end of file
@@ -0,0 +1,142 @@
+"""
+Tests for ScheduleEngine
+"""
+import pytest
+import pytz
+from datetime import datetime
+from utils.schedule_engine import ScheduleEngine
+
+
+def local_ts(tz_name, *args):
+    """Возвращает UTC timestamp для локального времени в заданном часовом поясе"""
+    return pytz.timezone(tz_name).localize(datetime(*args)).timestamp()
+
+
+class TestScheduleEngine:
+    """Тесты для движка расписания"""
+    
+    def test_from_schedule_skips_invalid_slots(self):
+        """Тест пропуска неизвестных дней и некорректного времени"""
+        engine = ScheduleEngine.from_schedule(
+            {'monday': ['09:00', 'bad'], 'someday': ['10:00'], 'friday': ['18:30']},
+            'Europe/Moscow'
+        )
+        
+        assert len(engine) == 2
+    
+    def test_next_runs_in_order(self):
+        """Тест предпросмотра ближайших запусков по порядку с повторениями через неделю"""
+        engine = ScheduleEngine('Europe/Moscow')
+        engine.add('tuesday', '10:00')
+        engine.add('monday', '09:00')
+        engine.add('monday', '15:00')
+        # Понедельник, 1 января 2024, 08:00
+        engine.rebuild(now=local_ts('Europe/Moscow', 2024, 1, 1, 8, 0))
+        
+        runs = engine.next_runs(5)
+        
+        assert [key for key, _ in runs] == [
+            'monday 09:00', 'monday 15:00', 'tuesday 10:00', 'monday 09:00', 'monday 15:00'
+        ]
+        assert runs[0][1] == pytz.timezone('Europe/Moscow').localize(datetime(2024, 1, 1, 9, 0))
+        assert runs[3][1].date() == datetime(2024, 1, 8).date()
+        # Предпросмотр не меняет расписание
+        assert engine.next_runs(1) == runs[:1]
+    
+    def test_pop_due_reschedules_next_week(self):
+        """Тест извлечения наступившего слота и планирования его на следующую неделю"""
+        engine = ScheduleEngine('Europe/Moscow')
+        engine.add('monday', '09:00')
+        nominal = local_ts('Europe/Moscow', 2024, 1, 1, 9, 0)
+        engine.rebuild(now=nominal - 60)
+        
+        assert engine.pop_due(now=nominal - 1) == []
+        assert engine.seconds_until_next(now=nominal - 1) == pytest.approx(1)
+        assert engine.pop_due(now=nominal + 2) == [('monday 09:00', nominal)]
+        assert engine.seconds_until_next(now=nominal + 2) == pytest.approx(7 * 24 * 3600 - 2)
+    
+    def test_missed_runs_are_coalesced(self):
+        """Тест однократного запуска слота, пропустившего несколько срабатываний"""
+        engine = ScheduleEngine('Europe/Moscow')
+        engine.add('monday', '09:00')
+        nominal = local_ts('Europe/Moscow', 2024, 1, 1, 9, 0)
+        engine.rebuild(now=nominal - 60)
+        
+        due = engine.pop_due(now=nominal + 3 * 7 * 24 * 3600)
+        
+        assert due == [('monday 09:00', nominal)]
+    
+    def test_keeps_local_time_across_dst(self):
+        """Тест сохранения локального времени слота после перехода на летнее время"""
+        engine = ScheduleEngine('Europe/Berlin')
+        engine.add('monday', '09:00')
+        # Переход на летнее время в Берлине - 31 марта 2024
+        engine.rebuild(now=local_ts('Europe/Berlin', 2024, 3, 25, 10, 0))
+        
+        run = engine.next_runs(1)[0][1]
+        
+        assert (run.hour, run.minute) == (9, 0)
+        assert run.utcoffset().total_seconds() == 2 * 3600
+    
+    def test_nonexistent_time_is_shifted_forward(self):
+        """Тест слота в пропущенном часе перехода на летнее время"""
+        engine = ScheduleEngine('Europe/Berlin')
+        engine.add('sunday', '02:30')
+        engine.rebuild(now=local_ts('Europe/Berlin', 2024, 3, 30, 12, 0))
+        
+        run = engine.next_runs(1)[0][1]
+        
+        assert run == pytz.timezone('Europe/Berlin').localize(datetime(2024, 3, 31, 3, 30))
+    
+    def test_ambiguous_time_fires_once(self):
+        """Тест однократного запуска слота в повторяющемся часе перехода на зимнее время"""
+        engine = ScheduleEngine('Europe/Berlin')
+        engine.add('sunday', '02:30')
+        engine.rebuild(now=local_ts('Europe/Berlin', 2024, 10, 26, 12, 0))
+        first_run = engine.next_runs(1)[0][1].timestamp()
+        
+        assert engine.pop_due(now=first_run) == [('sunday 02:30', first_run)]
+        # Повторное наступление 02:30 через час не вызывает второго запуска
+        assert engine.pop_due(now=first_run + 3600) == []
+    
+    def test_missed_slot_within_grace_runs_on_restart(self):
+        """Тест выполнения слота, пропущенного при перезапуске, в пределах допустимого опоздания"""
+        engine = ScheduleEngine('Europe/Moscow')
+        engine.add('monday', '09:00')
+        nominal = local_ts('Europe/Moscow', 2024, 1, 8, 9, 0)
+        # Последний запуск был неделю назад, процесс вернулся в 09:02
+        now = nominal + 120
+        engine.rebuild(now=now, last_fired={'monday 09:00': nominal - 7 * 24 * 3600}, misfire_grace=600)
+        
+        assert engine.pop_due(now=now) == [('monday 09:00', nominal)]
+        assert engine.seconds_until_next(now=now) == pytest.approx(7 * 24 * 3600 - 120)
+    
+    def test_stale_missed_slot_is_skipped(self):
+        """Тест пропуска слота, опоздание которого больше допустимого"""
+        engine = ScheduleEngine('Europe/Moscow')
+        engine.add('monday', '09:00')
+        nominal = local_ts('Europe/Moscow', 2024, 1, 8, 9, 0)
+        now = nominal + 3600
+        engine.rebuild(now=now, last_fired={'monday 09:00': nominal - 7 * 24 * 3600}, misfire_grace=600)
+        
+        assert engine.pop_due(now=now) == []
+    
+    def test_fired_or_new_slot_is_not_repeated(self):
+        """Тест отсутствия повторного запуска выполненного и нового слота"""
+        engine = ScheduleEngine('Europe/Moscow')
+        engine.add('monday', '09:00')
+        engine.add('monday', '08:59')
+        nominal = local_ts('Europe/Moscow', 2024, 1, 8, 9, 0)
+        now = nominal + 120
+        engine.rebuild(now=now, last_fired={'monday 09:00': nominal}, misfire_grace=600)
+        
+        assert engine.pop_due(now=now) == []
+    
+    def test_empty_engine(self):
+        """Тест движка без слотов"""
+        engine = ScheduleEngine('Europe/Moscow')
+        engine.rebuild()
+        
+        assert engine.seconds_until_next() is None
+        assert engine.next_runs(3) == []
+        assert engine.pop_due() == []
\ No newline at end of file
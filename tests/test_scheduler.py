@@ -252,4 +252,261 @@ class TestScheduler:
                 
                 # Проверяем, что time.sleep был вызван для каждой итерации с аргументом 1
                 assert mock_time.sleep.call_count == 3
-                assert all(call.args == (1,) for call in mock_time.sleep.call_args_list) 
\ No newline at end of file
+                assert all(call.args == (1,) for call in mock_time.sleep.call_args_list) 
+    
+    def test_stop_ends_polling_loop(self, mock_job):
+        """Тест остановки планировщика в режиме опроса из другого потока"""
+        import threading
+        with patch('utils.scheduler.SCHEDULE', {}):
+            scheduler = Scheduler(mock_job)
+        
+        thread = threading.Thread(target=scheduler.start)
+        thread.start()
+        time.sleep(0.1)
+        scheduler.stop()
+        thread.join(timeout=3)
+        
+        assert not thread.is_alive()
+    
+    def test_start_logs_reloaded_timezone(self, mock_job, caplog):
+        """Тест записи в лог часового пояса перезагруженного расписания при запуске"""
+        import logging
+        with patch('utils.scheduler.SCHEDULE', {}):
+            scheduler = Scheduler(mock_job)
+        scheduler.reload(timezone='Asia/Tokyo')
+        scheduler.stop()
+        
+        with caplog.at_level(logging.INFO, logger='utils.scheduler'):
+            scheduler.start()
+        
+        assert "Планировщик запущен с часовым поясом Asia/Tokyo" in caplog.text
+
+
+class TestSchedulerEventLoop:
+    """Тесты событийного режима планировщика"""
+    
+    @pytest.fixture
+    def scheduler(self):
+        """Фикстура - событийный планировщик без заданий из конфигурации"""
+        with patch('utils.scheduler.SCHEDULE', {}):
+            scheduler = Scheduler(Mock(), event_driven=True)
+        yield scheduler
+        scheduler.stop()
+    
+    def test_runs_due_job_and_records_lateness(self, scheduler):
+        """Тест запуска задания в срок с записью опоздания"""
+        from utils.schedule_engine import ScheduleEngine
+        
+        # Часы движка идут в реальном темпе, начиная за 50 мс до слота в понедельник 09:00
+        slot_time = pytz.timezone('Europe/Moscow').localize(datetime(2024, 1, 1, 9, 0)).timestamp()
+        offset = slot_time - 0.05 - time.monotonic()
+        engine = ScheduleEngine('Europe/Moscow', clock=lambda: time.monotonic() + offset)
+        engine.add('monday', '09:00')
+        engine.rebuild()
+        scheduler._engine = engine
+        scheduler.job_function = Mock(side_effect=scheduler.stop)
+        job = scheduler.job_function
+        
+        started = time.monotonic()
+        scheduler.start()
+        
+        job.assert_called_once()
+        # Цикл просыпается к сроку задания, а не по секундному опросу
+        assert time.monotonic() - started < 1
+        stats = scheduler.get_lateness_stats()
+        assert stats['count'] == 1
+        assert 0 <= stats['last'] < 1
+    
+    def test_due_job_is_handed_to_executor(self, scheduler):
+        """Тест передачи наступившего задания в пул потоков"""
+        from utils.schedule_engine import ScheduleEngine
+        
+        slot_time = pytz.timezone('Europe/Moscow').localize(datetime(2024, 1, 1, 9, 0)).timestamp()
+        engine = ScheduleEngine('Europe/Moscow', clock=lambda: slot_time + 1)
+        engine.add('monday', '09:00')
+        engine.rebuild(now=slot_time - 60)
+        scheduler._engine = engine
+        scheduler.executor = Mock()
+        
+        scheduler._run_due_jobs()
+        
+        scheduler.executor.submit.assert_called_once_with(scheduler.job_function, 'monday 09:00')
+        scheduler.job_function.assert_not_called()
+    
+    def test_job_in_executor_sees_its_slot(self, scheduler):
+        """Тест передачи слота и номинального времени заданию, выполняемому в пуле потоков"""
+        import threading
+        from utils.schedule_engine import ScheduleEngine
+        from utils.job_executor import JobExecutor
+        from utils.scheduler import current_slot
+        
+        slot_time = pytz.timezone('Europe/Moscow').localize(datetime(2024, 1, 1, 9, 0)).timestamp()
+        engine = ScheduleEngine('Europe/Moscow', clock=lambda: slot_time + 1)
+        engine.add('monday', '09:00')
+        engine.rebuild(now=slot_time - 60)
+        scheduler._engine = engine
+        scheduler.executor = JobExecutor(max_workers=1)
+        seen = []
+        done = threading.Event()
+        scheduler.job_function = lambda: (seen.append(current_slot()), done.set())
+        
+        scheduler._run_due_jobs()
+        
+        assert done.wait(2)
+        assert seen == [('monday 09:00', slot_time)]
+        assert current_slot() is None
+        scheduler.executor.shutdown()
+    
+    def test_polling_job_sees_its_slot(self):
+        """Тест передачи слота и номинального времени заданию в режиме опроса"""
+        from utils.scheduler import current_slot
+        with patch('utils.scheduler.SCHEDULE', {}):
+            scheduler = Scheduler(Mock())
+        seen = []
+        scheduler.job_function = lambda: seen.append(current_slot())
+        
+        scheduler._run_polling_job('monday 09:00', '09:00')
+        
+        key, nominal = seen[0]
+        nominal = datetime.fromtimestamp(nominal, scheduler.timezone)
+        assert key == 'monday 09:00'
+        assert (nominal.hour, nominal.minute, nominal.second) == (9, 0, 0)
+        assert current_slot() is None
+    
+    def test_due_slots_are_recorded_and_coalesced(self, scheduler, tmp_path):
+        """Тест записи запусков в хранилище и объединения одновременно наступивших слотов"""
+        from utils.schedule_engine import ScheduleEngine
+        from utils.job_store import JobStore
+        
+        slot_time = pytz.timezone('Europe/Moscow').localize(datetime(2024, 1, 1, 9, 0)).timestamp()
+        engine = ScheduleEngine('Europe/Moscow', clock=lambda: slot_time + 3600)
+        engine.add('monday', '09:00')
+        engine.add('monday', '09:30')
+        engine.rebuild(now=slot_time - 60)
+        scheduler._engine = engine
+        scheduler.job_store = JobStore(str(tmp_path / "jobs.sqlite3"))
+        scheduler.coalesce = True
+        
+        scheduler._run_due_jobs()
+        
+        scheduler.job_function.assert_called_once()
+        assert scheduler.job_store.load() == {'monday 09:00': slot_time, 'monday 09:30': slot_time + 1800}
+        assert scheduler.get_lateness_stats()['last'] == pytest.approx(1800)
+        scheduler.job_store.close()
+    
+    def test_missed_slot_runs_after_restart(self, tmp_path):
+        """Тест выполнения слота, пропущенного во время перезапуска"""
+        from utils.job_store import JobStore
+        
+        job_store = JobStore(str(tmp_path / "jobs.sqlite3"))
+        tz = pytz.timezone('Europe/Moscow')
+        nominal = tz.localize(datetime(2024, 1, 8, 9, 0)).timestamp()
+        job_store.record('monday 09:00', nominal - 7 * 24 * 3600)
+        
+        with patch('utils.scheduler.SCHEDULE', {'monday': ['09:00']}), \
+             patch('utils.schedule_engine.time.time', return_value=nominal + 120):
+            scheduler = Scheduler(Mock(), event_driven=True, job_store=job_store, misfire_grace=600)
+            scheduler._run_due_jobs()
+        
+        scheduler.job_function.assert_called_once()
+        assert job_store.load() == {'monday 09:00': nominal}
+        job_store.close()
+    
+    def test_stop_interrupts_wait(self, scheduler):
+        """Тест прерывания ожидания при остановке из другого потока"""
+        import threading
+        
+        thread = threading.Thread(target=scheduler.start)
+        thread.start()
+        time.sleep(0.1)
+        scheduler.stop()
+        thread.join(timeout=2)
+        
+        assert not thread.is_alive()
+    
+    def test_reload_applies_only_changed_slots(self, scheduler):
+        """Тест перезагрузки расписания с добавлением и удалением только изменившихся слотов"""
+        scheduler.reload({'monday': ['09:00'], 'tuesday': ['10:00']})
+        scheduler._apply_reload()
+        kept_run = dict(scheduler._engine.next_runs(2))['monday 09:00']
+        
+        with patch.object(scheduler._engine, '_next_fire', wraps=scheduler._engine._next_fire) as mock_next_fire:
+            scheduler.reload({'monday': ['09:00'], 'friday': ['18:00']})
+            scheduler._apply_reload()
+        
+        # Пересчитан только добавленный слот
+        assert mock_next_fire.call_count == 1
+        runs = dict(scheduler._engine.next_runs(2))
+        assert set(runs) == {'monday 09:00', 'friday 18:00'}
+        assert runs['monday 09:00'] == kept_run
+        assert scheduler.schedule == {'monday': ['09:00'], 'friday': ['18:00']}
+    
+    def test_reload_changes_timezone(self, scheduler):
+        """Тест пересчета слотов при смене часового пояса"""
+        scheduler.reload({'monday': ['09:00']})
+        scheduler._apply_reload()
+        
+        scheduler.reload(timezone='Asia/Vladivostok')
+        scheduler._apply_reload()
+        
+        run = scheduler._engine.next_runs(1)[0][1]
+        assert scheduler.timezone == pytz.timezone('Asia/Vladivostok')
+        assert run.tzinfo.zone == 'Asia/Vladivostok'
+        assert (run.hour, run.minute) == (9, 0)
+    
+    def test_reload_wakes_running_loop(self, scheduler):
+        """Тест применения нового расписания запущенным планировщиком"""
+        import threading
+        
+        thread = threading.Thread(target=scheduler.start)
+        thread.start()
+        scheduler.reload({'monday': ['09:00']})
+        
+        deadline = time.monotonic() + 2
+        while len(scheduler._engine) == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        scheduler.stop()
+        thread.join(timeout=2)
+        
+        assert len(scheduler._engine) == 1
+    
+    def test_reload_in_polling_mode_rebuilds_schedule(self):
+        """Тест перезагрузки расписания в режиме опроса"""
+        with patch('utils.scheduler.SCHEDULE', {}):
+            scheduler = Scheduler(Mock())
+        
+        with patch.object(scheduler, '_setup_schedule') as mock_setup:
+            scheduler.reload({'monday': ['09:00']})
+            scheduler._apply_reload()
+        
+        mock_setup.assert_called_once()
+        assert scheduler.schedule == {'monday': ['09:00']}
+    
+    def test_reload_applied_by_running_polling_loop(self):
+        """Тест применения нового расписания запущенным планировщиком в режиме опроса"""
+        import threading
+        with patch('utils.scheduler.SCHEDULE', {'monday': ['09:00'], 'friday': ['18:00']}):
+            scheduler = Scheduler(Mock())
+        assert len(schedule.get_jobs()) == 2
+        
+        thread = threading.Thread(target=scheduler.start)
+        thread.start()
+        try:
+            scheduler.reload({'sunday': ['12:00']})
+            deadline = time.monotonic() + 3
+            while scheduler._reload_requested and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            scheduler.stop()
+            thread.join(timeout=3)
+        
+        assert not thread.is_alive()
+        assert scheduler.schedule == {'sunday': ['12:00']}
+        jobs = schedule.get_jobs()
+        assert len(jobs) == 1
+        assert jobs[0].start_day == 'sunday'
+        schedule.clear()
+    
+    def test_lateness_stats_empty(self, scheduler):
+        """Тест статистики опозданий до первого запуска"""
+        assert scheduler.get_lateness_stats() == {'count': 0, 'last': None, 'avg': None, 'max': None}
\ No newline at end of file
@@ -42,7 +42,8 @@ class TestTelegramBot:
             bot = TelegramBot()
             
             # Проверяем, что telegram.Bot был вызван с правильным токеном
-            mock_bot.assert_called_once_with(token='test_token')
+            mock_bot.assert_called_once()
+            assert mock_bot.call_args[1]['token'] == 'test_token'
             
             # Проверяем, что атрибуты инициализированы правильно
             assert bot.channel_id == '@test_channel'
@@ -89,7 +90,7 @@ class TestTelegramBot:
             mock_logger.info.assert_any_call("Цитата отправлена в @test_channel")
             
             # Функция должна вернуть True при успешной отправке
-            assert result is True
+            assert result
     
     def test_send_quote_with_translation_no_image(self, mock_quote, translated_text):
         """Тест отправки цитаты с переводом, но без изображения"""
@@ -127,7 +128,7 @@ class TestTelegramBot:
                     text=expected_message,
                     parse_mode=telegram.ParseMode.MARKDOWN
                 )
-            ])
+            ], any_order=True)
             
             # Проверяем, что send_photo не вызывался
             mock_bot.send_photo.assert_not_called()
@@ -137,7 +138,7 @@ class TestTelegramBot:
             mock_logger.info.assert_any_call("Цитата отправлена в @test_group")
             
             # Функция должна вернуть True при успешной отправке
-            assert result is True
+            assert result
     
     def test_send_quote_with_image(self, mock_quote, image_path):
         """Тест отправки цитаты с изображением"""
@@ -185,7 +186,7 @@ class TestTelegramBot:
             mock_logger.info.assert_any_call(f"Временный файл {image_path} удален")
             
             # Функция должна вернуть True при успешной отправке
-            assert result is True
+            assert result
     
     def test_send_quote_send_message_error(self, mock_quote):
         """Тест обработки ошибки при отправке сообщения"""
@@ -209,8 +210,12 @@ class TestTelegramBot:
             # Проверяем логирование
             mock_logger.error.assert_any_call("Ошибка при отправке в @test_channel: Error sending message")
             
-            # Проверяем, что функция вернула True (она перехватила исключение в цикле)
-            assert result is True
+            # Ошибка отправки фиксируется в результате для чата, а не прерывает отправку
+            assert not result
+            assert len(result.results) == 1
+            assert result.results[0].chat_id == '@test_channel'
+            assert result.results[0].success is False
+            assert result.results[0].error == "Error sending message"
     
     def test_send_quote_general_error(self):
         """Тест обработки общей ошибки при отправке цитаты"""
@@ -233,8 +238,9 @@ class TestTelegramBot:
             # Отправляем "сломанную" цитату, которая вызовет ошибку атрибута
             result = bot.send_quote(quote=broken_quote)
             
-            # Проверяем, что функция вернула False при общей ошибке
-            assert result is False
+            # Проверяем, что при общей ошибке цитата не считается доставленной
+            assert not result
+            assert result.results == []
             
             # Проверяем, что была записана ошибка в лог
             assert mock_logger.error.call_count > 0
@@ -271,7 +277,7 @@ class TestTelegramBot:
             )
             
             # Функция должна вернуть True, так как основная задача (отправка) была выполнена
-            assert result is True
+            assert result
     
     def test_send_quote_nonexistent_image(self, mock_quote, image_path):
         """Тест отправки цитаты с несуществующим изображением"""
@@ -299,4 +305,232 @@ class TestTelegramBot:
             mock_bot.send_photo.assert_not_called()
             
             # Функция должна вернуть True
-            assert result is True 
\ No newline at end of file
+            assert result 
+    
+    def test_send_quote_releases_stored_image(self, mock_quote, tmp_path):
+        """Тест освобождения изображения из хранилища вместо удаления файла"""
+        from services.image_store import ImageStore
+        from services.image_service import ImageService
+        
+        store = ImageStore(str(tmp_path / "images"))
+        image_path = store.put("key", b"image")
+        ImageService.set_image_store(store)
+        
+        try:
+            with patch('bot.telegram_bot.telegram.Bot') as mock_bot_class, \
+                 patch('bot.telegram_bot.TELEGRAM_CHANNEL_ID', '@test_channel'), \
+                 patch('bot.telegram_bot.TELEGRAM_GROUP_ID', None), \
+                 patch('bot.telegram_bot.os.unlink') as mock_unlink:
+                mock_bot_class.return_value = Mock()
+                
+                result = TelegramBot().send_quote(quote=mock_quote, image_path=image_path)
+                
+                assert result
+                mock_unlink.assert_not_called()
+                assert os.path.exists(image_path)
+                assert store._refs == {}
+        finally:
+            ImageService.set_image_store(None)
+    
+    @staticmethod
+    def _photo_message(file_id):
+        """Формирует сообщение Telegram с фотографией"""
+        message = Mock()
+        message.photo = [Mock(file_id=f"{file_id}-small"), Mock(file_id=file_id)]
+        return message
+    
+    def test_send_quote_uploads_image_once(self, mock_quote, translated_text, tmp_path):
+        """Тест однократной загрузки изображения и повторного использования file_id"""
+        image_file = tmp_path / "image.jpg"
+        image_file.write_bytes(b"image")
+        
+        with patch('bot.telegram_bot.telegram.Bot') as mock_bot_class, \
+             patch('bot.telegram_bot.TELEGRAM_CHANNEL_ID', '@test_channel'), \
+             patch('bot.telegram_bot.TELEGRAM_GROUP_ID', '@test_group'):
+            mock_bot = Mock()
+            mock_bot.send_photo.return_value = self._photo_message("uploaded-file-id")
+            mock_bot_class.return_value = mock_bot
+            
+            result = TelegramBot().send_quote(mock_quote, translated_text, str(image_file))
+            
+            assert result
+            assert mock_bot.send_photo.call_count == 2
+            first_call, second_call = mock_bot.send_photo.call_args_list
+            assert first_call[1]['chat_id'] == '@test_channel'
+            assert not isinstance(first_call[1]['photo'], str)
+            assert second_call[1]['chat_id'] == '@test_group'
+            assert second_call[1]['photo'] == "uploaded-file-id"
+    
+    def test_send_quote_reuses_stored_file_id(self, mock_quote, tmp_path):
+        """Тест повторной публикации изображения из хранилища без загрузки файла"""
+        from services.image_store import ImageStore
+        from services.image_service import ImageService
+        
+        store = ImageStore(str(tmp_path / "images"))
+        ImageService.set_image_store(store)
+        
+        try:
+            with patch('bot.telegram_bot.telegram.Bot') as mock_bot_class, \
+                 patch('bot.telegram_bot.TELEGRAM_CHANNEL_ID', '@test_channel'), \
+                 patch('bot.telegram_bot.TELEGRAM_GROUP_ID', None):
+                mock_bot = Mock()
+                mock_bot.send_photo.return_value = self._photo_message("stored-file-id")
+                mock_bot_class.return_value = mock_bot
+                bot = TelegramBot()
+                
+                # Первая публикация загружает файл и сохраняет file_id в индекс
+                bot.send_quote(mock_quote, image_path=store.put("key", b"image"))
+                assert store.get_metadata(store.acquire("key"), 'file_id') == "stored-file-id"
+                
+                # Повторная публикация использует сохраненный file_id
+                with patch('bot.telegram_bot.open', create=True) as mock_file:
+                    bot.send_quote(mock_quote, image_path=store.acquire("key"))
+                    mock_file.assert_not_called()
+                
+                assert mock_bot.send_photo.call_args[1]['photo'] == "stored-file-id"
+        finally:
+            ImageService.set_image_store(None)
+    
+    def test_send_quote_invalid_stored_file_id_reuploads(self, mock_quote, tmp_path):
+        """Тест повторной загрузки файла, если сохраненный file_id недействителен"""
+        from services.image_store import ImageStore
+        from services.image_service import ImageService
+        
+        store = ImageStore(str(tmp_path / "images"))
+        image_path = store.put("key", b"image")
+        store.set_metadata(image_path, 'file_id', "expired-file-id")
+        ImageService.set_image_store(store)
+        
+        try:
+            with patch('bot.telegram_bot.telegram.Bot') as mock_bot_class, \
+                 patch('bot.telegram_bot.TELEGRAM_CHANNEL_ID', '@test_channel'), \
+                 patch('bot.telegram_bot.TELEGRAM_GROUP_ID', None):
+                mock_bot = Mock()
+                mock_bot.send_photo.side_effect = [
+                    telegram.error.BadRequest("Wrong file identifier"),
+                    self._photo_message("fresh-file-id")
+                ]
+                mock_bot_class.return_value = mock_bot
+                
+                TelegramBot().send_quote(mock_quote, image_path=image_path)
+                
+                assert mock_bot.send_photo.call_count == 2
+                assert store.get_metadata(image_path, 'file_id') == "fresh-file-id"
+        finally:
+            ImageService.set_image_store(None)    
+    def test_send_quote_reports_each_destination(self, mock_quote):
+        """Тест отчета о доставке с результатом и временем для каждого чата"""
+        with patch('bot.telegram_bot.telegram.Bot') as mock_bot_class, \
+             patch('bot.telegram_bot.TELEGRAM_CHANNEL_ID', '@test_channel'), \
+             patch('bot.telegram_bot.TELEGRAM_GROUP_ID', '@test_group'):
+            mock_bot = Mock()
+            
+            def send_message(chat_id, text, parse_mode):
+                if chat_id == '@test_group':
+                    raise telegram.error.NetworkError("timeout")
+                return Mock(message_id=42)
+            
+            mock_bot.send_message.side_effect = send_message
+            mock_bot_class.return_value = mock_bot
+            
+            report = TelegramBot().send_quote(mock_quote)
+            
+            assert report
+            assert not report.ok
+            results = {result.chat_id: result for result in report.results}
+            assert results['@test_channel'].success is True
+            assert results['@test_channel'].message_id == 42
+            assert results['@test_group'].success is False
+            assert "timeout" in results['@test_group'].error
+            assert all(result.duration >= 0 for result in report.results)
+    
+    def test_send_quote_sends_destinations_concurrently(self, mock_quote):
+        """Тест параллельной отправки цитаты в канал и группу"""
+        import threading
+        
+        # Барьер пройдет, только если обе отправки выполняются одновременно
+        barrier = threading.Barrier(2, timeout=5)
+        
+        with patch('bot.telegram_bot.telegram.Bot') as mock_bot_class, \
+             patch('bot.telegram_bot.TELEGRAM_CHANNEL_ID', '@test_channel'), \
+             patch('bot.telegram_bot.TELEGRAM_GROUP_ID', '@test_group'):
+            mock_bot = Mock()
+            mock_bot.send_message.side_effect = lambda **kwargs: barrier.wait()
+            mock_bot_class.return_value = mock_bot
+            
+            report = TelegramBot().send_quote(mock_quote)
+            
+            assert report.ok
+            assert mock_bot.send_message.call_count == 2
+    
+    def test_attach_image_replaces_published_messages(self, mock_quote, translated_text, tmp_path):
+        """Тест замены опубликованных текстовых сообщений сообщениями с изображением"""
+        from bot.telegram_bot import SendReport, DeliveryResult
+        image_path = tmp_path / "image.jpg"
+        image_path.write_bytes(b"image")
+        report = SendReport([
+            DeliveryResult('@test_channel', True, 0.1, message_id=10),
+            DeliveryResult('@test_group', True, 0.1, message_id=20)
+        ])
+        
+        with patch('bot.telegram_bot.telegram.Bot') as mock_bot_class, \
+             patch('bot.telegram_bot.TELEGRAM_PER_CHAT_INTERVAL_MS', 0):
+            mock_bot = Mock()
+            mock_bot.send_photo.side_effect = [
+                Mock(message_id=11, photo=[Mock(file_id="uploaded-file-id")]),
+                Mock(message_id=21, photo=[Mock(file_id="uploaded-file-id")])
+            ]
+            mock_bot_class.return_value = mock_bot
+            
+            result = TelegramBot().attach_image(report, mock_quote, translated_text, str(image_path))
+            
+            assert result.ok
+            assert [r.message_id for r in result.results] == [11, 21]
+            mock_bot.edit_message_media.assert_not_called()
+            # Второй чат получает уже загруженное изображение по file_id
+            assert mock_bot.send_photo.call_args_list[1][1]['photo'] == "uploaded-file-id"
+            deleted = [c[1]['message_id'] for c in mock_bot.delete_message.call_args_list]
+            assert deleted == [10, 20]
+            assert not image_path.exists()
+    
+    def test_attach_image_skips_failed_text_delivery(self, mock_quote, tmp_path):
+        """Тест добавления изображения только в чаты, получившие текст цитаты"""
+        from bot.telegram_bot import SendReport, DeliveryResult
+        image_path = tmp_path / "image.jpg"
+        image_path.write_bytes(b"image")
+        report = SendReport([
+            DeliveryResult('@test_channel', True, 0.1, message_id=10),
+            DeliveryResult('@test_group', False, 0.1, error="timeout")
+        ])
+        
+        with patch('bot.telegram_bot.telegram.Bot') as mock_bot_class, \
+             patch('bot.telegram_bot.TELEGRAM_PER_CHAT_INTERVAL_MS', 0):
+            mock_bot = Mock()
+            mock_bot.send_photo.return_value = Mock(message_id=11, photo=[Mock(file_id="new-file-id")])
+            mock_bot_class.return_value = mock_bot
+            
+            result = TelegramBot().attach_image(report, mock_quote, image_path=str(image_path))
+            
+            assert result.ok
+            assert [(r.chat_id, r.message_id) for r in result.results] == [('@test_channel', 11)]
+            mock_bot.delete_message.assert_called_once_with(chat_id='@test_channel', message_id=10)    
+    def test_send_quote_fails_fast_when_telegram_unavailable(self, mock_quote):
+        """Тест отказа от отправки без обращения к Telegram при разомкнутом предохранителе"""
+        from utils.circuit_breaker import get_breaker
+        with patch('bot.telegram_bot.telegram.Bot') as mock_bot_class, \
+             patch('bot.telegram_bot.TELEGRAM_CHANNEL_ID', '@test_channel'), \
+             patch('bot.telegram_bot.TELEGRAM_GROUP_ID', None):
+            mock_bot = Mock()
+            mock_bot.send_message.side_effect = telegram.error.TimedOut()
+            mock_bot_class.return_value = mock_bot
+            bot = TelegramBot()
+            get_breaker('telegram').min_calls = 2
+            
+            with patch.object(bot, '_rate_limiter'):
+                for _ in range(2):
+                    assert not bot.send_quote(mock_quote)
+                report = bot.send_quote(mock_quote)
+            
+            assert not report
+            assert mock_bot.send_message.call_count == 2
+            assert "предохранитель" in report.results[0].error
\ No newline at end of file
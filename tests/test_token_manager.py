@@ -0,0 +1,130 @@
+"""
+Tests for TokenManager
+"""
+import json
+import threading
+import time
+import pytest
+import requests
+from unittest.mock import Mock, patch
+from services.token_manager import TokenManager, DEFAULT_TOKEN_LIFETIME
+
+
+def make_token_response(token="test-token", expires_at=None):
+    """Формирует ответ OAuth-эндпоинта GigaChat"""
+    response = Mock()
+    data = {"access_token": token}
+    if expires_at is not None:
+        data["expires_at"] = expires_at
+    response.json.return_value = data
+    return response
+
+
+class TestTokenManager:
+    """Тесты для менеджера токена GigaChat"""
+    
+    def test_uses_expires_at_from_response(self):
+        """Тест использования реального срока действия из ответа (в миллисекундах)"""
+        expires_at = time.time() + 600
+        with patch('services.token_manager.http_client.post',
+                   return_value=make_token_response(expires_at=int(expires_at * 1000))) as mock_post:
+            manager = TokenManager()
+            assert manager.get_token() == "test-token"
+            assert manager.get_token() == "test-token"
+            
+            mock_post.assert_called_once()
+            assert manager.expires_at == pytest.approx(expires_at, abs=1)
+    
+    def test_default_lifetime_without_expires_at(self):
+        """Тест срока действия по умолчанию при отсутствии expires_at"""
+        with patch('services.token_manager.http_client.post', return_value=make_token_response()):
+            manager = TokenManager()
+            manager.get_token()
+            
+            assert manager.expires_at == pytest.approx(time.time() + DEFAULT_TOKEN_LIFETIME, abs=5)
+    
+    def test_expired_token_is_refreshed(self):
+        """Тест обновления токена после истечения срока действия"""
+        responses = [
+            make_token_response("old-token", expires_at=(time.time() + 5) * 1000),
+            make_token_response("new-token", expires_at=(time.time() + 600) * 1000),
+        ]
+        with patch('services.token_manager.http_client.post', side_effect=responses) as mock_post:
+            manager = TokenManager()
+            manager.refresh()
+            
+            # Остаток срока меньше минимального - токен должен быть обновлен
+            assert manager.get_token() == "new-token"
+            assert mock_post.call_count == 2
+    
+    def test_request_error(self):
+        """Тест обработки ошибки OAuth-запроса"""
+        with patch('services.token_manager.http_client.post',
+                   side_effect=requests.RequestException("HTTP Error")):
+            manager = TokenManager()
+            assert manager.get_token() is None
+    
+    def test_concurrent_callers_share_one_refresh(self):
+        """Тест того, что параллельные вызовы ожидают один общий запрос"""
+        release = threading.Event()
+        
+        def slow_post(*args, **kwargs):
+            release.wait(2)
+            return make_token_response(expires_at=(time.time() + 600) * 1000)
+        
+        with patch('services.token_manager.http_client.post', side_effect=slow_post) as mock_post:
+            manager = TokenManager()
+            results = []
+            threads = [threading.Thread(target=lambda: results.append(manager.get_token())) for _ in range(5)]
+            for thread in threads:
+                thread.start()
+            time.sleep(0.05)
+            release.set()
+            for thread in threads:
+                thread.join(2)
+            
+            assert results == ["test-token"] * 5
+            mock_post.assert_called_once()
+    
+    def test_token_persisted_between_restarts(self, tmp_path):
+        """Тест сохранения токена на диск и загрузки после перезапуска"""
+        storage_path = str(tmp_path / "gigachat_token.json")
+        with patch('services.token_manager.http_client.post',
+                   return_value=make_token_response(expires_at=(time.time() + 600) * 1000)) as mock_post:
+            TokenManager(storage_path=storage_path).get_token()
+            
+            restored = TokenManager(storage_path=storage_path)
+            assert restored.get_token() == "test-token"
+            mock_post.assert_called_once()
+        
+        with open(storage_path, encoding='utf-8') as f:
+            assert json.load(f)["access_token"] == "test-token"
+    
+    def test_expired_persisted_token_ignored(self, tmp_path):
+        """Тест игнорирования просроченного токена из файла"""
+        storage_path = tmp_path / "gigachat_token.json"
+        storage_path.write_text(json.dumps({"access_token": "stale", "expires_at": time.time() - 10}))
+        
+        manager = TokenManager(storage_path=str(storage_path))
+        with patch('services.token_manager.http_client.post', return_value=make_token_response()):
+            assert manager.get_token() == "test-token"
+    
+    def test_background_refresh_before_expiry(self):
+        """Тест фонового обновления токена до истечения срока действия"""
+        responses = [
+            make_token_response("first", expires_at=(time.time() + 30) * 1000),
+            make_token_response("second", expires_at=(time.time() + 600) * 1000),
+        ]
+        with patch('services.token_manager.http_client.post', side_effect=responses + [responses[-1]] * 5):
+            manager = TokenManager(refresh_margin=60)
+            manager.get_token()
+            manager.start()
+            try:
+                for _ in range(100):
+                    if manager.get_token() == "second":
+                        break
+                    time.sleep(0.01)
+            finally:
+                manager.stop()
+            
+            assert manager.get_token() == "second"
\ No newline at end of file
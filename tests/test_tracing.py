@@ -0,0 +1,193 @@
+"""
+Tests for tracing
+"""
+import json
+import os
+import pytest
+from unittest.mock import Mock, patch
+from utils import tracing
+from utils.pipeline import Pipeline
+
+
+class ListExporter:
+    """Экспортер, сохраняющий интервалы в списке"""
+
+    def __init__(self):
+        self.spans = []
+
+    def export(self, spans):
+        self.spans.extend(spans)
+
+
+class TestTracing:
+    """Тесты для трассировки публикаций"""
+
+    @pytest.fixture
+    def exporter(self):
+        """Фикстура - экспортер в список, подключенный на время теста"""
+        exporter = ListExporter()
+        tracing.set_exporter(exporter)
+        yield exporter
+        tracing.set_exporter(None)
+
+    def test_child_spans_and_outcome(self, exporter):
+        """Тест вложенных интервалов с результатом вызова и ошибкой"""
+        @tracing.traced('service.ok')
+        def ok():
+            tracing.add_bytes(10)
+            tracing.add_bytes(5)
+            return "result"
+
+        @tracing.traced('service.empty')
+        def empty():
+            return None
+
+        @tracing.traced('service.fail')
+        def fail():
+            raise ValueError("boom")
+
+        with tracing.start_trace('publish') as root:
+            ok()
+            empty()
+            with pytest.raises(ValueError):
+                fail()
+
+        spans = {span.name: span for span in exporter.spans}
+        assert set(spans) == {'publish', 'service.ok', 'service.empty', 'service.fail'}
+        assert all(span.trace_id == root.trace_id for span in exporter.spans)
+        assert spans['service.ok'].parent_id == root.span_id
+        assert spans['service.ok'].attributes == {'bytes': 15, 'outcome': 'ok'}
+        assert spans['service.empty'].attributes['outcome'] == 'empty'
+        assert spans['service.fail'].status == tracing.STATUS_ERROR
+        assert spans['service.fail'].error == "boom"
+        assert spans['publish'].duration >= spans['service.ok'].duration
+
+    def test_no_spans_outside_trace(self, exporter):
+        """Тест вызовов сервисов вне публикации без записи интервалов"""
+        with tracing.span('orphan') as span:
+            span.add_bytes(1)
+        assert span is tracing.NOOP_SPAN
+        assert exporter.spans == []
+
+    def test_spans_from_pipeline_stages(self, exporter):
+        """Тест привязки интервалов этапов конвейера к трассировке публикации"""
+        pipeline = Pipeline()
+        pipeline.add('quote', tracing.traced('zenquotes.get_random_quote')(lambda: "quote"))
+        pipeline.add('token', tracing.traced('gigachat.get_access_token')(lambda: "token"))
+
+        with tracing.start_trace('publish') as root:
+            pipeline.run()
+
+        children = [span for span in exporter.spans if span.parent_id == root.span_id]
+        assert {span.name for span in children} == {'zenquotes.get_random_quote', 'gigachat.get_access_token'}
+
+    def test_send_motivational_quote_trace(self, exporter):
+        """Тест трассировки публикации с интервалами сервисов"""
+        from main import send_motivational_quote
+        from services.quotes_service import Quote
+        quote = Quote("Test quote", "Test Author")
+        mock_response = Mock(status_code=200)
+        mock_response.json.return_value = {"responseData": {"translatedText": "Тестовая цитата"}}
+        mock_session = Mock()
+        mock_session.request.return_value = mock_response
+
+        with patch('main.QuotesService._pool', Mock(pop=Mock(return_value=quote))), \
+             patch('services.http_client.get_session', return_value=mock_session), \
+             patch('main.TranslatorService._cache', {}), \
+             patch('main.TelegramBot') as mock_telegram_bot_class, \
+             patch('main.ENABLE_IMAGE_GENERATION', False):
+            mock_telegram_bot_class.return_value.send_quote.return_value.results = []
+            send_motivational_quote()
+
+        names = [span.name for span in exporter.spans]
+        assert names[0] == 'send_motivational_quote'
+        assert 'zenquotes.get_random_quote' in names
+        assert 'mymemory.translate' in names
+        assert 'http GET' in names
+        assert len({span.trace_id for span in exporter.spans}) == 1
+
+    def test_outbox_delivery_continues_publish_trace(self, exporter, tmp_path):
+        """Тест записи доставки из очереди отправки в трассировку публикации"""
+        from services.outbox import Outbox
+        outbox = Outbox(str(tmp_path / "outbox.db"))
+        bot = Mock()
+        bot.deliver = tracing.traced('telegram.deliver')(lambda *args: (1, None))
+        try:
+            with tracing.start_trace('publish') as root:
+                outbox.enqueue('post-1', "Цитата", None, ['@channel'])
+            outbox.process_due(bot)
+        finally:
+            outbox.close()
+
+        spans = {span.name: span for span in exporter.spans}
+        assert spans['outbox.deliver'].trace_id == root.trace_id
+        assert spans['outbox.deliver'].parent_id == root.span_id
+        assert spans['outbox.deliver'].attributes['post_id'] == 'post-1'
+        assert spans['telegram.deliver'].parent_id == spans['outbox.deliver'].span_id
+
+    def test_attach_image_continues_publish_trace(self, exporter):
+        """Тест записи отложенного добавления изображения в трассировку публикации"""
+        import contextvars
+        from main import _attach_image_later
+        from services.quotes_service import Quote
+
+        with tracing.start_trace('publish') as root:
+            context = contextvars.copy_context()
+        with patch('main.ImageService.generate_image_from_quote', return_value=None):
+            context.run(_attach_image_later, Mock(), Mock(), Quote("Test quote", "Test Author"), None, float('inf'))
+
+        attach = [span for span in exporter.spans if span.name == 'attach_image']
+        assert len(attach) == 1
+        assert attach[0].trace_id == root.trace_id
+        assert attach[0].parent_id == root.span_id
+
+
+class TestTraceExporters:
+    """Тесты экспортеров трассировок"""
+
+    @pytest.fixture
+    def spans(self):
+        """Фикстура - интервалы одной трассировки"""
+        exporter = ListExporter()
+        tracing.set_exporter(exporter)
+        try:
+            with tracing.start_trace('publish'):
+                with tracing.span('telegram.deliver', chat_id='@channel') as span:
+                    span.add_bytes(2048)
+        finally:
+            tracing.set_exporter(None)
+        return exporter.spans
+
+    def test_jsonl_exporter_rotation(self, tmp_path, spans):
+        """Тест записи интервалов в JSONL-файл с ротацией по размеру"""
+        path = str(tmp_path / "traces.jsonl")
+        exporter = tracing.JsonlExporter(path, max_bytes=1, backup_count=2)
+        for _ in range(4):
+            exporter.export(spans)
+
+        with open(path, encoding='utf-8') as f:
+            lines = [json.loads(line) for line in f]
+        assert [line['name'] for line in lines] == ['publish', 'telegram.deliver']
+        assert lines[1]['attributes'] == {'chat_id': '@channel', 'bytes': 2048}
+        assert os.path.exists(path + ".1")
+        assert os.path.exists(path + ".2")
+        assert not os.path.exists(path + ".3")
+
+    def test_otlp_exporter_to_local_collector(self, tmp_path, spans):
+        """Тест отправки интервалов в формате OTLP/JSON в локальный коллектор"""
+        output_path = str(tmp_path / "collected.jsonl")
+        collector = tracing.LocalCollector(output_path, port=0)
+        collector.start()
+        try:
+            exporter = tracing.OtlpExporter(f"http://127.0.0.1:{collector.port}/v1/traces")
+            exporter.export(spans).result(timeout=5)
+            exporter.close()
+        finally:
+            collector.stop()
+
+        with open(output_path, encoding='utf-8') as f:
+            collected = [json.loads(line) for line in f]
+        assert [span['name'] for span in collected] == ['publish', 'telegram.deliver']
+        assert collected[1]['parentSpanId'] == collected[0]['spanId']
+        assert {'key': 'bytes', 'value': {'intValue': '2048'}} in collected[1]['attributes']
+        assert int(collected[0]['endTimeUnixNano']) >= int(collected[0]['startTimeUnixNano'])
\ No newline at end of file
@@ -0,0 +1,99 @@
+"""
+Tests for TranslationCache
+"""
+import pytest
+from unittest.mock import Mock, patch
+from services.translation_cache import TranslationCache
+from services.translator_service import TranslatorService
+
+
+class TestTranslationCache:
+    """Тесты для постоянного кэша переводов"""
+
+    @pytest.fixture
+    def cache(self, tmp_path):
+        """Фикстура - кэш во временном каталоге"""
+        cache = TranslationCache(str(tmp_path / "translations.sqlite3"), max_entries=3)
+        yield cache
+        cache.close()
+
+    def test_get_set(self, cache):
+        """Тест сохранения и получения перевода"""
+        assert cache.get("Hello", "en", "ru") is None
+        cache.set("Hello", "en", "ru", "Привет")
+
+        assert cache.get("Hello", "en", "ru") == "Привет"
+        # Другая языковая пара - другой ключ
+        assert cache.get("Hello", "en", "fr") is None
+        assert cache.stats() == {'hits': 1, 'misses': 2, 'size': 1}
+
+    def test_eviction_by_size(self, cache):
+        """Тест вытеснения давно использованных записей при превышении размера"""
+        with patch('services.translation_cache.time.time', side_effect=[1, 2, 3, 4, 5]):
+            cache.set("one", "en", "ru", "один")
+            cache.set("two", "en", "ru", "два")
+            cache.set("three", "en", "ru", "три")
+            # Обращение к "one" делает её самой свежей
+            assert cache.get("one", "en", "ru") == "один"
+            cache.set("four", "en", "ru", "четыре")
+
+        assert len(cache) == 3
+        assert cache.get("two", "en", "ru") is None
+        assert cache.get("one", "en", "ru") == "один"
+
+    def test_survives_reopen(self, tmp_path):
+        """Тест сохранения переводов между перезапусками"""
+        db_path = str(tmp_path / "translations.sqlite3")
+        cache = TranslationCache(db_path)
+        cache.set("Stay hungry", "en", "ru", "Оставайтесь голодными")
+        cache.close()
+
+        reopened = TranslationCache(db_path)
+        assert reopened.get("Stay hungry", "en", "ru") == "Оставайтесь голодными"
+        reopened.close()
+
+
+class TestTranslatorServicePersistentCache:
+    """Тесты двухуровневого кэша в TranslatorService"""
+
+    @pytest.fixture(autouse=True)
+    def persistent_cache(self, tmp_path):
+        """Подключаем постоянный кэш на время теста"""
+        TranslatorService._cache.clear()
+        cache = TranslationCache(str(tmp_path / "translations.sqlite3"))
+        TranslatorService.set_persistent_cache(cache)
+        yield cache
+        TranslatorService.set_persistent_cache(None)
+        TranslatorService._cache.clear()
+        cache.close()
+
+    def test_cold_start_served_from_persistent_cache(self, persistent_cache):
+        """Тест выдачи перевода из постоянного кэша после очистки кэша в памяти"""
+        mock_response = Mock()
+        mock_response.json.return_value = {
+            "responseStatus": 200,
+            "responseData": {"translatedText": "Постоянный перевод"}
+        }
+
+        with patch('services.translator_service.http_client.get', return_value=mock_response) as mock_get:
+            assert TranslatorService.translate("Persistent translation") == "Постоянный перевод"
+            # Имитируем перезапуск процесса
+            TranslatorService._cache.clear()
+            assert TranslatorService.translate("Persistent translation") == "Постоянный перевод"
+
+            mock_get.assert_called_once()
+
+        assert persistent_cache.hits == 1
+        stats = TranslatorService.get_cache_stats()
+        assert stats['persistent']['size'] == 1
+        assert stats['memory']['size'] == 1
+
+    def test_failed_translation_not_cached(self, persistent_cache):
+        """Тест того, что ошибочный ответ API не попадает в постоянный кэш"""
+        mock_response = Mock()
+        mock_response.json.return_value = {"responseStatus": 403}
+
+        with patch('services.translator_service.http_client.get', return_value=mock_response):
+            assert TranslatorService.translate("Not cached") == "Not cached"
+
+        assert len(persistent_cache) == 0
\ No newline at end of file
@@ -30,7 +30,7 @@ class TestTranslatorService:
         }
         
         # Патчим метод requests.get, чтобы он возвращал наш мок
-        with patch('services.translator_service.requests.get', return_value=mock_response) as mock_get:
+        with patch('services.translator_service.http_client.get', return_value=mock_response) as mock_get:
             translated_text = TranslatorService.translate("Test translation")
             
             # Проверяем, что requests.get был вызван с правильными параметрами
@@ -53,7 +53,7 @@ class TestTranslatorService:
         }
         
         # Патчим метод requests.get, чтобы он возвращал наш мок
-        with patch('services.translator_service.requests.get', return_value=mock_response) as mock_get:
+        with patch('services.translator_service.http_client.get', return_value=mock_response) as mock_get:
             # Первый вызов - запрос к API
             translated_text1 = TranslatorService.translate("Cached translation")
             # Второй вызов - должен использовать кэш
@@ -88,7 +88,7 @@ class TestTranslatorService:
         }
         
         # Патчим метод requests.get, чтобы он возвращал разные моки
-        with patch('services.translator_service.requests.get', side_effect=[mock_response1, mock_response2]) as mock_get:
+        with patch('services.translator_service.http_client.get', side_effect=[mock_response1, mock_response2]) as mock_get:
             # Перевод с английского на русский
             ru_translated = TranslatorService.translate("Test", source_lang='en', target_lang='ru')
             # Перевод с русского на французский
@@ -111,7 +111,7 @@ class TestTranslatorService:
         # Модифицируем тест так, чтобы он соответствовал реальной реализации
         # Необходимо дополнительно замокать запрос, так как в реальном коде
         # нет отдельной проверки на пустую строку перед отправкой запроса
-        with patch('services.translator_service.requests.get') as mock_get:
+        with patch('services.translator_service.http_client.get') as mock_get:
             # Настраиваем мок для возврата ответа
             mock_response = Mock()
             mock_response.json.return_value = {
@@ -133,7 +133,7 @@ class TestTranslatorService:
             assert "NO QUERY SPECIFIED" in result
             
         # Тестируем строку из одного пробела с помощью патча
-        with patch('services.translator_service.requests.get') as mock_get:
+        with patch('services.translator_service.http_client.get') as mock_get:
             # Настраиваем мок
             mock_response = Mock()
             mock_response.json.return_value = {
@@ -164,7 +164,7 @@ class TestTranslatorService:
         }
         
         # Патчим метод requests.get, чтобы он возвращал наш мок
-        with patch('services.translator_service.requests.get', return_value=mock_response) as mock_get:
+        with patch('services.translator_service.http_client.get', return_value=mock_response) as mock_get:
             translated_text = TranslatorService.translate("Test translation")
             
             # Проверяем, что запрос был отправлен
@@ -176,7 +176,7 @@ class TestTranslatorService:
     def test_translate_http_error(self):
         """Тест обработки HTTP ошибки при переводе"""
         # Патчим метод requests.get, чтобы он вызывал исключение RequestException
-        with patch('services.translator_service.requests.get', side_effect=requests.RequestException("HTTP Error")) as mock_get:
+        with patch('services.translator_service.http_client.get', side_effect=requests.RequestException("HTTP Error")) as mock_get:
             translated_text = TranslatorService.translate("Test translation")
             
             # Проверяем, что запрос был отправлен
@@ -188,7 +188,7 @@ class TestTranslatorService:
     def test_translate_network_error(self):
         """Тест обработки сетевой ошибки (ConnectionError)"""
         # Патчим метод requests.get, чтобы он вызывал исключение ConnectionError
-        with patch('services.translator_service.requests.get', side_effect=requests.ConnectionError("Connection Error")) as mock_get:
+        with patch('services.translator_service.http_client.get', side_effect=requests.ConnectionError("Connection Error")) as mock_get:
             translated_text = TranslatorService.translate("Test translation")
             
             # Проверяем, что запрос был отправлен
@@ -200,7 +200,7 @@ class TestTranslatorService:
     def test_translate_timeout_error(self):
         """Тест обработки таймаута запроса"""
         # Патчим метод requests.get, чтобы он вызывал исключение Timeout
-        with patch('services.translator_service.requests.get', side_effect=requests.Timeout("Request timed out")) as mock_get:
+        with patch('services.translator_service.http_client.get', side_effect=requests.Timeout("Request timed out")) as mock_get:
             translated_text = TranslatorService.translate("Test translation")
             
             # Проверяем, что запрос был отправлен
@@ -221,7 +221,7 @@ class TestTranslatorService:
         }
         
         # Патчим метод requests.get, чтобы он возвращал наш мок
-        with patch('services.translator_service.requests.get', return_value=mock_response) as mock_get:
+        with patch('services.translator_service.http_client.get', return_value=mock_response) as mock_get:
             translated_text = TranslatorService.translate("Test translation")
             
             # Проверяем, что запрос был отправлен
@@ -244,7 +244,7 @@ class TestTranslatorService:
         }
         
         # Патчим метод requests.get, чтобы он возвращал наш мок
-        with patch('services.translator_service.requests.get', return_value=mock_response) as mock_get:
+        with patch('services.translator_service.http_client.get', return_value=mock_response) as mock_get:
             translated_text = TranslatorService.translate("Test translation")
             
             # Проверяем, что запрос был отправлен
@@ -267,7 +267,7 @@ class TestTranslatorService:
         }
         
         # Патчим метод requests.get, чтобы он возвращал наш мок
-        with patch('services.translator_service.requests.get', return_value=mock_response) as mock_get:
+        with patch('services.translator_service.http_client.get', return_value=mock_response) as mock_get:
             # Патчим MYMEMORY_EMAIL, чтобы проверить его использование в запросе
             with patch('services.translator_service.MYMEMORY_EMAIL', 'test@example.com'):
                 translated_text = TranslatorService.translate("Test translation with email")
@@ -279,4 +279,109 @@ class TestTranslatorService:
                 assert mock_get.call_args[1]['params']['de'] == 'test@example.com'
                 
                 # Проверяем результат перевода
-                assert translated_text == "Тестовый перевод с email" 
\ No newline at end of file
+                assert translated_text == "Тестовый перевод с email" 
+    
+    def test_translate_many_batches_and_preserves_order(self):
+        """Тест пакетного перевода: дедупликация, кэш и порядок результатов"""
+        TranslatorService._cache["en:ru:Cached"] = "Из кэша"
+        
+        mock_response = Mock()
+        mock_response.json.return_value = {
+            "responseStatus": 200,
+            "responseData": {
+                "translatedText": "Первый\n Второй"
+            }
+        }
+        
+        with patch('services.translator_service.http_client.get', return_value=mock_response) as mock_get:
+            result = TranslatorService.translate_many(["First", "Cached", "Second", "First"])
+            
+            # Оба промаха упакованы в один запрос
+            mock_get.assert_called_once()
+            assert mock_get.call_args[1]['params']['q'] == "First\nSecond"
+            
+            # Результаты возвращаются в порядке входных текстов
+            assert result == ["Первый", "Из кэша", "Второй", "Первый"]
+            
+            # Переводы сохранены в кэш по отдельности
+            assert TranslatorService.translate("Second") == "Второй"
+            mock_get.assert_called_once()
+    
+    def test_translate_many_split_mismatch_falls_back(self):
+        """Тест перевода по одному, если пакетный ответ не удалось разделить"""
+        batch_response = Mock()
+        batch_response.json.return_value = {
+            "responseStatus": 200,
+            "responseData": {"translatedText": "Склеенный перевод"}
+        }
+        first_response = Mock()
+        first_response.json.return_value = {"responseData": {"translatedText": "Один"}}
+        second_response = Mock()
+        second_response.json.return_value = {"responseData": {"translatedText": "Два"}}
+        
+        with patch('services.translator_service.http_client.get',
+                   side_effect=[batch_response, first_response, second_response]) as mock_get:
+            result = TranslatorService.translate_many(["One", "Two"])
+            
+            assert mock_get.call_count == 3
+            assert result == ["Один", "Два"]
+    
+    def test_translate_many_respects_query_length(self):
+        """Тест разбиения на пакеты по ограничению длины запроса"""
+        batches = TranslatorService._pack_batches(["a" * 6, "b" * 6, "c" * 6, "multi\nline"], max_length=13)
+        
+        assert batches == [["a" * 6, "b" * 6], ["multi\nline"], ["c" * 6]]
+    
+    def test_translate_many_api_error_returns_original(self):
+        """Тест возврата исходных текстов при ошибке API"""
+        with patch('services.translator_service.http_client.get', side_effect=requests.RequestException("HTTP Error")):
+            result = TranslatorService.translate_many(["One", "Two"])
+            
+            assert result == ["One", "Two"]
+    
+    def test_translate_many_concurrent_cache_access(self):
+        """Тест согласованности кэша и счетчиков при параллельных пакетах и переводах"""
+        from cachetools import TTLCache
+        from concurrent.futures import ThreadPoolExecutor
+        texts = [f"multi\nline {i}" for i in range(40)]
+
+        def fake_get(url, params=None, **kwargs):
+            response = Mock()
+            response.json.return_value = {"responseData": {"translatedText": f"RU {params['q']}"}}
+            return response
+
+        with patch.object(TranslatorService, '_cache', TTLCache(maxsize=1000, ttl=86400)), \
+                patch.object(TranslatorService, '_cache_hits', 0), \
+                patch.object(TranslatorService, '_cache_misses', 0), \
+                patch('services.translator_service.TRANSLATION_MAX_CONCURRENCY', 8), \
+                patch('services.translator_service.http_client.get', side_effect=fake_get):
+            # Тексты с переводом строки не упаковываются вместе - каждый идет отдельным пакетом
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                results = list(executor.map(lambda _: TranslatorService.translate_many(texts), range(4)))
+
+            assert all(result == [f"RU {text}" for text in texts] for result in results)
+            assert TranslatorService.get_cache_stats()['memory']['size'] == 40
+
+            # Каждое попадание в кэш учтено ровно один раз
+            hits_before = TranslatorService._cache_hits
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                list(executor.map(lambda text: TranslatorService.translate(text), texts * 5))
+            assert TranslatorService._cache_hits - hits_before == 200
+    
+    def test_translate_quota_exceeded_opens_breaker(self):
+        """Тест отказа от запросов к MyMemory до конца паузы после исчерпания квоты"""
+        from utils.circuit_breaker import get_breaker, STATE_OPEN
+        mock_response = Mock()
+        mock_response.json.return_value = {
+            "responseStatus": 429,
+            "responseData": {
+                "translatedText": "MYMEMORY WARNING: YOU USED ALL AVAILABLE FREE TRANSLATIONS FOR TODAY"
+            }
+        }
+        
+        with patch('services.translator_service.http_client.get', return_value=mock_response):
+            assert TranslatorService.translate("Quota test") == "Quota test"
+        
+        assert get_breaker('mymemory').state == STATE_OPEN
+        # Предупреждение о квоте не попадает в кэш как перевод
+        assert "en:ru:Quota test" not in TranslatorService._cache
\ No newline at end of file
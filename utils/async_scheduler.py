@@ -0,0 +1,141 @@
+import asyncio
+import contextvars
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from config.config import MISFIRE_GRACE_SECONDS, JOB_COALESCE, JOB_TIMEOUT_SECONDS
+from utils.scheduler import Scheduler, MAX_IDLE_SECONDS
+from utils.job_executor import CancelToken, JobCancelled, _current_token
+
+logger = logging.getLogger(__name__)
+
+# Сколько секунд при остановке ждать выполняемые задания, прежде чем отменить их
+STOP_TIMEOUT_SECONDS = 30
+
+
+class AsyncScheduler(Scheduler):
+    """
+    Событийный планировщик на цикле asyncio
+
+    Задания-корутины запускаются задачами цикла, поэтому одновременно наступившие
+    слоты разных чатов и фоновые задачи обслуживаются одним потоком; обычные функции
+    выполняются в потоке исполнителя цикла. Слот, задание которого еще выполняется,
+    пропускается (как JOB_OVERLAP_POLICY=skip в JobExecutor). Задание, превысившее
+    timeout, отменяется так же, как в JobExecutor: его токен отмены взводится, а слот
+    освобождается, не дожидаясь зависшего этапа.
+    """
+
+    def __init__(self, job_function, job_store=None, misfire_grace=MISFIRE_GRACE_SECONDS, coalesce=JOB_COALESCE,
+                 timeout=JOB_TIMEOUT_SECONDS, stop_timeout=STOP_TIMEOUT_SECONDS):
+        """
+        :param job_function: Корутинная или обычная функция, выполняемая по расписанию
+        :param job_store: JobStore для учета запусков и выполнения пропущенных слотов после перезапуска
+        :param misfire_grace: Максимальное опоздание пропущенного слота в секундах, при котором он еще выполняется
+        :param coalesce: Выполнять одновременно наступившие слоты одним запуском
+        :param timeout: Жесткий таймаут задания в секундах (0 или None - без таймаута)
+        :param stop_timeout: Сколько секунд при остановке ждать выполняемые задания
+        """
+        self.timeout = timeout or None
+        self.stop_timeout = stop_timeout
+        self.timeouts = 0
+        self._loop = None
+        self._async_wakeup = None
+        self._pool = None
+        self._running = {}
+        super().__init__(
+            job_function, event_driven=True, job_store=job_store, misfire_grace=misfire_grace, coalesce=coalesce
+        )
+
+    def _notify(self):
+        """
+        Будит цикл планировщика (безопасно вызывать из другого потока и обработчика сигнала)
+        """
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._async_wakeup.set)
+
+    def stop(self):
+        super().stop()
+        self._notify()
+
+    def reload(self, schedule=None, timezone=None):
+        super().reload(schedule, timezone)
+        self._notify()
+
+    def _run_job(self, key):
+        """
+        Запускает задание слота задачей цикла asyncio
+        """
+        if key in self._running:
+            logger.warning(f"Задание для слота {key} еще выполняется, запуск пропущен")
+            return
+        task = self._loop.create_task(self._execute(key))
+        self._running[key] = task
+        task.add_done_callback(lambda _, key=key: self._running.pop(key, None))
+
+    async def _execute(self, key):
+        token = CancelToken()
+        # Задача выполняется в своей копии контекста, поэтому токен виден только ее заданию
+        _current_token.set(token)
+        if asyncio.iscoroutinefunction(self.job_function):
+            job = self.job_function()
+        else:
+            # Поток задания получает контекст задачи: слот расписания и токен отмены
+            context = contextvars.copy_context()
+            job = self._loop.run_in_executor(self._pool, context.run, self.job_function)
+        try:
+            await asyncio.wait_for(job, self.timeout)
+        except asyncio.TimeoutError:
+            token.cancel()
+            self.timeouts += 1
+            logger.error(f"Задание для слота {key} превысило таймаут {self.timeout} с и отменено")
+        except asyncio.CancelledError:
+            token.cancel()
+            raise
+        except JobCancelled:
+            logger.warning(f"Задание для слота {key} прервано после таймаута")
+        except Exception as e:
+            logger.error(f"Ошибка при выполнении задания для слота {key}: {e}")
+
+    async def run(self):
+        """
+        Событийный цикл: ждет ближайшего запуска, просыпаясь раньше при остановке
+        или перезагрузке расписания; при остановке дожидается выполняемых заданий
+        """
+        self._loop = asyncio.get_running_loop()
+        self._async_wakeup = asyncio.Event()
+        # Собственный пул: зависший поток задания не задерживает завершение цикла
+        self._pool = ThreadPoolExecutor(thread_name_prefix='async-job')
+        try:
+            while not self._stop_requested:
+                self._async_wakeup.clear()
+                if self._reload_requested:
+                    self._reload_requested = False
+                    self._apply_reload()
+                    logger.info(f"Расписание перезагружено. Следующее выполнение: {self._get_next_run_time()}")
+
+                self._run_due_jobs()
+
+                idle = self._seconds_until_next_run()
+                timeout = MAX_IDLE_SECONDS if idle is None else min(max(idle, 0.0), MAX_IDLE_SECONDS)
+                try:
+                    await asyncio.wait_for(self._async_wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+
+                if idle is None or idle > MAX_IDLE_SECONDS:
+                    logger.info(f"Планировщик активен. Следующее выполнение: {self._get_next_run_time()}")
+            if self._running:
+                _, pending = await asyncio.wait(list(self._running.values()), timeout=self.stop_timeout)
+                if pending:
+                    logger.warning(f"Задания не завершились за {self.stop_timeout} с после остановки и отменены")
+                    for task in pending:
+                        task.cancel()
+                    await asyncio.gather(*pending, return_exceptions=True)
+        finally:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+            self._loop = None
+        logger.info("Планировщик остановлен")
+
+    def _run_event_loop(self):
+        asyncio.run(self.run())
\ No newline at end of file
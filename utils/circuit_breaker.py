@@ -0,0 +1,169 @@
+import logging
+import threading
+import time
+from collections import deque
+import requests
+from config.config import (
+    CIRCUIT_FAILURE_RATE, CIRCUIT_WINDOW_SIZE, CIRCUIT_MIN_CALLS, CIRCUIT_COOLDOWN_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+STATE_CLOSED = 'closed'
+STATE_OPEN = 'open'
+STATE_HALF_OPEN = 'half_open'
+
+# Предохранители внешних сервисов по имени (создаются при первом обращении)
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """
+    Запрос отклонен без обращения к сети: предохранитель сервиса разомкнут
+
+    Наследуется от requests.ConnectionError, поэтому сервисы переходят к своим
+    запасным вариантам так же, как при недоступности сервиса.
+    """
+
+
+class CircuitBreaker:
+    """
+    Предохранитель внешнего сервиса
+
+    В замкнутом состоянии пропускает запросы и хранит результаты последних
+    window_size запросов. Если доля ошибок среди них достигает failure_rate,
+    предохранитель размыкается и в течение cooldown секунд отклоняет запросы
+    без обращения к сети. Затем пропускается один пробный запрос: успех замыкает
+    предохранитель, ошибка снова размыкает его.
+    """
+
+    def __init__(self, name, failure_rate=CIRCUIT_FAILURE_RATE / 100.0, window_size=CIRCUIT_WINDOW_SIZE,
+                 min_calls=CIRCUIT_MIN_CALLS, cooldown=CIRCUIT_COOLDOWN_SECONDS, clock=None):
+        """
+        :param name: Имя сервиса (для логов)
+        :param failure_rate: Доля ошибок, при которой предохранитель размыкается (0..1)
+        :param window_size: Количество последних запросов, по которым считается доля ошибок
+        :param min_calls: Минимальное количество запросов в окне для размыкания
+        :param cooldown: Время в разомкнутом состоянии в секундах
+        :param clock: Функция монотонного времени (по умолчанию time.monotonic)
+        """
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.cooldown = cooldown
+        self.clock = clock or time.monotonic
+        self.rejected = 0
+        self._results = deque(maxlen=window_size)
+        self._state = STATE_CLOSED
+        self._opened_at = 0.0
+        self._trial_in_progress = False
+        self._trial_started_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == STATE_OPEN and self.clock() - self._opened_at >= self.cooldown:
+                return STATE_HALF_OPEN
+            return self._state
+
+    def allow_request(self):
+        """
+        Проверяет, можно ли выполнить запрос к сервису
+
+        :return: True, если запрос разрешен
+        """
+        with self._lock:
+            if self._state == STATE_OPEN and self.clock() - self._opened_at >= self.cooldown:
+                self._state = STATE_HALF_OPEN
+                self._trial_in_progress = False
+                logger.info(f"Предохранитель {self.name}: пробный запрос после паузы")
+            if self._state == STATE_CLOSED:
+                return True
+            # Пробный запрос без результата (например, прерванный) не блокирует следующий дольше паузы
+            if self._state == STATE_HALF_OPEN and (
+                    not self._trial_in_progress or self.clock() - self._trial_started_at >= self.cooldown):
+                self._trial_in_progress = True
+                self._trial_started_at = self.clock()
+                return True
+            self.rejected += 1
+            return False
+
+    def before_request(self):
+        """
+        Отклоняет запрос исключением CircuitOpenError, если предохранитель разомкнут
+        """
+        if not self.allow_request():
+            raise CircuitOpenError(f"Сервис {self.name} временно недоступен (предохранитель разомкнут)")
+
+    def record_success(self):
+        with self._lock:
+            if self._state == STATE_HALF_OPEN:
+                self._state = STATE_CLOSED
+                self._results.clear()
+                self._trial_in_progress = False
+                logger.info(f"Предохранитель {self.name} замкнут: сервис снова доступен")
+            self._results.append(True)
+
+    def record_failure(self):
+        with self._lock:
+            if self._state == STATE_HALF_OPEN:
+                self._open("пробный запрос не удался")
+                return
+            self._results.append(False)
+            failures = self._results.count(False)
+            if (self._state == STATE_CLOSED and len(self._results) >= self.min_calls
+                    and failures >= self.failure_rate * len(self._results)):
+                self._open(f"ошибок {failures} из {len(self._results)}")
+
+    def trip(self, reason):
+        """
+        Размыкает предохранитель независимо от доли ошибок (например, при исчерпании квоты)
+        """
+        with self._lock:
+            self._open(reason)
+
+    def _open(self, reason):
+        self._state = STATE_OPEN
+        self._opened_at = self.clock()
+        self._trial_in_progress = False
+        logger.warning(f"Предохранитель {self.name} разомкнут на {self.cooldown} с: {reason}")
+
+    def reset(self):
+        with self._lock:
+            self._state = STATE_CLOSED
+            self._results.clear()
+            self._trial_in_progress = False
+            self.rejected = 0
+
+
+def get_breaker(name):
+    """
+    Возвращает общий предохранитель сервиса, создавая его при первом обращении
+
+    :param name: Имя сервиса
+    :return: Объект CircuitBreaker
+    """
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name)
+        return breaker
+
+
+def get_breaker_states():
+    """
+    Возвращает состояние и количество отклоненных запросов каждого предохранителя
+    """
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: {'state': breaker.state, 'rejected': breaker.rejected} for breaker in breakers}
+
+
+def reset_breakers():
+    """
+    Удаляет все предохранители: следующие запросы начнут с замкнутых предохранителей
+    """
+    with _breakers_lock:
+        _breakers.clear()
\ No newline at end of file
@@ -0,0 +1,73 @@
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class ConfigWatcher:
+    """
+    Следит за изменением файла конфигурации и вызывает обработчик
+
+    Проверяет время изменения и размер файла с заданным интервалом в фоновом потоке.
+    """
+
+    def __init__(self, path, callback, interval=5):
+        """
+        :param path: Путь к отслеживаемому файлу
+        :param callback: Функция без аргументов, вызываемая после изменения файла
+        :param interval: Интервал проверки в секундах
+        """
+        self.path = str(path)
+        self.callback = callback
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._signature = self._stat()
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def check(self):
+        """
+        Проверяет файл и вызывает обработчик, если он изменился
+
+        :return: True, если изменение обнаружено
+        """
+        signature = self._stat()
+        if signature == self._signature:
+            return False
+        self._signature = signature
+        logger.info(f"Обнаружено изменение файла конфигурации {self.path}")
+        try:
+            self.callback()
+        except Exception as e:
+            logger.error(f"Ошибка при перезагрузке конфигурации: {e}")
+        return True
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.check()
+
+    def start(self):
+        """
+        Запускает фоновую проверку файла
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='config-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Останавливает фоновую проверку файла
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
\ No newline at end of file
@@ -0,0 +1,130 @@
+import contextvars
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Этапы деградации публикации при нехватке времени
+DEGRADE_SKIP_IMAGE_RETRY = 'skip_image_retry'
+DEGRADE_SKIP_IMAGE = 'skip_image'
+DEGRADE_SKIP_TRANSLATION = 'skip_translation'
+
+# Крайний срок текущей публикации (доступен всем этапам, выполняемым в потоке задания)
+_current_deadline = contextvars.ContextVar('publish_deadline', default=None)
+
+_degradations = Counter()
+_degradations_lock = threading.Lock()
+
+
+class DeadlineExceeded(requests.Timeout):
+    """
+    Время на публикацию истекло до начала запроса
+
+    Наследуется от requests.Timeout, поэтому сервисы обрабатывают его так же,
+    как обычный таймаут запроса.
+    """
+
+
+class Deadline:
+    """
+    Крайний срок публикации по time.monotonic
+    """
+
+    def __init__(self, budget, clock=None):
+        """
+        :param budget: Время на публикацию в секундах
+        :param clock: Функция монотонного времени (по умолчанию time.monotonic)
+        """
+        self.clock = clock or time.monotonic
+        self.expires_at = self.clock() + budget
+
+    def remaining(self):
+        return self.expires_at - self.clock()
+
+    @property
+    def expired(self):
+        return self.remaining() <= 0
+
+
+@contextmanager
+def deadline_scope(budget, clock=None):
+    """
+    Задает крайний срок для всех запросов внутри блока
+
+    :param budget: Время на публикацию в секундах (0 или None - без ограничения)
+    :return: Объект Deadline или None
+    """
+    deadline = Deadline(budget, clock) if budget else None
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def remaining():
+    """
+    :return: Оставшееся время текущей публикации в секундах или None вне крайнего срока
+    """
+    deadline = _current_deadline.get()
+    return deadline.remaining() if deadline is not None else None
+
+
+def has_budget(seconds):
+    """
+    Проверяет, что до крайнего срока осталось не меньше seconds секунд
+
+    Вне крайнего срока (например, в тестах) всегда возвращает True.
+    """
+    left = remaining()
+    return left is None or left >= seconds
+
+
+def cap_timeout(timeout):
+    """
+    Ограничивает таймаут запроса оставшимся временем публикации
+
+    :param timeout: Таймаут requests (число или кортеж (connect, read))
+    :return: Таймаут, не превышающий оставшегося времени
+    :raises DeadlineExceeded: Если время уже истекло
+    """
+    left = remaining()
+    if left is None:
+        return timeout
+    if left <= 0:
+        raise DeadlineExceeded("Время на публикацию истекло")
+    if timeout is None:
+        return left
+    if isinstance(timeout, tuple):
+        return tuple(left if value is None else min(value, left) for value in timeout)
+    return min(timeout, left)
+
+
+def record_degradation(step):
+    """
+    Фиксирует отказ от этапа публикации из-за нехватки времени
+
+    :param step: Идентификатор этапа (DEGRADE_*)
+    """
+    with _degradations_lock:
+        _degradations[step] += 1
+    left = remaining()
+    left_text = f"{left:.1f} с" if left is not None else "без ограничения"
+    logger.warning(f"Деградация публикации: {step} (осталось времени: {left_text})")
+
+
+def get_degradation_stats():
+    """
+    Возвращает количество деградаций по этапам с момента запуска
+    """
+    with _degradations_lock:
+        return dict(_degradations)
+
+
+def reset_degradation_stats():
+    with _degradations_lock:
+        _degradations.clear()
\ No newline at end of file
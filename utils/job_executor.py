@@ -0,0 +1,235 @@
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from config.config import JOB_WORKERS, JOB_OVERLAP_POLICY, JOB_MAX_CONCURRENT, JOB_TIMEOUT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+OVERLAP_SKIP = 'skip'
+OVERLAP_QUEUE = 'queue'
+# Сколько последних запусков учитывается в статистике
+JOB_HISTORY_SIZE = 100
+
+# Токен отмены текущего задания (доступен всем этапам, выполняемым в потоке задания)
+_current_token = contextvars.ContextVar('job_cancel_token', default=None)
+
+
+class JobCancelled(Exception):
+    """
+    Задание отменено по таймауту
+    """
+
+
+class CancelToken:
+    """
+    Кооперативная отмена задания: этапы проверяют токен перед началом работы
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+
+def check_cancelled():
+    """
+    Прерывает текущее задание исключением JobCancelled, если оно отменено
+
+    Вне задания (например, в тестах) ничего не делает.
+    """
+    token = _current_token.get()
+    if token is not None and token.cancelled:
+        raise JobCancelled("Задание отменено по таймауту")
+
+
+class JobRun:
+    """
+    Сведения об одном запуске задания
+    """
+
+    def __init__(self, key, submitted_at):
+        self.key = key
+        self.submitted_at = submitted_at
+        self.started_at = None
+        self.finished_at = None
+        self.status = 'pending'
+        self.token = CancelToken()
+
+    @property
+    def queue_wait(self):
+        return None if self.started_at is None else self.started_at - self.submitted_at
+
+    @property
+    def duration(self):
+        return None if self.finished_at is None else self.finished_at - self.started_at
+
+
+class JobExecutor:
+    """
+    Выполняет задания планировщика в пуле потоков
+
+    Одновременно выполняется не больше max_concurrent заданий. Если лимит исчерпан,
+    новое задание пропускается (политика skip) или ждет в очереди (политика queue).
+    Задание, превысившее timeout, отменяется: его токен отмены взводится, следующие
+    этапы прерываются на check_cancelled, а место для следующего запуска освобождается
+    сразу, не дожидаясь зависшего этапа.
+    """
+
+    def __init__(self, max_workers=JOB_WORKERS, overlap_policy=JOB_OVERLAP_POLICY,
+                 max_concurrent=JOB_MAX_CONCURRENT, timeout=JOB_TIMEOUT_SECONDS):
+        """
+        :param max_workers: Количество потоков пула
+        :param overlap_policy: Что делать с заданием при исчерпанном лимите: 'skip' или 'queue'
+        :param max_concurrent: Максимальное число одновременно выполняемых заданий
+        :param timeout: Жесткий таймаут задания в секундах (0 или None - без таймаута)
+        """
+        if overlap_policy not in (OVERLAP_SKIP, OVERLAP_QUEUE):
+            raise ValueError(f"Неизвестная политика перекрытия заданий: {overlap_policy}")
+        self.overlap_policy = overlap_policy
+        self.max_concurrent = max(1, max_concurrent)
+        self.timeout = timeout or None
+        # Зависшие задания продолжают занимать поток, поэтому потоков больше, чем слотов
+        self._pool = ThreadPoolExecutor(
+            max_workers=max(max_workers, self.max_concurrent + 1), thread_name_prefix='job'
+        )
+        self._lock = threading.Lock()
+        self._active = set()
+        self._pending = deque()
+        self._history = deque(maxlen=JOB_HISTORY_SIZE)
+        self.skipped = 0
+        self.timeouts = 0
+
+    def submit(self, job_function, key=None):
+        """
+        Передает задание на выполнение с учетом политики перекрытия
+
+        :param job_function: Функция задания без аргументов
+        :param key: Идентификатор запуска для логов (например, слот расписания)
+        :return: Объект JobRun или None, если задание пропущено
+        """
+        run = JobRun(key, time.monotonic())
+        # Задание выполняется в копии контекста вызывающего потока (например, слота расписания)
+        context = contextvars.copy_context()
+        with self._lock:
+            if len(self._active) < self.max_concurrent:
+                self._start(run, job_function, context)
+            elif self.overlap_policy == OVERLAP_QUEUE:
+                self._pending.append((run, job_function, context))
+                logger.info(f"Задание {key} поставлено в очередь: выполняется {len(self._active)}")
+            else:
+                self.skipped += 1
+                run.status = 'skipped'
+                self._history.append(run)
+                logger.warning(f"Задание {key} пропущено: предыдущий запуск еще выполняется")
+                return None
+        return run
+
+    def _start(self, run, job_function, context):
+        """
+        Запускает задание в пуле (вызывается под блокировкой)
+        """
+        self._active.add(run)
+        run.started_at = time.monotonic()
+        run.status = 'running'
+        if self.timeout:
+            timer = threading.Timer(self.timeout, self._on_timeout, args=(run,))
+            timer.daemon = True
+            timer.start()
+        else:
+            timer = None
+        self._pool.submit(context.run, self._execute, run, job_function, timer)
+
+    def _execute(self, run, job_function, timer):
+        _current_token.set(run.token)
+        status = 'ok'
+        try:
+            job_function()
+        except JobCancelled:
+            status = 'cancelled'
+            logger.warning(f"Задание {run.key} прервано после таймаута")
+        except Exception as e:
+            status = 'error'
+            logger.error(f"Ошибка при выполнении задания {run.key}: {e}")
+        finally:
+            if timer is not None:
+                timer.cancel()
+            self._finish(run, status)
+
+    def _on_timeout(self, run):
+        """
+        Отменяет задание, превысившее таймаут, и освобождает его место
+        """
+        run.token.cancel()
+        with self._lock:
+            if run not in self._active:
+                return
+            self.timeouts += 1
+            logger.error(f"Задание {run.key} превысило таймаут {self.timeout} с и отменено")
+            self._release(run, 'timeout')
+
+    def _finish(self, run, status):
+        with self._lock:
+            if run in self._active:
+                self._release(run, status)
+
+    def _release(self, run, status):
+        """
+        Освобождает место задания и запускает ожидающие задания (вызывается под блокировкой)
+        """
+        self._active.discard(run)
+        run.finished_at = time.monotonic()
+        run.status = status
+        self._history.append(run)
+        logger.info(
+            f"Задание {run.key} завершено ({status}): ожидание {run.queue_wait:.3f} с, "
+            f"выполнение {run.duration:.3f} с"
+        )
+        while self._pending and len(self._active) < self.max_concurrent:
+            self._start(*self._pending.popleft())
+
+    @property
+    def active_count(self):
+        with self._lock:
+            return len(self._active)
+
+    @property
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def get_stats(self):
+        """
+        Возвращает статистику последних запусков: число по статусам,
+        среднее и максимальное время ожидания в очереди и выполнения
+        """
+        with self._lock:
+            history = list(self._history)
+        finished = [run for run in history if run.finished_at is not None]
+        waits = [run.queue_wait for run in finished]
+        durations = [run.duration for run in finished]
+        statuses = {}
+        for run in history:
+            statuses[run.status] = statuses.get(run.status, 0) + 1
+        return {
+            'statuses': statuses,
+            'queue_wait_avg': sum(waits) / len(waits) if waits else None,
+            'queue_wait_max': max(waits) if waits else None,
+            'duration_avg': sum(durations) / len(durations) if durations else None,
+            'duration_max': max(durations) if durations else None,
+        }
+
+    def shutdown(self, wait=True):
+        """
+        Отменяет ожидающие задания и останавливает пул потоков
+        """
+        with self._lock:
+            self._pending.clear()
+        self._pool.shutdown(wait=wait)
\ No newline at end of file
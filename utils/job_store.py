@@ -0,0 +1,59 @@
+import logging
+import sqlite3
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class JobStore:
+    """
+    Постоянное хранилище состояния слотов расписания в SQLite
+
+    Для каждого слота хранится номинальное время последнего запуска,
+    чтобы после перезапуска процесса можно было выполнить пропущенный слот.
+    """
+
+    def __init__(self, db_path):
+        """
+        :param db_path: Путь к файлу базы данных SQLite
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS slot_runs (
+                slot_key TEXT PRIMARY KEY,
+                last_fired REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def load(self):
+        """
+        Загружает время последнего запуска всех слотов одним запросом
+
+        :return: Словарь {ключ слота: UTC timestamp последнего запуска}
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT slot_key, last_fired FROM slot_runs").fetchall()
+        return dict(rows)
+
+    def record(self, slot_key, fired_at):
+        """
+        Сохраняет номинальное время запуска слота (более раннее время не перезаписывает более позднее)
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO slot_runs (slot_key, last_fired) VALUES (?, ?) "
+                "ON CONFLICT(slot_key) DO UPDATE SET last_fired = MAX(last_fired, excluded.last_fired)",
+                (slot_key, fired_at)
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
\ No newline at end of file
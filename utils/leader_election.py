@@ -0,0 +1,208 @@
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from config.config import LEADER_LEASE_SECONDS, LEADER_HEARTBEAT_SECONDS
+from utils.storage import atomic_write_json, read_json
+
+try:
+    import fcntl
+except ImportError:  # Windows: блокировка файла недоступна, остается только аренда
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderElector:
+    """
+    Выбор единственного ведущего экземпляра через файл аренды на общем томе
+
+    Файл аренды хранит владельца, срок действия и токен ограждения (fencing token),
+    который увеличивается при каждой смене владельца. Чтение и изменение аренды
+    выполняются под advisory-блокировкой (fcntl.flock) отдельного lock-файла.
+    Ведущий продлевает аренду каждые heartbeat_interval секунд; если он перестает
+    это делать, ведомый экземпляр забирает аренду после ее истечения.
+    """
+
+    def __init__(self, lease_path, node_id=None, lease_seconds=LEADER_LEASE_SECONDS,
+                 heartbeat_interval=LEADER_HEARTBEAT_SECONDS):
+        """
+        :param lease_path: Путь к файлу аренды
+        :param node_id: Идентификатор экземпляра (по умолчанию хост, pid и случайный суффикс)
+        :param lease_seconds: Срок действия аренды в секундах
+        :param heartbeat_interval: Интервал продления аренды и попыток захвата в секундах
+        """
+        self.lease_path = lease_path
+        self.lock_path = f"{lease_path}.lock"
+        self.node_id = node_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.lease_seconds = lease_seconds
+        self.heartbeat_interval = heartbeat_interval
+        self.on_elected = None
+        self.on_demoted = None
+        self._token = None
+        # Локальный срок лидерства по монотонным часам (с запасом на один интервал продления)
+        self._valid_until = 0.0
+        self._state_lock = threading.Lock()
+        self._leader_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @contextmanager
+    def _file_lock(self):
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _read_lease(self):
+        lease = read_json(self.lease_path, default=None)
+        return lease if isinstance(lease, dict) else {}
+
+    def try_acquire(self):
+        """
+        Захватывает или продлевает аренду
+
+        :return: True, если экземпляр является ведущим
+        """
+        held_by_other = False
+        try:
+            with self._file_lock():
+                lease = self._read_lease()
+                now = time.time()
+                holder = lease.get('holder')
+                token = int(lease.get('token', 0))
+                if holder != self.node_id and lease.get('expires_at', 0) > now:
+                    acquired = False
+                    held_by_other = True
+                else:
+                    if holder != self.node_id:
+                        # Смена владельца - новый токен ограждения
+                        token += 1
+                    atomic_write_json(self.lease_path, {
+                        'holder': self.node_id,
+                        'token': token,
+                        'expires_at': now + self.lease_seconds
+                    })
+                    acquired = True
+        except OSError as e:
+            logger.error(f"Ошибка при работе с файлом аренды {self.lease_path}: {e}")
+            acquired = False
+
+        if acquired:
+            self._set_leader(token)
+        elif held_by_other or time.monotonic() >= self._valid_until:
+            # При ошибке чтения аренды лидерство сохраняется до истечения локального срока
+            self._set_follower()
+        return acquired
+
+    def _set_leader(self, token):
+        with self._state_lock:
+            self._valid_until = time.monotonic() + self.lease_seconds - self.heartbeat_interval
+            became_leader = self._token != token
+            self._token = token
+        if became_leader:
+            self._leader_event.set()
+            logger.info(f"Экземпляр {self.node_id} стал ведущим (токен {token})")
+            if self.on_elected:
+                self.on_elected(token)
+
+    def _set_follower(self):
+        with self._state_lock:
+            if self._token is None:
+                return
+            self._token = None
+            self._valid_until = 0.0
+        self._leader_event.clear()
+        logger.warning(f"Экземпляр {self.node_id} больше не является ведущим")
+        if self.on_demoted:
+            self.on_demoted()
+
+    @property
+    def is_leader(self):
+        with self._state_lock:
+            return self._token is not None and time.monotonic() < self._valid_until
+
+    @property
+    def fencing_token(self):
+        """
+        Токен ограждения текущего лидерства или None
+        """
+        with self._state_lock:
+            return self._token
+
+    def validate(self, token):
+        """
+        Проверяет по файлу аренды, что токен все еще принадлежит действующему ведущему
+
+        Вызывается непосредственно перед публикацией, чтобы устаревший ведущий
+        (например, после долгой паузы процесса) не опубликовал пост повторно.
+        """
+        if token is None:
+            return False
+        try:
+            with self._file_lock():
+                lease = self._read_lease()
+        except OSError as e:
+            logger.error(f"Ошибка при чтении файла аренды {self.lease_path}: {e}")
+            return False
+        return (
+            lease.get('holder') == self.node_id
+            and lease.get('token') == token
+            and lease.get('expires_at', 0) > time.time()
+        )
+
+    def wait_for_leadership(self, timeout=None):
+        """
+        Ожидает получения лидерства
+
+        :return: True, если экземпляр стал ведущим
+        """
+        return self._leader_event.wait(timeout)
+
+    def release(self):
+        """
+        Досрочно освобождает аренду, чтобы ведомый экземпляр перехватил ее без ожидания
+        """
+        try:
+            with self._file_lock():
+                lease = self._read_lease()
+                if lease.get('holder') == self.node_id:
+                    lease['expires_at'] = 0
+                    atomic_write_json(self.lease_path, lease)
+        except OSError as e:
+            logger.error(f"Ошибка при освобождении аренды {self.lease_path}: {e}")
+        self._set_follower()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self.try_acquire()
+            self._stop_event.wait(self.heartbeat_interval)
+
+    def start(self):
+        """
+        Запускает фоновые попытки захвата и продления аренды
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='leader-election', daemon=True)
+        self._thread.start()
+
+    def stop(self, release=True):
+        """
+        Останавливает продление аренды и при необходимости освобождает ее
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if release:
+            self.release()
\ No newline at end of file
@@ -0,0 +1,300 @@
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# Границы корзин гистограмм длительности в секундах (от быстрых запросов до генерации изображений)
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """
+    Монотонно растущий счетчик с метками
+    """
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labels)
+        return self._values.get(key, 0)
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def collect(self):
+        with self._lock:
+            values = dict(self._values)
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """
+    Гистограмма с фиксированными корзинами и метками
+
+    Наблюдение - поиск корзины bisect и увеличение счетчика под блокировкой,
+    поэтому запись метрик можно оставлять включенной в рабочем режиме.
+    """
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Счетчики корзин (последняя - +Inf), сумма и количество наблюдений
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def get_count(self, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labels)
+        series = self._series.get(key)
+        return series[2] if series else 0
+
+    @contextmanager
+    def time(self, **labels):
+        """
+        Измеряет длительность блока и записывает ее в гистограмму
+        """
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(time.monotonic() - started, **labels)
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def collect(self):
+        with self._lock:
+            series = {key: (list(counts), total, count) for key, (counts, total, count) in self._series.items()}
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total, count) in sorted(series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labels, key, ('le', _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+
+# Длительность этапов публикации (quote, translate, token, image, download, send)
+STAGE_LATENCY = Histogram('motiveminder_stage_duration_seconds', 'Длительность этапов публикации', labels=('stage',))
+# Ошибки внешних сервисов по сервису и коду ответа (или типу исключения)
+UPSTREAM_ERRORS = Counter(
+    'motiveminder_upstream_errors_total', 'Ошибки запросов к внешним сервисам', labels=('service', 'status')
+)
+# Опоздание запуска публикации относительно номинального времени слота
+PUBLISH_LAG = Histogram('motiveminder_publish_lag_seconds', 'Опоздание публикации относительно времени слота')
+
+_metrics = [STAGE_LATENCY, UPSTREAM_ERRORS, PUBLISH_LAG]
+_collectors = []
+_health_checks = {}
+
+
+def register_collector(collector):
+    """
+    Подключает функцию, вычисляющую показатели при каждом запросе /metrics
+
+    :param collector: Функция, возвращающая список кортежей (имя, описание, значение, словарь меток)
+        для метрик типа gauge; значение None пропускается
+    """
+    _collectors.append(collector)
+
+
+def register_health_check(name, check):
+    """
+    Подключает проверку для /healthz
+
+    :param name: Имя проверки
+    :param check: Функция, возвращающая True, если компонент работает
+    """
+    _health_checks[name] = check
+
+
+def timed(stage):
+    """
+    Декоратор: записывает длительность вызова функции как этап публикации
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with STAGE_LATENCY.time(stage=stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_upstream_error(service, status):
+    UPSTREAM_ERRORS.inc(service=service, status=status)
+
+
+def render():
+    """
+    Формирует текст метрик в формате Prometheus
+    """
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.collect())
+    gauges = {}
+    for collector in list(_collectors):
+        try:
+            samples = collector()
+        except Exception as e:
+            logger.warning(f"Ошибка при сборе метрик: {e}")
+            continue
+        for name, documentation, value, labels in samples:
+            if value is not None:
+                gauges.setdefault(name, (documentation, []))[1].append((labels or {}, value))
+    for name, (documentation, samples) in gauges.items():
+        lines.append(f"# HELP {name} {documentation}")
+        lines.append(f"# TYPE {name} gauge")
+        for labels, value in samples:
+            lines.append(f"{name}{_format_labels(tuple(labels), tuple(labels.values()))} {_format_value(value)}")
+    return '\n'.join(lines) + '\n'
+
+
+def check_health():
+    """
+    Выполняет проверки состояния
+
+    :return: Кортеж (все проверки пройдены, словарь результатов по именам)
+    """
+    results = {}
+    for name, check in list(_health_checks.items()):
+        try:
+            results[name] = bool(check())
+        except Exception as e:
+            logger.warning(f"Ошибка проверки состояния {name}: {e}")
+            results[name] = False
+    return all(results.values()), results
+
+
+def reset():
+    """
+    Сбрасывает значения метрик, сборщики и проверки состояния
+    """
+    for metric in _metrics:
+        metric.reset()
+    _collectors.clear()
+    _health_checks.clear()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.path.split('?', 1)[0]
+        if path == '/metrics':
+            self._respond(200, render(), CONTENT_TYPE)
+        elif path == '/healthz':
+            healthy, results = check_health()
+            body = ''.join(f"{name}: {'ok' if ok else 'fail'}\n" for name, ok in sorted(results.items()))
+            self._respond(200 if healthy else 503, body or 'ok\n', 'text/plain; charset=utf-8')
+        else:
+            self._respond(404, 'not found\n', 'text/plain; charset=utf-8')
+
+    def _respond(self, status, body, content_type):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # Запросы сборщика метрик не засоряют журнал
+        pass
+
+
+class MetricsServer:
+    """
+    Встроенный HTTP-сервер с эндпоинтами /metrics и /healthz
+    """
+
+    def __init__(self, host='0.0.0.0', port=80):
+        """
+        :param host: Адрес для входящих соединений
+        :param port: Порт (0 - выбрать свободный)
+        """
+        self.host = host
+        self.port = port
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        """
+        Запускает сервер в фоновом потоке
+
+        :return: True, если сервер запущен
+        """
+        try:
+            self._server = ThreadingHTTPServer((self.host, self.port), _MetricsHandler)
+        except OSError as e:
+            logger.warning(f"Не удалось запустить сервер метрик на порту {self.port}: {e}")
+            return False
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name='metrics-server', daemon=True)
+        self._thread.start()
+        logger.info(f"Сервер метрик запущен на порту {self.port}")
+        return True
+
+    def stop(self):
+        """
+        Останавливает сервер
+        """
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
\ No newline at end of file
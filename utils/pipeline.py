@@ -0,0 +1,144 @@
+import contextvars
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+logger = logging.getLogger(__name__)
+
+# Общий пул потоков для этапов конвейеров (этапы не ждут друг друга внутри потоков пула)
+_stage_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='pipeline')
+
+
+class PipelineError(Exception):
+    """
+    Ошибка в описании конвейера (неизвестная зависимость, повторное имя этапа, цикл)
+    """
+
+
+class Stage:
+    """
+    Этап конвейера: функция и имена этапов, результаты которых она получает
+    """
+
+    def __init__(self, name, func, deps=()):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+
+
+class Pipeline:
+    """
+    Исполнитель конвейера этапов, заданного ациклическим графом зависимостей
+
+    Каждый этап запускается в пуле потоков, как только готовы результаты всех
+    этапов, от которых он зависит, поэтому общее время выполнения равно длине
+    критического пути, а не сумме времени этапов. Этапы выполняются в копии
+    контекста вызывающего потока (крайний срок публикации, токен отмены задания).
+    Если этап завершается ошибкой, новые этапы не запускаются, а ошибка
+    пробрасывается вызывающему коду после завершения уже запущенных этапов.
+    """
+
+    def __init__(self, executor=None, clock=None):
+        """
+        :param executor: Пул потоков для этапов (по умолчанию общий пул модуля)
+        :param clock: Функция монотонного времени (по умолчанию time.monotonic)
+        """
+        self.executor = executor or _stage_pool
+        self.clock = clock or time.monotonic
+        self.stages = {}
+        self.results = {}
+        self.timings = {}
+
+    def add(self, name, func, deps=()):
+        """
+        Добавляет этап в конвейер
+
+        :param name: Имя этапа
+        :param func: Функция этапа; результаты зависимостей передаются ей
+            именованными аргументами с именами этапов
+        :param deps: Имена этапов, от которых зависит этап
+        :return: Конвейер (для цепочки вызовов)
+        """
+        if name in self.stages:
+            raise PipelineError(f"Этап {name} уже добавлен в конвейер")
+        self.stages[name] = Stage(name, func, deps)
+        return self
+
+    def _validate(self):
+        """
+        Проверяет, что все зависимости существуют и граф не содержит циклов
+        """
+        for stage in self.stages.values():
+            for dep in stage.deps:
+                if dep not in self.stages:
+                    raise PipelineError(f"Этап {stage.name} зависит от неизвестного этапа {dep}")
+        visited, visiting = set(), set()
+
+        def visit(name):
+            if name in visited:
+                return
+            if name in visiting:
+                raise PipelineError(f"Цикл в зависимостях этапа {name}")
+            visiting.add(name)
+            for dep in self.stages[name].deps:
+                visit(dep)
+            visiting.discard(name)
+            visited.add(name)
+
+        for name in self.stages:
+            visit(name)
+
+    def _run_stage(self, stage, started_at):
+        start = self.clock()
+        try:
+            return stage.func(**{dep: self.results[dep] for dep in stage.deps})
+        finally:
+            end = self.clock()
+            self.timings[stage.name] = (start - started_at, end - start)
+
+    def run(self):
+        """
+        Выполняет конвейер
+
+        :return: Словарь результатов этапов по именам
+        """
+        self._validate()
+        self.results = {}
+        self.timings = {}
+        started_at = self.clock()
+        pending = dict(self.stages)
+        running = {}
+        error = None
+
+        while pending or running:
+            if error is None:
+                ready = [stage for stage in pending.values() if all(dep in self.results for dep in stage.deps)]
+                for stage in ready:
+                    del pending[stage.name]
+                    context = contextvars.copy_context()
+                    future = self.executor.submit(context.run, self._run_stage, stage, started_at)
+                    running[future] = stage.name
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    self.results[name] = future.result()
+                except BaseException as e:
+                    if error is None:
+                        error = e
+                        logger.warning(f"Этап {name} завершился ошибкой, новые этапы не запускаются: {e}")
+
+        if error is not None:
+            raise error
+        return self.results
+
+    def format_timings(self):
+        """
+        Возвращает строку со временем начала и длительностью этапов для журнала
+        """
+        return ', '.join(
+            f"{name} +{offset:.2f} с ({duration:.2f} с)"
+            for name, (offset, duration) in sorted(self.timings.items(), key=lambda item: item[1][0])
+        )
\ No newline at end of file
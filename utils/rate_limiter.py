@@ -0,0 +1,47 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Ограничитель частоты отправки сообщений
+
+    Соблюдает общий лимит (не чаще одного сообщения в global_interval секунд)
+    и лимит на отдельный чат (не чаще одного сообщения в per_key_interval секунд).
+    Каждый вызов acquire резервирует ближайший допустимый момент отправки,
+    поэтому параллельные потоки не отправляют сообщения одновременно.
+    """
+
+    def __init__(self, global_interval, per_key_interval):
+        """
+        :param global_interval: Минимальный интервал между любыми двумя отправками (секунды)
+        :param per_key_interval: Минимальный интервал между отправками в один чат (секунды)
+        """
+        self.global_interval = global_interval
+        self.per_key_interval = per_key_interval
+        self._lock = threading.Lock()
+        self._next_global = 0.0
+        self._next_by_key = {}
+
+    def reserve(self, key):
+        """
+        Резервирует момент отправки для ключа
+
+        :param key: Идентификатор чата
+        :return: Сколько секунд нужно подождать до отправки
+        """
+        with self._lock:
+            now = time.monotonic()
+            moment = max(now, self._next_global, self._next_by_key.get(key, 0.0))
+            self._next_global = moment + self.global_interval
+            self._next_by_key[key] = moment + self.per_key_interval
+            return moment - now
+
+    def acquire(self, key):
+        """
+        Блокирует поток до момента, когда отправка в чат разрешена
+        """
+        delay = self.reserve(key)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
\ No newline at end of file
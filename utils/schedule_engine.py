@@ -0,0 +1,236 @@
+import heapq
+import logging
+import time
+from datetime import datetime, timedelta
+import pytz
+
+logger = logging.getLogger(__name__)
+
+WEEK_SECONDS = 7 * 24 * 3600
+
+DAYS_OF_WEEK = {
+    'monday': 0, 'tuesday': 1, 'wednesday': 2,
+    'thursday': 3, 'friday': 4, 'saturday': 5, 'sunday': 6
+}
+
+
+class ScheduleEngine:
+    """
+    Недельное расписание на основе кучи ближайших моментов запуска
+
+    Каждый слот - день недели и локальное время в часовом поясе расписания.
+    Момент запуска хранится как UTC timestamp и пересчитывается из локального
+    времени после каждого срабатывания, поэтому переход на летнее/зимнее время
+    учитывается автоматически. Слоты хранятся кортежами, а куча содержит пары
+    (момент запуска, номер слота).
+    """
+
+    def __init__(self, timezone, clock=None):
+        """
+        :param timezone: Часовой пояс расписания (строка или объект pytz)
+        :param clock: Функция текущего времени в секундах epoch (по умолчанию time.time)
+        """
+        self.timezone = pytz.timezone(timezone) if isinstance(timezone, str) else timezone
+        self.clock = clock or time.time
+        self._slots = []
+        self._heap = []
+
+    @classmethod
+    def from_schedule(cls, schedule, timezone, clock=None, last_fired=None, misfire_grace=0):
+        """
+        Создает движок из словаря расписания {день недели: ["HH:MM", ...]}
+
+        Параметры last_fired и misfire_grace передаются в rebuild.
+        """
+        engine = cls(timezone, clock)
+        engine._slots = cls._compile(schedule)
+        engine.rebuild(last_fired=last_fired, misfire_grace=misfire_grace)
+        return engine
+
+    @staticmethod
+    def _compile(schedule):
+        """
+        Преобразует словарь расписания в список слотов, пропуская некорректные записи
+        """
+        slots = []
+        for day, times in schedule.items():
+            if day.lower() not in DAYS_OF_WEEK:
+                logger.warning(f"Неизвестный день недели: {day}. Пропускаем.")
+                continue
+            for time_str in times:
+                try:
+                    parsed = datetime.strptime(time_str, "%H:%M")
+                except ValueError as e:
+                    logger.error(f"Ошибка при настройке расписания для {day} в {time_str}: {e}")
+                    continue
+                slots.append((DAYS_OF_WEEK[day.lower()], parsed.hour, parsed.minute, f"{day.lower()} {time_str}"))
+        return slots
+
+    def update(self, schedule, timezone=None, now=None):
+        """
+        Применяет новое расписание, добавляя и удаляя только изменившиеся слоты
+
+        Неизмененные слоты сохраняют запланированный момент запуска. При смене
+        часового пояса моменты всех слотов пересчитываются. Новое состояние
+        подменяет старое одной операцией.
+
+        :return: Кортеж (множество добавленных ключей, множество удаленных ключей)
+        """
+        now = self.clock() if now is None else now
+        if timezone is not None:
+            timezone = pytz.timezone(timezone) if isinstance(timezone, str) else timezone
+        timezone_changed = timezone is not None and timezone.zone != self.timezone.zone
+        scheduled = {} if timezone_changed else {self._slots[index][3]: fire_at for fire_at, index in self._heap}
+
+        slots = self._compile(schedule)
+        old_keys = {slot[3] for slot in self._slots}
+        new_keys = {slot[3] for slot in slots}
+
+        if timezone_changed:
+            self.timezone = timezone
+        heap = []
+        for index, slot in enumerate(slots):
+            fire_at = scheduled.get(slot[3])
+            heap.append((fire_at if fire_at is not None else self._next_fire(slot, now), index))
+        heapq.heapify(heap)
+        self._slots, self._heap = slots, heap
+        return new_keys - old_keys, old_keys - new_keys
+
+    def add(self, day, time_str, key=None):
+        """
+        Добавляет слот расписания (для вступления в силу нужен rebuild)
+
+        :param day: День недели на английском ("monday")
+        :param time_str: Локальное время в формате "HH:MM"
+        :param key: Произвольный идентификатор слота (по умолчанию "day HH:MM")
+        """
+        weekday = DAYS_OF_WEEK[day.lower()]
+        parsed = datetime.strptime(time_str, "%H:%M")
+        self._slots.append((weekday, parsed.hour, parsed.minute, key or f"{day.lower()} {time_str}"))
+
+    def rebuild(self, now=None, last_fired=None, misfire_grace=0):
+        """
+        Пересчитывает ближайший момент запуска для всех слотов
+
+        Если передано время последних запусков, слот, чей последний номинальный запуск
+        был пропущен не более misfire_grace секунд назад, планируется к немедленному
+        выполнению; более старые пропуски отбрасываются. Слоты без записи о запуске
+        (новые) пропущенными не считаются.
+
+        :param now: Текущее время (UTC timestamp)
+        :param last_fired: Словарь {ключ слота: время последнего запуска}
+        :param misfire_grace: Допустимое опоздание пропущенного запуска в секундах
+        """
+        now = self.clock() if now is None else now
+        last_fired = last_fired or {}
+        self._heap = []
+        for index, slot in enumerate(self._slots):
+            fire_at = self._next_fire(slot, now)
+            previous = last_fired.get(slot[3])
+            if previous is not None:
+                missed = self._prev_fire(slot, now)
+                if previous < missed:
+                    if now - missed <= misfire_grace:
+                        logger.info(f"Слот {slot[3]} пропущен при простое и будет выполнен сейчас")
+                        fire_at = missed
+                    else:
+                        logger.warning(f"Слот {slot[3]} пропущен более {misfire_grace} с назад и не будет выполнен")
+            self._heap.append((fire_at, index))
+        heapq.heapify(self._heap)
+
+    def _next_fire(self, slot, after):
+        """
+        Вычисляет ближайший момент запуска слота строго после after
+
+        Несуществующее локальное время (переход на летнее время) сдвигается вперед,
+        неоднозначное (переход на зимнее время) срабатывает один раз - в первое наступление.
+
+        :return: UTC timestamp
+        """
+        weekday, hour, minute, _ = slot
+        local_after = datetime.fromtimestamp(after, pytz.UTC).astimezone(self.timezone)
+        date = local_after.date() + timedelta(days=(weekday - local_after.weekday()) % 7)
+        while True:
+            naive = datetime(date.year, date.month, date.day, hour, minute)
+            fire_at = self._localize(naive).timestamp()
+            if fire_at > after:
+                return fire_at
+            date += timedelta(days=7)
+
+    def _prev_fire(self, slot, before):
+        """
+        Вычисляет последний момент запуска слота не позже before
+
+        :return: UTC timestamp
+        """
+        # Запас в два часа покрывает сдвиг при переходе на летнее/зимнее время
+        fire_at = self._next_fire(slot, before - WEEK_SECONDS - 7200)
+        while True:
+            next_fire = self._next_fire(slot, fire_at)
+            if next_fire > before:
+                return fire_at
+            fire_at = next_fire
+
+    def _localize(self, naive):
+        try:
+            return self.timezone.localize(naive, is_dst=None)
+        except pytz.exceptions.NonExistentTimeError:
+            # Время попало в "пропущенный" час: смещение до перехода сдвигает его вперед
+            return self.timezone.localize(naive, is_dst=False)
+        except pytz.exceptions.AmbiguousTimeError:
+            return self.timezone.localize(naive, is_dst=True)
+
+    def seconds_until_next(self, now=None):
+        """
+        :return: Секунды до ближайшего запуска (0, если запуск уже наступил) или None, если слотов нет
+        """
+        if not self._heap:
+            return None
+        now = self.clock() if now is None else now
+        return max(self._heap[0][0] - now, 0.0)
+
+    def pop_due(self, now=None):
+        """
+        Извлекает наступившие слоты и планирует их следующие запуски
+
+        Слот, пропустивший несколько запусков, возвращается один раз
+        с номинальным временем первого пропущенного запуска.
+
+        :return: Список кортежей (ключ слота, номинальный UTC timestamp)
+        """
+        now = self.clock() if now is None else now
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            fire_at, index = self._heap[0]
+            slot = self._slots[index]
+            heapq.heapreplace(self._heap, (self._next_fire(slot, now), index))
+            due.append((slot[3], fire_at))
+        return due
+
+    def next_runs(self, n):
+        """
+        Возвращает n ближайших запусков без изменения расписания
+
+        Обходит кучу как дерево, раскрывая только нужные узлы, и добавляет
+        следующий запуск слота после каждого извлечения: O(n log n) независимо
+        от общего числа слотов.
+
+        :return: Список кортежей (ключ слота, время запуска в часовом поясе расписания)
+        """
+        result = []
+        if not self._heap or n <= 0:
+            return result
+        # Элементы: (момент запуска, номер слота, индекс узла кучи или -1 для повторного запуска)
+        frontier = [(self._heap[0][0], self._heap[0][1], 0)]
+        while frontier and len(result) < n:
+            fire_at, index, node = heapq.heappop(frontier)
+            result.append((self._slots[index][3], datetime.fromtimestamp(fire_at, pytz.UTC).astimezone(self.timezone)))
+            if node >= 0:
+                for child in (2 * node + 1, 2 * node + 2):
+                    if child < len(self._heap):
+                        heapq.heappush(frontier, self._heap[child] + (child,))
+            heapq.heappush(frontier, (self._next_fire(self._slots[index], fire_at), index, -1))
+        return result
+
+    def __len__(self):
+        return len(self._slots)
\ No newline at end of file
@@ -1,20 +1,62 @@
+import contextvars
 import time
 import logging
+import threading
 import schedule
 import pytz
+from collections import deque
+from functools import partial
 from datetime import datetime, timedelta
-from config.config import SCHEDULE, TIMEZONE
+from config.config import SCHEDULE, TIMEZONE, MISFIRE_GRACE_SECONDS, JOB_COALESCE
+from utils.schedule_engine import ScheduleEngine
+from utils import metrics
 
 logger = logging.getLogger(__name__)
 
+# Максимальная пауза событийного цикла: раз в это время планировщик
+# сверяется с системными часами и пишет в лог о своей активности
+MAX_IDLE_SECONDS = 300
+# Сколько последних запусков учитывается в статистике опозданий
+LATENESS_HISTORY_SIZE = 100
+
+# Слот текущего задания: (ключ слота, номинальное время запуска в секундах epoch)
+_current_slot = contextvars.ContextVar('schedule_slot', default=None)
+
+
+def current_slot():
+    """
+    Возвращает слот расписания, для которого выполняется текущее задание
+
+    :return: Кортеж (ключ слота, номинальное время запуска в секундах epoch) или None вне задания планировщика
+    """
+    return _current_slot.get()
+
 class Scheduler:
-    def __init__(self, job_function):
+    def __init__(self, job_function, event_driven=False, executor=None, job_store=None,
+                 misfire_grace=MISFIRE_GRACE_SECONDS, coalesce=JOB_COALESCE):
         """
         Инициализирует планировщик с расписанием по дням недели и времени
         
         :param job_function: Функция, которая будет выполняться по расписанию
+        :param event_driven: Спать до ближайшего запуска вместо ежесекундного опроса
+        :param executor: JobExecutor для выполнения заданий в пуле потоков
+            (в событийном режиме; без него задание выполняется в цикле планировщика)
+        :param job_store: JobStore для учета запусков и выполнения пропущенных слотов после перезапуска
+        :param misfire_grace: Максимальное опоздание пропущенного слота в секундах, при котором он еще выполняется
+        :param coalesce: Выполнять одновременно наступившие слоты одним запуском
         """
         self.job_function = job_function
+        self.event_driven = event_driven
+        self.executor = executor
+        self.job_store = job_store
+        self.misfire_grace = misfire_grace
+        self.coalesce = coalesce
+        self._wakeup = threading.Event()
+        self._stop_requested = False
+        self._reload_requested = False
+        self._pending_config = None
+        self._lateness = deque(maxlen=LATENESS_HISTORY_SIZE)
+        self._engine = None
         self.timezone = pytz.timezone(TIMEZONE)
         self.schedule = SCHEDULE
         self.days_of_week = {
@@ -42,6 +84,15 @@ class Scheduler:
         """
         Настраивает расписание выполнения задачи по дням недели и времени
         """
+        if self.event_driven:
+            # Событийный режим использует собственный движок расписания в часовом поясе TIMEZONE
+            last_fired = self.job_store.load() if self.job_store is not None else None
+            self._engine = ScheduleEngine.from_schedule(
+                self.schedule, self.timezone, last_fired=last_fired, misfire_grace=self.misfire_grace
+            )
+            logger.info(f"Запланировано слотов отправки цитат: {len(self._engine)}")
+            return
+        
         # Очищаем текущее расписание
         schedule.clear()
         
@@ -53,6 +104,7 @@ class Scheduler:
                 
             for time_str in times:
                 try:
+                    job = partial(self._run_polling_job, f"{day.lower()} {time_str}", time_str)
                     # Сначала конвертируем время из настройки в UTC
                     utc_time = self._convert_to_utc(time_str)
                     
@@ -68,19 +120,19 @@ class Scheduler:
                     # Для каждого времени добавляем задачу в расписание,
                     # используя время, соответствующее локальному системному времени
                     if day.lower() == 'monday':
-                        schedule.every().monday.at(system_time).do(self.job_function)
+                        schedule.every().monday.at(system_time).do(job)
                     elif day.lower() == 'tuesday':
-                        schedule.every().tuesday.at(system_time).do(self.job_function)
+                        schedule.every().tuesday.at(system_time).do(job)
                     elif day.lower() == 'wednesday':
-                        schedule.every().wednesday.at(system_time).do(self.job_function)
+                        schedule.every().wednesday.at(system_time).do(job)
                     elif day.lower() == 'thursday':
-                        schedule.every().thursday.at(system_time).do(self.job_function)
+                        schedule.every().thursday.at(system_time).do(job)
                     elif day.lower() == 'friday':
-                        schedule.every().friday.at(system_time).do(self.job_function)
+                        schedule.every().friday.at(system_time).do(job)
                     elif day.lower() == 'saturday':
-                        schedule.every().saturday.at(system_time).do(self.job_function)
+                        schedule.every().saturday.at(system_time).do(job)
                     elif day.lower() == 'sunday':
-                        schedule.every().sunday.at(system_time).do(self.job_function)
+                        schedule.every().sunday.at(system_time).do(job)
                         
                     logger.info(f"Запланирована отправка цитаты в {day} в {time_str} (UTC: {utc_time}, Системное: {system_time})")
                 except Exception as e:
@@ -90,6 +142,12 @@ class Scheduler:
         """
         Получает следующее время запуска задачи в локальной временной зоне
         """
+        if self._engine is not None:
+            next_runs = self._engine.next_runs(1)
+            if next_runs:
+                return next_runs[0][1].strftime("%Y-%m-%d %H:%M:%S %Z")
+            return "не запланировано"
+        
         next_run = schedule.next_run()
         if next_run:
             # next_run возвращается как naive datetime в системном часовом поясе
@@ -113,16 +171,205 @@ class Scheduler:
             return local_next_run.strftime("%Y-%m-%d %H:%M:%S %Z")
         return "не запланировано"
                 
+    def get_next_run_timestamp(self):
+        """
+        Возвращает время ближайшего запуска в секундах epoch или None, если заданий нет
+        """
+        if self._engine is not None:
+            next_runs = self._engine.next_runs(1)
+            return next_runs[0][1].timestamp() if next_runs else None
+        next_run = schedule.next_run()
+        # next_run - naive datetime в системном часовом поясе
+        return next_run.timestamp() if next_run else None
+    
+    def _seconds_until_next_run(self):
+        """
+        Возвращает число секунд до ближайшего запуска или None, если заданий нет
+        """
+        if self._engine is not None:
+            return self._engine.seconds_until_next()
+        return schedule.idle_seconds()
+    
+    def _run_due_jobs(self):
+        """
+        Выполняет наступившие задания и записывает опоздание каждого запуска
+        относительно его номинального времени
+        """
+        if self._engine is not None:
+            now = self._engine.clock()
+            due = self._engine.pop_due(now)
+            if self.job_store is not None:
+                for key, nominal in due:
+                    self.job_store.record(key, nominal)
+            if self.coalesce and len(due) > 1:
+                # Несколько пропущенных слотов публикуют одну цитату - по последнему из них
+                logger.info(f"Объединено наступивших слотов: {len(due)}")
+                due = [max(due, key=lambda item: item[1])]
+            for key, nominal in due:
+                lateness = max(now - nominal, 0.0)
+                self._record_lateness(lateness)
+                logger.info(f"Запуск слота {key}, опоздание {lateness:.3f} с")
+                # Задание (в том числе в пуле потоков и задаче asyncio) видит свой слот
+                token = _current_slot.set((key, nominal))
+                try:
+                    self._run_job(key)
+                finally:
+                    _current_slot.reset(token)
+            return
+        
+        due_jobs = sorted(job for job in schedule.get_jobs() if job.should_run)
+        for job in due_jobs:
+            nominal = job.next_run
+            lateness = max((datetime.now() - nominal).total_seconds(), 0.0)
+            self._record_lateness(lateness)
+            logger.info(f"Запуск задания, запланированного на {nominal.strftime('%H:%M:%S')}, опоздание {lateness:.3f} с")
+            job.run()
+    
+    def _run_polling_job(self, key, time_str):
+        """
+        Выполняет задание слота в режиме опроса, сообщая ему слот и номинальное время запуска
+        
+        :param key: Ключ слота (день недели и время)
+        :param time_str: Время слота в формате "HH:MM" в часовом поясе расписания
+        """
+        now = datetime.now(self.timezone).replace(tzinfo=None)
+        hour, minute = map(int, time_str.split(':'))
+        nominal = self.timezone.localize(now.replace(hour=hour, minute=minute, second=0, microsecond=0))
+        token = _current_slot.set((key, nominal.timestamp()))
+        try:
+            return self.job_function()
+        finally:
+            _current_slot.reset(token)
+    
+    def _run_job(self, key):
+        """
+        Выполняет задание наступившего слота
+        
+        :param key: Ключ слота
+        """
+        if self.executor is not None:
+            # Медленное задание не задерживает следующие слоты
+            self.executor.submit(self.job_function, key)
+            return
+        try:
+            self.job_function()
+        except Exception as e:
+            logger.error(f"Ошибка при выполнении задания для слота {key}: {e}")
+    
+    def _record_lateness(self, lateness):
+        self._lateness.append(lateness)
+        metrics.PUBLISH_LAG.observe(lateness)
+    
+    def get_lateness_stats(self):
+        """
+        Возвращает статистику опозданий запусков относительно номинального времени
+        
+        :return: Словарь с количеством запусков, последним, средним и максимальным опозданием в секундах
+        """
+        history = list(self._lateness)
+        if not history:
+            return {'count': 0, 'last': None, 'avg': None, 'max': None}
+        return {
+            'count': len(history),
+            'last': history[-1],
+            'avg': sum(history) / len(history),
+            'max': max(history)
+        }
+    
+    def stop(self):
+        """
+        Останавливает цикл планировщика (безопасно вызывать из другого потока);
+        в режиме опроса цикл завершается в течение секунды. Остановка, запрошенная
+        до start(), не теряется: такой планировщик сразу завершает работу
+        """
+        self._stop_requested = True
+        self._wakeup.set()
+    
+    def reload(self, schedule=None, timezone=None):
+        """
+        Запрашивает применение нового расписания (безопасно вызывать из другого потока
+        и обработчика сигнала); изменения применяются в цикле планировщика
+        (в режиме опроса - в течение секунды)
+        
+        :param schedule: Новый словарь расписания (None - оставить текущее)
+        :param timezone: Новый часовой пояс (None - оставить текущий)
+        """
+        self._pending_config = (schedule, timezone)
+        self._reload_requested = True
+        self._wakeup.set()
+    
+    def _apply_reload(self):
+        """
+        Применяет запрошенное расписание: в событийном режиме добавляются и удаляются
+        только изменившиеся слоты, иначе расписание настраивается заново
+        """
+        schedule, timezone = self._pending_config or (None, None)
+        self._pending_config = None
+        if schedule is not None:
+            self.schedule = schedule
+        if timezone is not None:
+            self.timezone = pytz.timezone(timezone)
+        
+        if self._engine is not None:
+            added, removed = self._engine.update(self.schedule, self.timezone)
+            logger.info(
+                f"Расписание обновлено: добавлено слотов {len(added)}, удалено {len(removed)}"
+                + (f" ({', '.join(sorted(added | removed))})" if added or removed else "")
+            )
+        else:
+            self._setup_schedule()
+    
+    def _run_event_loop(self):
+        """
+        Событийный цикл: спит до ближайшего запуска по монотонным часам,
+        просыпаясь раньше при остановке или перезагрузке расписания
+        """
+        while not self._stop_requested:
+            self._wakeup.clear()
+            if self._reload_requested:
+                self._reload_requested = False
+                self._apply_reload()
+                logger.info(f"Расписание перезагружено. Следующее выполнение: {self._get_next_run_time()}")
+            
+            self._run_due_jobs()
+            
+            idle = self._seconds_until_next_run()
+            timeout = MAX_IDLE_SECONDS if idle is None else min(max(idle, 0.0), MAX_IDLE_SECONDS)
+            deadline = time.monotonic() + timeout
+            # Event.wait отсчитывает таймаут по монотонным часам; досыпаем при раннем возврате
+            while not self._wakeup.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._wakeup.wait(remaining)
+            
+            if idle is None or idle > MAX_IDLE_SECONDS:
+                logger.info(f"Планировщик активен. Следующее выполнение: {self._get_next_run_time()}")
+        logger.info("Планировщик остановлен")
+    
     def start(self):
         """
         Запускает планировщик
         """
-        logger.info(f"Планировщик запущен с часовым поясом {TIMEZONE}")
+        if self._reload_requested:
+            # Расписание, перезагруженное до запуска, применяется сразу, чтобы в лог попал его часовой пояс
+            self._reload_requested = False
+            self._apply_reload()
+        logger.info(f"Планировщик запущен с часовым поясом {self.timezone.zone}")
         logger.info(f"Следующее выполнение: {self._get_next_run_time()}")
         
-        # Запускаем бесконечный цикл для выполнения задач
+        if self.event_driven:
+            self._run_event_loop()
+            return
+        
+        # Запускаем цикл опроса, который работает до вызова stop()
         last_log_time = datetime.now()
-        while True:
+        while not self._stop_requested:
+            if self._reload_requested:
+                self._reload_requested = False
+                self._apply_reload()
+                logger.info(f"Расписание перезагружено. Следующее выполнение: {self._get_next_run_time()}")
+            
             schedule.run_pending()
             
             # Логируем активность каждые 5 минут
@@ -131,4 +378,5 @@ class Scheduler:
                 logger.info(f"Планировщик активен. Следующее выполнение: {self._get_next_run_time()}")
                 last_log_time = now
                 
-            time.sleep(1) 
\ No newline at end of file
+            time.sleep(1)
+        logger.info("Планировщик остановлен")
\ No newline at end of file
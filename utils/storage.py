@@ -0,0 +1,64 @@
+import json
+import logging
+import os
+import tempfile
+from config.config import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+
+def get_data_path(*parts):
+    """
+    Возвращает путь внутри каталога постоянных данных, создавая недостающие каталоги
+
+    :param parts: Составные части пути относительно DATA_DIR
+    :return: Абсолютный путь или None, если каталог недоступен для записи
+    """
+    path = os.path.join(DATA_DIR, *parts)
+    directory = os.path.dirname(path) if parts else path
+    try:
+        os.makedirs(directory, exist_ok=True)
+    except OSError as e:
+        logger.warning(f"Каталог данных {directory} недоступен: {e}")
+        return None
+    if not os.access(directory, os.W_OK):
+        logger.warning(f"Нет прав на запись в каталог данных {directory}")
+        return None
+    return path
+
+
+def atomic_write_json(path, data):
+    """
+    Атомарно записывает данные в JSON-файл (через временный файл и os.replace)
+
+    :param path: Путь к файлу
+    :param data: Сериализуемые в JSON данные
+    """
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.json')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def read_json(path, default=None):
+    """
+    Читает JSON-файл, возвращая значение по умолчанию при отсутствии или повреждении файла
+
+    :param path: Путь к файлу
+    :param default: Значение по умолчанию
+    :return: Прочитанные данные или default
+    """
+    if not path or not os.path.exists(path):
+        return default
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Не удалось прочитать файл {path}: {e}")
+        return default
\ No newline at end of file
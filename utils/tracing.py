@@ -0,0 +1,424 @@
+import contextvars
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = 'motiveminder'
+
+STATUS_OK = 'ok'
+STATUS_ERROR = 'error'
+
+# Результат вызова метода сервиса в атрибуте outcome
+OUTCOME_OK = 'ok'
+OUTCOME_EMPTY = 'empty'
+OUTCOME_ERROR = 'error'
+
+# Текущий span (наследуется этапами публикации через копию контекста)
+_current_span = contextvars.ContextVar('trace_span', default=None)
+
+_exporter = None
+
+
+class Span:
+    """
+    Интервал трассировки: операция с временем начала и окончания, атрибутами и статусом
+    """
+
+    def __init__(self, trace, name, parent_id=None, attributes=None):
+        self.trace = trace
+        self.trace_id = trace.trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.status = STATUS_OK
+        self.error = None
+        self.start = time.time()
+        self._started = time.monotonic()
+        self.duration = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def add_bytes(self, count):
+        """
+        Увеличивает счетчик переданных байт операции
+        """
+        self.attributes['bytes'] = self.attributes.get('bytes', 0) + count
+
+    def set_error(self, error):
+        self.status = STATUS_ERROR
+        self.error = str(error)
+
+    def finish(self):
+        self.duration = time.monotonic() - self._started
+        self.trace.add(self)
+
+    @property
+    def end(self):
+        return self.start + (self.duration or 0.0)
+
+    def to_dict(self):
+        data = {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start': self.start,
+            'end': self.end,
+            'duration': self.duration,
+            'status': self.status,
+            'attributes': self.attributes
+        }
+        if self.error:
+            data['error'] = self.error
+        return data
+
+
+class Trace:
+    """
+    Трассировка одной публикации: идентификатор и завершенные интервалы
+    """
+
+    def __init__(self, trace_id=None):
+        """
+        :param trace_id: Идентификатор продолжаемой трассировки (None - новая трассировка)
+        """
+        self.trace_id = trace_id or secrets.token_hex(16)
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+
+class _NoopSpan:
+    """
+    Заглушка вне трассировки: вызовы сервисов вне публикации ничего не записывают
+    """
+    trace_id = None
+    span_id = None
+
+    def set_attribute(self, key, value):
+        pass
+
+    def add_bytes(self, count):
+        pass
+
+    def set_error(self, error):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def set_exporter(exporter):
+    """
+    Задает экспортер завершенных трассировок (None - не экспортировать)
+    """
+    global _exporter
+    _exporter = exporter
+
+
+def get_exporter():
+    return _exporter
+
+
+def current_span():
+    """
+    :return: Текущий span или заглушка вне трассировки
+    """
+    return _current_span.get() or NOOP_SPAN
+
+
+def resume_current(name, **attributes):
+    """
+    Продолжает трассировку текущего span в другом потоке после ее завершения
+
+    :param name: Имя операции
+    :return: Контекстный менеджер, как у start_trace (вне трассировки - новая трассировка)
+    """
+    parent = current_span()
+    return start_trace(name, trace_id=parent.trace_id, parent_id=parent.span_id, **attributes)
+
+
+def add_bytes(count):
+    """
+    Добавляет переданные байты к текущему span
+    """
+    current_span().add_bytes(count)
+
+
+@contextmanager
+def start_trace(name, trace_id=None, parent_id=None, **attributes):
+    """
+    Начинает трассировку публикации с корневым span; по завершении
+    все интервалы передаются экспортеру
+
+    С trace_id и parent_id продолжает уже завершенную трассировку: так отложенная
+    работа публикации (доставка из очереди отправки, добавление изображения)
+    попадает в ту же трассировку дочерним интервалом.
+
+    :param name: Имя корневой операции
+    :param trace_id: Идентификатор продолжаемой трассировки
+    :param parent_id: Идентификатор родительского span продолжаемой трассировки
+    :return: Корневой span
+    """
+    trace = Trace(trace_id)
+    root = Span(trace, name, parent_id=parent_id, attributes=attributes)
+    token = _current_span.set(root)
+    try:
+        yield root
+    except BaseException as e:
+        root.set_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        root.finish()
+        if _exporter is not None:
+            try:
+                _exporter.export(sorted(trace.spans, key=lambda span: span.start))
+            except Exception as e:
+                logger.warning(f"Не удалось экспортировать трассировку {trace.trace_id}: {e}")
+
+
+@contextmanager
+def span(name, **attributes):
+    """
+    Записывает дочерний span текущей трассировки (вне трассировки ничего не делает)
+
+    :param name: Имя операции
+    :return: Span или заглушка
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield NOOP_SPAN
+        return
+    child = Span(parent.trace, name, parent_id=parent.span_id, attributes=attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.set_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        child.finish()
+
+
+def traced(name):
+    """
+    Декоратор: записывает вызов как дочерний span с результатом в атрибуте outcome
+    (ok, empty - пустой или неуспешный результат, error - исключение)
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name) as current:
+                try:
+                    result = func(*args, **kwargs)
+                except BaseException:
+                    current.set_attribute('outcome', OUTCOME_ERROR)
+                    raise
+                empty = result is None or (not isinstance(result, (str, tuple)) and not result)
+                current.set_attribute('outcome', OUTCOME_EMPTY if empty else OUTCOME_OK)
+                return result
+        return wrapper
+    return decorator
+
+
+class JsonlExporter:
+    """
+    Экспортер в локальный JSONL-файл (один span на строку) с ротацией по размеру
+    """
+
+    def __init__(self, path, max_bytes=10 * 1024 * 1024, backup_count=3):
+        """
+        :param path: Путь к файлу
+        :param max_bytes: Размер файла, после которого он переименовывается в path.1
+        :param backup_count: Количество сохраняемых старых файлов
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._lock = threading.Lock()
+
+    def _rotate(self):
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.unlink(self.path)
+
+    def export(self, spans):
+        lines = ''.join(json.dumps(span.to_dict(), ensure_ascii=False) + '\n' for span in spans)
+        with self._lock:
+            if os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_bytes:
+                self._rotate()
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(lines)
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def to_otlp(spans):
+    """
+    Преобразует интервалы в тело запроса OTLP/HTTP JSON (ExportTraceServiceRequest)
+    """
+    otlp_spans = []
+    for item in spans:
+        otlp_span = {
+            'traceId': item.trace_id,
+            'spanId': item.span_id,
+            'name': item.name,
+            'kind': 1,
+            'startTimeUnixNano': str(int(item.start * 1e9)),
+            'endTimeUnixNano': str(int(item.end * 1e9)),
+            'attributes': [{'key': key, 'value': _otlp_value(value)} for key, value in item.attributes.items()],
+            'status': {'code': 2, 'message': item.error or ''} if item.status == STATUS_ERROR else {'code': 1}
+        }
+        if item.parent_id:
+            otlp_span['parentSpanId'] = item.parent_id
+        otlp_spans.append(otlp_span)
+    return {
+        'resourceSpans': [{
+            'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': SERVICE_NAME}}]},
+            'scopeSpans': [{'scope': {'name': SERVICE_NAME}, 'spans': otlp_spans}]
+        }]
+    }
+
+
+class OtlpExporter:
+    """
+    Экспортер в OTLP-совместимый коллектор по HTTP/JSON
+
+    Отправка выполняется в фоновом потоке и не задерживает публикацию; запросы
+    идут мимо http_client, чтобы не попадать под крайний срок и предохранители.
+    """
+
+    def __init__(self, endpoint, timeout=5):
+        """
+        :param endpoint: URL приема трассировок (например, http://localhost:4318/v1/traces)
+        :param timeout: Таймаут запроса в секундах
+        """
+        self.endpoint = endpoint
+        self.timeout = timeout
+        self._session = requests.Session()
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='trace-export')
+
+    def _send(self, body):
+        try:
+            response = self._session.post(self.endpoint, json=body, timeout=self.timeout)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            logger.warning(f"Не удалось отправить трассировку в {self.endpoint}: {e}")
+
+    def export(self, spans):
+        return self._pool.submit(self._send, to_otlp(spans))
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+        self._session.close()
+
+
+class _CollectorHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        if self.path.split('?', 1)[0] != '/v1/traces':
+            self.send_response(404)
+            self.end_headers()
+            return
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            body = json.loads(self.rfile.read(length))
+        except ValueError:
+            self.send_response(400)
+            self.end_headers()
+            return
+        self.server.collector.write(body)
+        data = b'{}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LocalCollector:
+    """
+    Локальная замена OTLP-коллектора: принимает POST /v1/traces и дописывает
+    полученные интервалы в JSONL-файл (для отладки без внешней инфраструктуры)
+    """
+
+    def __init__(self, output_path, host='127.0.0.1', port=4318):
+        self.output_path = output_path
+        self.host = host
+        self.port = port
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    def write(self, body):
+        lines = []
+        for resource_spans in body.get('resourceSpans', []):
+            for scope_spans in resource_spans.get('scopeSpans', []):
+                for otlp_span in scope_spans.get('spans', []):
+                    lines.append(json.dumps(otlp_span, ensure_ascii=False) + '\n')
+        with self._lock, open(self.output_path, 'a', encoding='utf-8') as f:
+            f.writelines(lines)
+
+    def start(self):
+        self._server = ThreadingHTTPServer((self.host, self.port), _CollectorHandler)
+        self._server.daemon_threads = True
+        self._server.collector = self
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name='trace-collector', daemon=True)
+        self._thread.start()
+        logger.info(f"Локальный коллектор трассировок запущен на порту {self.port}, файл {self.output_path}")
+
+    def serve_forever(self):
+        self.start()
+        self._thread.join()
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+if __name__ == '__main__':
+    # python -m utils.tracing traces.jsonl [порт] - запускает локальный коллектор
+    import sys
+    logging.basicConfig(level=logging.INFO)
+    LocalCollector(
+        sys.argv[1] if len(sys.argv) > 1 else 'traces.jsonl',
+        port=int(sys.argv[2]) if len(sys.argv) > 2 else 4318
+    ).serve_forever()
\ No newline at end of file